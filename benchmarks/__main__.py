@@ -0,0 +1,143 @@
+import argparse
+import os
+import sys
+from benchmarks.cases import BENCHMARK_CASES
+from benchmarks.parameters import SCALES, ParameterGrid, get_parameters
+from benchmarks.runner import compare_results, format_parameters, format_quality, load_results, run_benchmarks, save_results
+
+_BASELINE_DIRECTORY = os.path.join(os.path.dirname(__file__), 'baselines')
+
+
+def _get_baseline_path(name_or_path):
+    if os.path.isfile(name_or_path) or name_or_path.endswith('.json'):
+        return name_or_path
+    return os.path.join(_BASELINE_DIRECTORY, f'{name_or_path}.json')
+
+
+def _load_baseline(name_or_path):
+    '''
+    None if the baseline does not exist yet. Baselines are only comparable on the
+    machine they were measured on, so none are shipped and every machine saves its own
+    '''
+    path = _get_baseline_path(name_or_path)
+    if not os.path.isfile(path):
+        print(f'Baseline {path} does not exist, so the comparison is skipped. '
+              f'Create it with "python -m benchmarks run --save {name_or_path}" on the version to compare against')
+        return None
+    return load_results(path)
+
+
+def _parse_arguments():
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks', description='Measure and compare the speed of the HFO detection',
+        epilog='Baselines are only comparable on the same machine, so none are shipped. Save one with '
+        '"run --save <name>" before changing the code. Comparisons against a missing baseline are skipped')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    default_scale = 'default'
+    default_repeat = 3
+    default_tolerance = 0.1
+
+    run_parser = subparsers.add_parser(
+        'run', help='Run the benchmarks and save their results')
+    run_parser.add_argument('--scale', type=str, default=default_scale, choices=SCALES.keys(),
+                            help=f'Predefined input sizes. Default is {default_scale}')
+    run_parser.add_argument('--cases', type=str, nargs='+', default=None,
+                            help=f'Only run these benchmarks. Possible values: {", ".join(case.name for case in BENCHMARK_CASES)}')
+    run_parser.add_argument('--durations', type=float, nargs='+', default=None,
+                            help='Seconds of recording. Overrides the ones of --scale')
+    run_parser.add_argument('--sampling-frequencies', type=float, nargs='+', default=None,
+                            help='Samples per second. Overrides the ones of --scale')
+    run_parser.add_argument('--channel-counts', type=int, nargs='+', default=None,
+                            help='Amount of channels. Overrides the ones of --scale')
+    run_parser.add_argument('--spike-densities', type=float, nargs='+', default=None,
+                            help='Spikes per second per input spike train. Overrides the ones of --scale')
+    run_parser.add_argument('--repeat', type=int, default=default_repeat,
+                            help=f'How often every benchmark is measured. The best time counts. Default is {default_repeat}')
+    run_parser.add_argument('--save', type=str, default=None,
+                            help=f'Name of the baseline in {_BASELINE_DIRECTORY} or path to a JSON file to save the results to')
+    run_parser.add_argument('--compare', type=str, default=None,
+                            help='Name or path of a baseline to compare the results to. Skipped if it does not exist yet')
+    run_parser.add_argument('--tolerance', type=float, default=default_tolerance,
+                            help=f'How much slower than the baseline a benchmark may be before it counts as a regression. Default is {default_tolerance}, i.e. 10 %%')
+
+    compare_parser = subparsers.add_parser(
+        'compare', help='Compare two saved results')
+    compare_parser.add_argument('baseline', type=str,
+                                help='Name or path of the baseline. The comparison is skipped if it does not exist yet')
+    compare_parser.add_argument('current', type=str,
+                                help='Name or path of the results to check')
+    compare_parser.add_argument('--tolerance', type=float, default=default_tolerance,
+                                help=f'How much slower than the baseline a benchmark may be before it counts as a regression. Default is {default_tolerance}, i.e. 10 %%')
+    return parser.parse_args()
+
+
+def _get_grid(arguments):
+    grid = SCALES[arguments.scale]
+    return ParameterGrid(
+        durations=arguments.durations or grid.durations,
+        sampling_frequencies=arguments.sampling_frequencies or grid.sampling_frequencies,
+        channel_counts=arguments.channel_counts or grid.channel_counts,
+        spike_densities=arguments.spike_densities or grid.spike_densities)
+
+
+def _get_cases(case_names):
+    if case_names is None:
+        return BENCHMARK_CASES
+    cases = {case.name: case for case in BENCHMARK_CASES}
+    unknown_case_names = [name for name in case_names if name not in cases]
+    if len(unknown_case_names) != 0:
+        sys.exit(
+            f'benchmarks: error: unknown benchmarks: {", ".join(unknown_case_names)}')
+    return [cases[name] for name in case_names]
+
+
+def _print_result(result):
+    quality = f', {format_quality(result.quality)}' if result.quality is not None else ''
+    print(
+        f'{result.case} ({format_parameters(result.parameters)}): best {result.best:.4f} s, median {result.median:.4f} s{quality}')
+
+
+def _print_comparisons(comparisons):
+    for comparison in comparisons:
+        description = f'{comparison.case} ({format_parameters(comparison.parameters)})'
+        if comparison.baseline is None:
+            print(f'NEW        {description}: {comparison.current:.4f} s')
+            continue
+        status = 'REGRESSION' if comparison.is_regression else 'OK'
+        quality = f', worse {", ".join(comparison.quality_regressions)}' if len(
+            comparison.quality_regressions) != 0 else ''
+        print(f'{status:<10} {description}: {comparison.baseline:.4f} s -> {comparison.current:.4f} s ({comparison.ratio:.2f}x){quality}')
+    regressions = [
+        comparison for comparison in comparisons if comparison.is_regression]
+    print(f'{len(regressions)} of {len(comparisons)} benchmarks regressed')
+    return len(regressions) == 0
+
+
+def _run(arguments):
+    results = run_benchmarks(cases=_get_cases(arguments.cases),
+                             parameters=get_parameters(_get_grid(arguments)),
+                             repeat=arguments.repeat,
+                             progress_cb=_print_result)
+    if arguments.save is not None:
+        save_results(_get_baseline_path(arguments.save), results)
+    if arguments.compare is None:
+        return True
+    baseline = _load_baseline(arguments.compare)
+    if baseline is None:
+        return True
+    return _print_comparisons(compare_results(baseline, results, arguments.tolerance))
+
+
+def _compare(arguments):
+    baseline = _load_baseline(arguments.baseline)
+    if baseline is None:
+        return True
+    current = load_results(_get_baseline_path(arguments.current))
+    return _print_comparisons(compare_results(baseline, current, arguments.tolerance))
+
+
+if __name__ == '__main__':
+    parsed_arguments = _parse_arguments()
+    is_successful = _run(parsed_arguments) if parsed_arguments.command == 'run' else _compare(
+        parsed_arguments)
+    sys.exit(0 if is_successful else 1)
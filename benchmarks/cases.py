@@ -0,0 +1,289 @@
+import shutil
+import tempfile
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+from snn_hfo_detection.user_facing_data import ChannelData, Configuration, MeasurementMode, Metadata, PersistenceFormat, PlotMode, PlottingFunctions, TimeBase
+from snn_hfo_detection.functions.filter import butter_bandpass_filter, butter_bandpass_filter_bank
+from snn_hfo_detection.functions.hfo_detection import detect_hfo
+from snn_hfo_detection.functions.signal_to_spike.selector import SignalToSpikeAlgorithm, signal_to_spike
+from snn_hfo_detection.functions.signal_to_spike.utility import SignalToSpikeParameters, concatenate_spikes, find_thresholds
+from snn_hfo_detection.stages.all import HFO_DETECTION_STEP_SIZE, HFO_DETECTION_WINDOW_SIZE, SnnOutput, run_all_hfo_detection_stages, run_detection_step
+from snn_hfo_detection.stages.snn.cache import Caches
+from snn_hfo_detection.stages.snn.stage import snn_stage
+from snn_hfo_detection.stages.persistence.saving import save_hfo_detection
+from snn_hfo_detection.stages.persistence.loading import load_hfo_detection
+from snn_hfo_detection.stages.loading.patient_data import extract_channel_data
+from snn_hfo_detection.synthetic import DetectionScore, SyntheticEvent, score_detection
+from benchmarks.inputs import generate_filtered_spikes, generate_output_spike_times, generate_synthetic_recording, generate_time_base, generate_wideband_signals
+
+_RIPPLE_LOWCUT = 80
+_RIPPLE_HIGHCUT = 250
+_FAST_RIPPLE_HIGHCUT = 500
+_FILTER_ORDER = 2
+_REFRACTORY_PERIOD = 3e-4
+_INTERPOLATION_FACTOR = 35_000
+_SCALING_FACTOR = 0.6
+_METADATA = Metadata(interval=1, channel=1,
+                     channel_label='benchmark', duration=0)
+
+
+class BenchmarkCase(NamedTuple):
+    '''
+    Parameters
+    -------
+    name : str
+        unique name of the benchmark
+    parameter_names : Tuple[str, ...]
+        the fields of BenchmarkParameters that change the result of the benchmark
+    prepare : Callable[[BenchmarkParameters], Any]
+        creates the inputs, which is not measured
+    run : Callable[[Any], Any]
+        the measured code, receiving the inputs
+    evaluate : Optional[Callable[[Any, Any], Dict[str, float]]]
+        rates the quality of what run returned for the inputs, where higher is better.
+        None if only the speed matters
+    '''
+    name: str
+    parameter_names: Tuple[str, ...]
+    prepare: Callable[[Any], Any]
+    run: Callable[[Any], Any]
+    evaluate: Optional[Callable[[Any, Any], Dict[str, float]]] = None
+
+
+class _Signals(NamedTuple):
+    signals: np.ndarray
+    signal_time: np.ndarray
+    sampling_frequency: float
+
+
+def _prepare_wideband_signals(parameters):
+    signals, signal_time = generate_wideband_signals(parameters)
+    return _Signals(signals, signal_time, parameters.sampling_frequency)
+
+
+def _prepare_filtered_signals(parameters):
+    signals, signal_time = generate_wideband_signals(parameters)
+    [filtered_signals] = butter_bandpass_filter_bank(
+        signals, [(_RIPPLE_LOWCUT, _RIPPLE_HIGHCUT)], parameters.sampling_frequency, order=_FILTER_ORDER)
+    return _Signals(filtered_signals, signal_time, parameters.sampling_frequency)
+
+
+def _run_butter_bandpass_filter(signals):
+    for signal in signals.signals:
+        butter_bandpass_filter(signal, _RIPPLE_LOWCUT, _RIPPLE_HIGHCUT,
+                               signals.sampling_frequency, order=_FILTER_ORDER)
+
+
+def _run_butter_bandpass_filter_bank(signals):
+    butter_bandpass_filter_bank(signals.signals,
+                                [(_RIPPLE_LOWCUT, _RIPPLE_HIGHCUT),
+                                 (_RIPPLE_HIGHCUT, _FAST_RIPPLE_HIGHCUT)],
+                                signals.sampling_frequency, order=_FILTER_ORDER)
+
+
+def _find_threshold(signal, signal_time):
+    return find_thresholds(signals=signal,
+                           times=signal_time,
+                           window_size=0.5,
+                           sample_ratio=1/6,
+                           scaling_factor=_SCALING_FACTOR)
+
+
+def _run_find_thresholds(signals):
+    for signal in signals.signals:
+        _find_threshold(signal, signals.signal_time)
+
+
+def _create_signal_to_spike_benchmark(algorithm):
+    def run(signals):
+        for signal in signals.signals:
+            threshold = np.ceil(_find_threshold(signal, signals.signal_time))
+            signal_to_spike(SignalToSpikeParameters(
+                signal=signal,
+                threshold_up=threshold,
+                threshold_down=threshold,
+                times=signals.signal_time,
+                refractory_period=_REFRACTORY_PERIOD,
+                interpolation_factor=_INTERPOLATION_FACTOR), algorithm)
+    return run
+
+
+def _prepare_spike_trains(parameters):
+    filtered_spikes = generate_filtered_spikes(parameters)
+    return [spikes for bandwidth in filtered_spikes
+            for spikes in bandwidth.spike_trains]
+
+
+def _run_concatenate_spikes(spike_trains):
+    concatenate_spikes(spike_trains)
+
+
+class _SnnInputs(NamedTuple):
+    filtered_spikes: Any
+    duration: float
+    configuration: Configuration
+    caches: Caches
+
+
+def _create_configuration():
+    return Configuration(
+        data_path='',
+        measurement_mode=MeasurementMode.IEEG,
+        hidden_neuron_count=86,
+        calibration_time=10,
+        plots=PlottingFunctions(channel=[], patient=[]),
+        saving_path=None,
+        disable_saving=True,
+        loading_path=None,
+        plot_path='',
+        plot_mode=PlotMode.SAVE,
+        signal_to_spike_algorithm=SignalToSpikeAlgorithm.DEFAULT,
+        seed=42)
+
+
+def _prepare_snn_inputs(parameters):
+    snn_inputs = _SnnInputs(filtered_spikes=generate_filtered_spikes(parameters),
+                            duration=parameters.duration,
+                            configuration=_create_configuration(),
+                            caches={})
+    # Building the network only happens once per run, so it is not part of the measurement
+    snn_stage(snn_inputs.filtered_spikes, 0.001,
+              snn_inputs.configuration, snn_inputs.caches)
+    return snn_inputs
+
+
+def _run_snn_stage(snn_inputs):
+    snn_stage(snn_inputs.filtered_spikes, snn_inputs.duration,
+              snn_inputs.configuration, snn_inputs.caches)
+
+
+class _DetectionInputs(NamedTuple):
+    duration: float
+    spike_times: np.ndarray
+    time_base: TimeBase
+
+
+def _prepare_detection_inputs(parameters):
+    return _DetectionInputs(duration=parameters.duration,
+                            spike_times=generate_output_spike_times(
+                                parameters),
+                            time_base=generate_time_base(parameters))
+
+
+def _run_detect_hfo(detection_inputs):
+    detect_hfo(duration=detection_inputs.duration,
+               spike_times=detection_inputs.spike_times,
+               signal_times=detection_inputs.time_base,
+               step_size=HFO_DETECTION_STEP_SIZE,
+               window_size=HFO_DETECTION_WINDOW_SIZE)
+
+
+class _PersistenceInputs(NamedTuple):
+    hfo_detection: Any
+    directory: str
+    metadata: Metadata
+
+
+def _prepare_persistence_inputs(parameters):
+    filtered_spikes = generate_filtered_spikes(parameters)
+    output_spike_times = generate_output_spike_times(parameters)
+    hfo_detection = run_detection_step(
+        snn_output=SnnOutput(output_spike_times=output_spike_times,
+                             hidden_spike_times=filtered_spikes.ripple.spike_trains.up,
+                             hidden_neuron_ids=np.zeros(len(filtered_spikes.ripple.spike_trains.up), dtype=int)),
+        filtered_spikes=filtered_spikes,
+        duration=parameters.duration,
+        channel_data=ChannelData(wideband_signal=None, time_base=generate_time_base(parameters)))
+    directory = tempfile.mkdtemp(prefix='snn-hfo-benchmark-')
+    metadata = _METADATA._replace(duration=parameters.duration)
+    save_hfo_detection(hfo_detection, directory, metadata,
+                       saving_format=PersistenceFormat.JSON)
+    return _PersistenceInputs(hfo_detection, directory, metadata)
+
+
+def _run_json_save(persistence_inputs):
+    save_hfo_detection(persistence_inputs.hfo_detection, persistence_inputs.directory,
+                       persistence_inputs.metadata, saving_format=PersistenceFormat.JSON)
+
+
+def _run_json_load(persistence_inputs):
+    # The analytics are loaded lazily, so they have to be accessed to be measured
+    _analytics = load_hfo_detection(persistence_inputs.directory,
+                                    persistence_inputs.metadata).analytics.detections
+
+
+class _RecordingInputs(NamedTuple):
+    patient_data: Any
+    events: List[SyntheticEvent]
+    duration: float
+    configuration: Configuration
+    caches: Caches
+
+
+def _prepare_recording_inputs(parameters):
+    patient_data, events = generate_synthetic_recording(parameters)
+    recording_inputs = _RecordingInputs(patient_data=patient_data,
+                                        events=events,
+                                        duration=parameters.duration,
+                                        configuration=_create_configuration(),
+                                        caches={})
+    snn_stage(generate_filtered_spikes(parameters), 0.001,
+              recording_inputs.configuration, recording_inputs.caches)
+    return recording_inputs
+
+
+def _run_hfo_detection(recording_inputs):
+    return [run_all_hfo_detection_stages(
+        metadata=_METADATA._replace(
+            channel=channel + 1, duration=recording_inputs.duration),
+        channel_data=extract_channel_data(
+            recording_inputs.patient_data, channel),
+        duration=recording_inputs.duration,
+        configuration=recording_inputs.configuration,
+        snn_caches=recording_inputs.caches)
+        for channel in range(len(recording_inputs.patient_data.wideband_signals))]
+
+
+def _evaluate_hfo_detection(recording_inputs, hfo_detections):
+    scores = [score_detection(recording_inputs.events, channel + 1, hfo_detection.analytics.periods)
+              for channel, hfo_detection in enumerate(hfo_detections)]
+    total_score = DetectionScore(*(sum(counts) for counts in zip(*scores)))
+    return {'precision': total_score.precision, 'recall': total_score.recall}
+
+
+def clean_up(inputs):
+    '''
+    Removes files a benchmark created while preparing its inputs
+    '''
+    if isinstance(inputs, _PersistenceInputs):
+        shutil.rmtree(inputs.directory, ignore_errors=True)
+
+
+_SIGNAL_PARAMETERS = ('duration', 'sampling_frequency', 'channel_count')
+_SPIKE_PARAMETERS = ('duration', 'spike_density')
+_DETECTION_PARAMETERS = ('duration', 'sampling_frequency', 'spike_density')
+
+BENCHMARK_CASES = [
+    BenchmarkCase('butter_bandpass_filter', _SIGNAL_PARAMETERS,
+                  _prepare_wideband_signals, _run_butter_bandpass_filter),
+    BenchmarkCase('butter_bandpass_filter_bank', _SIGNAL_PARAMETERS,
+                  _prepare_wideband_signals, _run_butter_bandpass_filter_bank),
+    BenchmarkCase('find_thresholds', _SIGNAL_PARAMETERS,
+                  _prepare_filtered_signals, _run_find_thresholds),
+    BenchmarkCase('signal_to_spike_default', _SIGNAL_PARAMETERS, _prepare_filtered_signals,
+                  _create_signal_to_spike_benchmark(SignalToSpikeAlgorithm.DEFAULT)),
+    BenchmarkCase('signal_to_spike_realistic', _SIGNAL_PARAMETERS, _prepare_filtered_signals,
+                  _create_signal_to_spike_benchmark(SignalToSpikeAlgorithm.REALISTIC)),
+    BenchmarkCase('concatenate_spikes', _SPIKE_PARAMETERS,
+                  _prepare_spike_trains, _run_concatenate_spikes),
+    BenchmarkCase('snn_stage', _SPIKE_PARAMETERS,
+                  _prepare_snn_inputs, _run_snn_stage),
+    BenchmarkCase('detect_hfo', _DETECTION_PARAMETERS,
+                  _prepare_detection_inputs, _run_detect_hfo),
+    BenchmarkCase('json_save', _DETECTION_PARAMETERS,
+                  _prepare_persistence_inputs, _run_json_save),
+    BenchmarkCase('json_load', _DETECTION_PARAMETERS,
+                  _prepare_persistence_inputs, _run_json_load),
+    BenchmarkCase('hfo_detection', _SIGNAL_PARAMETERS,
+                  _prepare_recording_inputs, _run_hfo_detection, _evaluate_hfo_detection),
+]
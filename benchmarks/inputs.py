@@ -0,0 +1,62 @@
+import numpy as np
+from snn_hfo_detection.user_facing_data import Bandwidth, FilteredSpikes, SpikeTrains, TimeBase
+from snn_hfo_detection.synthetic import SyntheticRecordingSettings, generate_recording
+# Like the real encoders, no spike train fires twice within the refractory period
+_REFRACTORY_PERIOD = 3e-4
+
+
+def generate_time_base(parameters):
+    return TimeBase(start=0.0,
+                    sampling_frequency=float(parameters.sampling_frequency),
+                    sample_count=int(parameters.duration * parameters.sampling_frequency))
+
+
+def generate_signal_time(parameters):
+    return generate_time_base(parameters).get_times()
+
+
+def generate_synthetic_recording(parameters, seed=0):
+    '''
+    Generates a synthetic recording and the events injected into it
+    '''
+    return generate_recording(SyntheticRecordingSettings(
+        channel_count=parameters.channel_count,
+        duration=parameters.duration,
+        sampling_frequency=parameters.sampling_frequency,
+        seed=seed))
+
+
+def generate_wideband_signals(parameters, seed=0):
+    '''
+    Generates pink noise channels with ripples, fast ripples and artifacts, one channel per row
+    '''
+    patient_data, _events = generate_synthetic_recording(parameters, seed)
+    return patient_data.wideband_signals, patient_data.signal_time
+
+
+def generate_spike_times(duration, spike_density, random_generator):
+    slot_count = int(duration / _REFRACTORY_PERIOD)
+    spike_count = min(int(duration * spike_density), slot_count)
+    slots = random_generator.choice(slot_count, size=spike_count, replace=False)
+    return np.sort(slots) * _REFRACTORY_PERIOD
+
+
+def generate_filtered_spikes(parameters, seed=0) -> FilteredSpikes:
+    '''
+    Generates up and down spike trains for every bandwidth.
+    The signals are left empty, since the SNN only looks at the spikes.
+    '''
+    random_generator = np.random.default_rng(seed)
+
+    def generate_bandwidth():
+        return Bandwidth(signal=np.array([]), spike_trains=SpikeTrains(
+            up=generate_spike_times(
+                parameters.duration, parameters.spike_density, random_generator),
+            down=generate_spike_times(parameters.duration, parameters.spike_density, random_generator)))
+    return FilteredSpikes(ripple=generate_bandwidth(),
+                          fast_ripple=generate_bandwidth(),
+                          above_fast_ripple=generate_bandwidth())
+
+
+def generate_output_spike_times(parameters, seed=0):
+    return generate_spike_times(parameters.duration, parameters.spike_density / 100, np.random.default_rng(seed))
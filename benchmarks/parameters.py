@@ -0,0 +1,57 @@
+from itertools import product
+from typing import Dict, List, NamedTuple, Tuple
+
+
+class BenchmarkParameters(NamedTuple):
+    '''
+    Size of the inputs a benchmark runs on
+
+    Parameters
+    -------
+    duration : float
+        seconds of recording
+    sampling_frequency : float
+        samples per second of the wideband signals
+    channel_count : int
+        amount of channels analyzed one after another
+    spike_density : float
+        spikes per second in every input spike train of the SNN.
+        The output layer is assumed to spike a hundred times less often
+    '''
+    duration: float
+    sampling_frequency: float
+    channel_count: int
+    spike_density: float
+
+
+class ParameterGrid(NamedTuple):
+    durations: Tuple[float, ...]
+    sampling_frequencies: Tuple[float, ...]
+    channel_counts: Tuple[int, ...]
+    spike_densities: Tuple[float, ...]
+
+
+SCALES: Dict[str, ParameterGrid] = {
+    # Runs in a few seconds, e.g. to check that the benchmarks still work
+    'quick': ParameterGrid(
+        durations=(10,),
+        sampling_frequencies=(2_000,),
+        channel_counts=(1,),
+        spike_densities=(100,)),
+    'default': ParameterGrid(
+        durations=(10, 60),
+        sampling_frequencies=(2_000, 8_000),
+        channel_counts=(1, 4),
+        spike_densities=(100, 1_000)),
+    # An hour long recording at 32 kHz needs about 1 GB per channel and signal copy
+    'production': ParameterGrid(
+        durations=(60, 600, 3_600),
+        sampling_frequencies=(2_000, 8_000, 32_000),
+        channel_counts=(1, 8),
+        spike_densities=(100, 1_000, 5_000)),
+}
+
+
+def get_parameters(grid: ParameterGrid) -> List[BenchmarkParameters]:
+    return [BenchmarkParameters(*values) for values in product(
+        grid.durations, grid.sampling_frequencies, grid.channel_counts, grid.spike_densities)]
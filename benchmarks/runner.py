@@ -0,0 +1,186 @@
+import json
+import os
+import platform
+import statistics
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from benchmarks.cases import BenchmarkCase, clean_up
+from benchmarks.parameters import BenchmarkParameters
+
+
+class BenchmarkResult(NamedTuple):
+    '''
+    Parameters
+    -------
+    case : str
+        name of the BenchmarkCase
+    parameters : Dict[str, float]
+        the parameters the case depends on
+    times : List[float]
+        seconds every repetition took
+    quality : Optional[Dict[str, float]]
+        quality metrics of the result, where higher is better. None if the case has none
+    '''
+    case: str
+    parameters: Dict[str, float]
+    times: List[float]
+    quality: Optional[Dict[str, float]] = None
+
+    @property
+    def best(self) -> float:
+        return min(self.times)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.times)
+
+
+class Comparison(NamedTuple):
+    '''
+    Parameters
+    -------
+    case : str
+        name of the BenchmarkCase
+    parameters : Dict[str, float]
+        the parameters the case depends on
+    baseline : Optional[float]
+        best time of the baseline. None if the baseline did not run the benchmark
+    current : float
+        best time of the current run
+    is_regression : bool
+        whether the current run is slower than the baseline by more than the tolerance
+    quality_regressions : Tuple[str, ...]
+        quality metrics that got worse than in the baseline by more than the quality tolerance
+    '''
+    case: str
+    parameters: Dict[str, float]
+    baseline: Optional[float]
+    current: float
+    is_regression: bool
+    quality_regressions: Tuple[str, ...] = ()
+
+    @property
+    def ratio(self) -> Optional[float]:
+        if self.baseline is None:
+            return None
+        return self.current / self.baseline
+
+
+def _get_case_parameters(case, parameters):
+    return {name: getattr(parameters, name) for name in case.parameter_names}
+
+
+def _get_key(case_name, case_parameters):
+    return case_name, tuple(sorted(case_parameters.items()))
+
+
+class _Measurement(NamedTuple):
+    times: List[float]
+    quality: Optional[Dict[str, float]]
+
+
+def _run_benchmark(case, parameters, repeat):
+    inputs = case.prepare(parameters)
+    try:
+        # The first run compiles the numba functions and fills caches
+        output = case.run(inputs)
+        quality = case.evaluate(
+            inputs, output) if case.evaluate is not None else None
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            case.run(inputs)
+            times.append(time.perf_counter() - start)
+        return _Measurement(times, quality)
+    finally:
+        clean_up(inputs)
+
+
+def run_benchmarks(cases: List[BenchmarkCase], parameters: List[BenchmarkParameters], repeat: int, progress_cb=None) -> List[BenchmarkResult]:
+    '''
+    Runs every case for every parameter combination it depends on.
+    Combinations that only differ in parameters a case ignores are run once.
+    '''
+    results = []
+    finished_keys = set()
+    for case in cases:
+        for benchmark_parameters in parameters:
+            case_parameters = _get_case_parameters(case, benchmark_parameters)
+            key = _get_key(case.name, case_parameters)
+            if key in finished_keys:
+                continue
+            finished_keys.add(key)
+            measurement = _run_benchmark(case, benchmark_parameters, repeat)
+            result = BenchmarkResult(case=case.name,
+                                     parameters=case_parameters,
+                                     times=measurement.times,
+                                     quality=measurement.quality)
+            if progress_cb is not None:
+                progress_cb(result)
+            results.append(result)
+    return results
+
+
+def save_results(path, results: List[BenchmarkResult]):
+    directory = os.path.dirname(path)
+    if directory != '':
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as file:
+        json.dump({
+            'machine': {
+                'platform': platform.platform(),
+                'processor': platform.processor(),
+                'python': platform.python_version(),
+                'cpu_count': os.cpu_count(),
+            },
+            'results': [result._asdict() for result in results],
+        }, file, indent=4)
+
+
+def load_results(path) -> List[BenchmarkResult]:
+    with open(path, 'r') as file:
+        return [BenchmarkResult(**result) for result in json.load(file)['results']]
+
+
+def _find_quality_regressions(baseline_result, result, quality_tolerance):
+    if baseline_result is None or baseline_result.quality is None or result.quality is None:
+        return ()
+    return tuple(name for name, value in result.quality.items()
+                 if name in baseline_result.quality and value < baseline_result.quality[name] - quality_tolerance)
+
+
+def compare_results(baseline: List[BenchmarkResult], current: List[BenchmarkResult], tolerance: float,
+                    quality_tolerance: float = 0.05) -> List[Comparison]:
+    '''
+    Compares the best times of every benchmark in current to the one with the same parameters in baseline.
+    A benchmark regressed if it got slower by more than tolerance, e.g. 0.1 for 10 %,
+    or if one of its quality metrics dropped by more than quality_tolerance.
+    '''
+    baseline_results = {_get_key(result.case, result.parameters): result
+                        for result in baseline}
+    comparisons = []
+    for result in current:
+        baseline_result = baseline_results.get(
+            _get_key(result.case, result.parameters))
+        baseline_time = baseline_result.best if baseline_result is not None else None
+        quality_regressions = _find_quality_regressions(
+            baseline_result, result, quality_tolerance)
+        comparisons.append(Comparison(
+            case=result.case,
+            parameters=result.parameters,
+            baseline=baseline_time,
+            current=result.best,
+            is_regression=len(quality_regressions) != 0 or (
+                baseline_time is not None and result.best > baseline_time * (1 + tolerance)),
+            quality_regressions=quality_regressions))
+    return comparisons
+
+
+def format_quality(quality):
+    if quality is None:
+        return ''
+    return ', '.join(f'{name} {value:.3f}' for name, value in quality.items())
+
+
+def format_parameters(parameters):
+    return ', '.join(f'{name}={value:g}' for name, value in parameters.items())
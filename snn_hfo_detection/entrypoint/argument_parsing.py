@@ -1,20 +1,48 @@
 import argparse
 import sys
-from snn_hfo_detection.user_facing_data import Configuration, MeasurementMode, PlotMode
+from snn_hfo_detection.user_facing_data import Configuration, MeasurementMode, PersistenceFormat, PlotMode
 from snn_hfo_detection.entrypoint.hfo_detection import CustomOverrides
+from snn_hfo_detection.entrypoint.sharding import parse_shard
 from snn_hfo_detection.plotting.plot_loader import find_plotting_functions
 from snn_hfo_detection.functions.signal_to_spike.selector import SignalToSpikeAlgorithm
 
 
+def _positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(
+            f'must be a positive integer, but got {value}')
+    return number
+
+
+def _positive_float(value):
+    number = float(value)
+    if not number > 0:
+        raise argparse.ArgumentTypeError(
+            f'must be a positive number, but got {value}')
+    return number
+
+
+def _shard(text):
+    try:
+        return parse_shard(text)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(str(error))
+
+
 def parse_arguments():
     parser = argparse.ArgumentParser(description='Perform an hfo test run')
     default_data_path = 'data/'
     default_saving_path = 'saved_data/'
     default_plot_path = 'plots/'
     default_plot_mode = PlotMode.BOTH.name
+    default_saving_format = PersistenceFormat.JSON.name
     default_signal_to_spike_algorithm = SignalToSpikeAlgorithm.DEFAULT.name
     default_hidden_neurons = 86
     default_calibration = 10
+    default_jobs = 1
+    default_spike_cache_size = 1024
+    default_pipeline_depth = 2
     parser.add_argument('mode', type=str,
                         help='Which measurement mode was used to capture the data. Possible values: iEEG, eCoG or scalp.\
                         Note that eCoG will use signals in the fast ripple channel (250-500 Hz), scalp will use the ripple channel (80-250 Hz) and iEEG will use both')
@@ -29,19 +57,48 @@ def parse_arguments():
                         help='Disables HFO detections saving. By default, all HFO detections are saved to the path specified by --save')
     parser.add_argument('--calibration', type=float, default=default_calibration,
                         help=f'How many seconds of the dataset should be used for calibration of HFO thresholds. Default is {default_calibration} s. If calibration is bigger than duration, the entire duration will be used for calibration. Ignored when loading data with --load')
+    parser.add_argument('--cache-calibration', action='store_true',
+                        help='Caches the calibrated thresholds of every channel next to the saved HFO detections, so that later runs on the same data skip the calibration. By default, thresholds are calibrated on every run. Ignored when loading data with --load')
+    parser.add_argument('--calibration-interval', type=int, default=None,
+                        help='Calibrate the thresholds of every channel on this interval and reuse them for all other intervals. By default, every interval is calibrated on its own. Ignored when loading data with --load')
+    parser.add_argument('--spike-cache', type=str, default=None,
+                        help='Directory in which the spike trains of the filtered bandwidths are cached, so that runs with different SNN settings on the same data skip the signal to spike conversion. The directory can be shared by any number of runs. By default, no spike trains are cached. Ignored when loading data with --load')
+    parser.add_argument('--spike-cache-size', type=_positive_float, default=default_spike_cache_size,
+                        help=f'Maximum size of the --spike-cache in megabytes. The least recently used spike trains are removed first. Default is {default_spike_cache_size}')
     parser.add_argument('--channels', type=int, default=None, nargs='+',
                         help='Which channels of the dataset should be processed, using 1 based indexing. By default, all channels will be processed. Note that you have to provide the channel index, not its label')
     parser.add_argument('--intervals', type=int, default=None, nargs='+',
                         help='Which intervals should be processed. By default, all intervals will be processed.')
+    parser.add_argument('--shard', type=_shard, default=None,
+                        help='Only process a part of the selected intervals and channels, e.g. 2/5 for the second of five parts. Running all parts on different machines with the same --save path and the same --seed is equivalent to a single run. By default, everything is processed')
     parser.add_argument('--plot', type=str, default=[], nargs='+',
                         help='Which plots should be generated during the HFO detection. Possible values: raster, hfo_samples, mean_hfo_rate')
     parser.add_argument('--plot-mode', type=str, default=default_plot_mode,
                         help=f'How to handle plots. Possible values: save, show, both. Default is {default_plot_mode}')
     parser.add_argument('--signal-to-spike-algorithm', type=str, default=default_signal_to_spike_algorithm,
                         help=f'How to convert the signals to spikes. Possible values: default, realistic. Default is {default_signal_to_spike_algorithm}')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Seed for the random weights and time constants of the SNN. By default, a random network is generated for every run. Ignored when loading data with --load')
+    parser.add_argument('--jobs', type=_positive_int, default=default_jobs,
+                        help=f'How many channels should be analyzed in parallel by separate processes. Default is {default_jobs}. Ignored when loading data with --load')
+    parser.add_argument('--pipeline', type=_positive_int, default=None, nargs='?', const=default_pipeline_depth,
+                        help=f'Loads, filters, simulates, detects and saves consecutive channels at the same time in separate threads. The optional value is how many channels may wait between two of these steps, {default_pipeline_depth} if not specified. Ignored when loading data with --load or when using more than one job')
+    parser.add_argument('--pipeline-metrics', type=str, default=None,
+                        help='Path to a JSON file in which --pipeline reports how long every step was busy, waited for the previous one or was held back by the next one, as well as how many channels were waiting between them')
+    parser.add_argument('--telemetry', type=str, default=None,
+                        help='Path to a JSON file in which the wall and CPU time of every step, the amount of spikes fed into the SNN and the realtime factor of every channel are reported')
+    parser.add_argument('--prometheus', type=str, default=None,
+                        help='Path to a file in which the same measurements as in --telemetry are written in the Prometheus text format, e.g. for the textfile collector of the node exporter')
+    parser.add_argument('--profile', type=str, default=None,
+                        help='Directory in which the cProfile statistics of loading, filtering, SNN simulation, detection and saving are written as .pstats files per interval and channel, along with how long every object of the SNN took to simulate')
     parser.add_argument('--plot-path', type=str, default=default_plot_path,
                         help=f'Location to save plots to when --plot-mode is set to "save". Default is {default_plot_path}')
 
+    parser.add_argument('--resume', action='store_true',
+                        help='Skips every channel whose HFO detection was already saved by an earlier run with the same data and settings and uses the saved one instead. Ignored when loading data with --load or with --disable-saving')
+    parser.add_argument('--save-format', type=str, default=default_saving_format,
+                        help=f'How to save the HFO detections. Possible values: json, numpy. numpy stores every array in its own binary file, which is much smaller and faster to load. --load reads both. Default is {default_saving_format}')
+
     persistence_group = parser.add_mutually_exclusive_group()
     persistence_group.add_argument('--save', type=str, default=default_saving_path,
                                    help=f'Path to where the HFO detections should be saved. Default is {default_saving_path} if --load was not specified.')
@@ -72,6 +129,19 @@ def convert_arguments_to_config(arguments):
         plot_mode=PlotMode[arguments.plot_mode.upper()],
         signal_to_spike_algorithm=SignalToSpikeAlgorithm[arguments.signal_to_spike_algorithm.upper(
         )],
+        seed=arguments.seed,
+        jobs=arguments.jobs,
+        cache_calibration=arguments.cache_calibration,
+        calibration_interval=arguments.calibration_interval,
+        saving_format=PersistenceFormat[arguments.save_format.upper()],
+        resume=arguments.resume,
+        spike_cache_path=arguments.spike_cache,
+        spike_cache_size=arguments.spike_cache_size,
+        pipeline_depth=arguments.pipeline,
+        pipeline_metrics_path=arguments.pipeline_metrics,
+        telemetry_path=arguments.telemetry,
+        prometheus_path=arguments.prometheus,
+        profile_path=arguments.profile,
     )
 
 
@@ -79,5 +149,6 @@ def convert_arguments_to_custom_overrides(arguments):
     custom_overrides = CustomOverrides(
         duration=arguments.duration,
         channels=arguments.channels,
-        intervals=arguments.intervals)
+        intervals=arguments.intervals,
+        shard=arguments.shard)
     return custom_overrides
@@ -1,79 +1,106 @@
-from copy import deepcopy
 from typing import List, NamedTuple, Optional
-import numpy as np
 from snn_hfo_detection.stages.all import run_all_hfo_detection_stages
-from snn_hfo_detection.user_facing_data import Metadata, HfoDetectionRun, HfoDetector
-from snn_hfo_detection.stages.loading.patient_data import load_patient_data, extract_channel_data
-from snn_hfo_detection.stages.loading.folder_discovery import get_interval_paths
+from snn_hfo_detection.user_facing_data import HfoDetectionRun, HfoDetector
 from snn_hfo_detection.stages.persistence.loading import load_hfo_detection
-from snn_hfo_detection.plotting.plot_patient import Intervals
+from snn_hfo_detection.stages.persistence.writer import BackgroundWriter
+from snn_hfo_detection.stages.snn.cache import Caches
+from snn_hfo_detection.entrypoint.work_units import generate_work_units
+from snn_hfo_detection.entrypoint.sharding import Shard
+from snn_hfo_detection.entrypoint.parallel import should_run_in_parallel, with_shared_seed, generate_parallel_hfo_detectors
+from snn_hfo_detection.entrypoint.pipeline import generate_pipelined_hfo_detectors
+from snn_hfo_detection.entrypoint.patient_summary import PatientAggregator
+from snn_hfo_detection.telemetry import record_telemetry, save_prometheus_metrics, save_telemetry_report
+from snn_hfo_detection.profiling import record_profiles
 
 
 class CustomOverrides(NamedTuple):
     duration: Optional[float]
     channels: Optional[List[int]]
     intervals: Optional[List[int]]
+    shard: Optional[Shard] = None
 
 
-def _calculate_duration(signal_time):
-    extra_simulation_time = 0.050
-    return np.max(signal_time) + extra_simulation_time
-
-
-def _generate_hfo_detection_cb(metadata, channel_data, duration, configuration, snn_cache):
-    inner_configuration = deepcopy(configuration)
-    inner_metada = deepcopy(metadata)
+def _generate_hfo_detection_cb(work_unit, configuration, snn_caches, writer):
+    # Configuration and metadata are immutable and the channel's arrays are read only views,
+    # so the closure can share them with the work unit instead of copying the whole signal
     if configuration.loading_path is not None:
-        return lambda: load_hfo_detection(inner_configuration.loading_path, inner_metada)
+        return lambda: load_hfo_detection(configuration.loading_path, work_unit.metadata)
+    if work_unit.is_already_finished:
+        return lambda: load_hfo_detection(configuration.saving_path, work_unit.metadata)
 
-    inner_channel_data = deepcopy(channel_data)
-    inner_snn_cache = deepcopy(snn_cache)
     return lambda: run_all_hfo_detection_stages(
-        metadata=inner_metada,
-        channel_data=inner_channel_data,
-        duration=duration,
-        configuration=inner_configuration,
-        snn_cache=inner_snn_cache)
-
-
-def _generate_hfo_detector(metadata, channel_data, duration, configuration, snn_cache):
+        metadata=work_unit.metadata,
+        channel_data=work_unit.channel_data,
+        duration=work_unit.metadata.duration,
+        configuration=configuration,
+        snn_caches=snn_caches,
+        filtered_signals=work_unit.filtered_signals,
+        calibration_source=work_unit.calibration_source,
+        fingerprint=work_unit.fingerprint,
+        writer=writer)
+
+
+def _generate_hfo_detector(work_unit, configuration, snn_caches, writer):
     hfo_detection_cb = _generate_hfo_detection_cb(
-        metadata, channel_data, duration, configuration, snn_cache)
+        work_unit, configuration, snn_caches, writer)
     return HfoDetector(hfo_detection_cb)
 
 
+def _generate_sequential_hfo_detectors(work_units, configuration, writer):
+    # Networks are shared by all channels and intervals, so they only get built once per run
+    snn_caches: Caches = {}
+    for work_unit in work_units:
+        yield work_unit, _generate_hfo_detector(work_unit, configuration, snn_caches, writer)
+
+
+def _should_run_as_pipeline(configuration):
+    return configuration.pipeline_depth is not None and configuration.loading_path is None \
+        and not should_run_in_parallel(configuration)
+
+
+def _should_record_telemetry(configuration):
+    return configuration.telemetry_path is not None or configuration.prometheus_path is not None
+
+
+def _save_telemetry(telemetry, configuration):
+    report = telemetry.create_report()
+    if configuration.telemetry_path is not None:
+        save_telemetry_report(configuration.telemetry_path, report)
+    if configuration.prometheus_path is not None:
+        save_prometheus_metrics(configuration.prometheus_path, report)
+
+
 def run_hfo_detection_with_configuration(configuration, custom_overrides, hfo_cb):
-    # Cache needs this lifetime
-    snn_cache = None
+    with record_telemetry(_should_record_telemetry(configuration)) as telemetry, record_profiles(configuration.profile_path):
+        _run_hfo_detection_with_configuration(
+            configuration, custom_overrides, hfo_cb)
+    if telemetry is not None:
+        _save_telemetry(telemetry, configuration)
 
-    intervals = get_interval_paths(configuration.data_path)
-    should_collect_patient_data = len(configuration.plots.patient) != 0
-    patient_hfos: Intervals = {}
-    for interval, interval_path in intervals.items():
-        if custom_overrides.intervals is not None and interval not in custom_overrides.intervals:
-            continue
-        patient_data = load_patient_data(interval_path)
-        duration = custom_overrides.duration if custom_overrides.duration is not None else _calculate_duration(
-            patient_data.signal_time)
-
-        channel_hfos = []
-        for channel in range(len(patient_data.wideband_signals)):
-            if custom_overrides.channels is not None and channel + 1 not in custom_overrides.channels:
-                continue
-
-            channel_data = extract_channel_data(patient_data, channel)
-            metadata = Metadata(
-                interval=interval,
-                channel=channel + 1,
-                channel_label=patient_data.channel_labels[channel],
-                duration=duration
-            )
-            hfo_detector = _generate_hfo_detector(
-                metadata, channel_data, duration, configuration, snn_cache)
 
+def _run_hfo_detection_with_configuration(configuration, custom_overrides, hfo_cb):
+    # Fingerprints use the configuration chosen by the user, so runs without a seed stay resumable
+    work_units = generate_work_units(configuration, custom_overrides)
+    if should_run_in_parallel(configuration):
+        configuration = with_shared_seed(configuration)
+
+    should_collect_patient_data = len(configuration.plots.patient) != 0
+    patient_aggregator = PatientAggregator(configuration)
+    # Worker processes and pipelines save on their own, so the writer is only used by sequential runs
+    with BackgroundWriter() as writer:
+        if should_run_in_parallel(configuration):
+            hfo_detectors = generate_parallel_hfo_detectors(
+                work_units, configuration)
+        elif _should_run_as_pipeline(configuration):
+            hfo_detectors = generate_pipelined_hfo_detectors(
+                work_units, configuration)
+        else:
+            hfo_detectors = _generate_sequential_hfo_detectors(
+                work_units, configuration, writer)
+        for work_unit, hfo_detector in hfo_detectors:
             hfo_detection_run = HfoDetectionRun(
-                input=channel_data,
-                metadata=metadata,
+                input=work_unit.channel_data,
+                metadata=work_unit.metadata,
                 detector=hfo_detector,
                 configuration=configuration
             )
@@ -83,8 +110,10 @@ def run_hfo_detection_with_configuration(configuration, custom_overrides, hfo_cb
             if hfo_detector.last_run is not None:
                 for plotting_fn in configuration.plots.channel:
                     plotting_fn.function(hfo_detection_run)
+                # Only the summary is kept, so the run's signals and analytics can be freed
                 if should_collect_patient_data:
-                    channel_hfos.append(hfo_detection_run)
-        patient_hfos[interval] = channel_hfos
+                    patient_aggregator.add(hfo_detection_run)
+        writer.flush()
+    patient_summary = patient_aggregator.create_summary()
     for plotting_fn in configuration.plots.patient:
-        plotting_fn.function(patient_hfos)
+        plotting_fn.function(patient_summary)
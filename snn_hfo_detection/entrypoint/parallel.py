@@ -0,0 +1,103 @@
+import random
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, Optional
+from snn_hfo_detection.stages.all import run_all_hfo_detection_stages
+from snn_hfo_detection.stages.snn.cache import Caches
+from snn_hfo_detection.stages.persistence.loading import load_hfo_detection
+from snn_hfo_detection.user_facing_data import HfoDetectionWithAnalytics, HfoDetector
+from snn_hfo_detection.telemetry import TelemetryRecords, get_active_telemetry, record_telemetry
+from snn_hfo_detection.profiling import record_profiles
+
+# How many work units per worker may be queued up ahead of the one currently handed to the user
+_LOOKAHEAD_PER_JOB = 2
+_MAX_SEED = 2**32 - 1
+
+# Every worker process keeps its own networks warm for the entire run
+_worker_snn_caches: Caches = {}
+
+
+class _WorkerResult(NamedTuple):
+    hfo_detection: HfoDetectionWithAnalytics
+    telemetry_records: Optional[TelemetryRecords]
+
+
+def _run_all_hfo_detection_stages_in_worker(work_unit, configuration, should_record_telemetry):
+    # Workers record on their own and send their measurements back along with the result
+    with record_telemetry(should_record_telemetry) as telemetry, record_profiles(configuration.profile_path):
+        hfo_detection = run_all_hfo_detection_stages(
+            metadata=work_unit.metadata,
+            channel_data=work_unit.channel_data,
+            duration=work_unit.metadata.duration,
+            configuration=configuration,
+            snn_caches=_worker_snn_caches,
+            filtered_signals=work_unit.filtered_signals,
+            calibration_source=work_unit.calibration_source,
+            fingerprint=work_unit.fingerprint)
+    return _WorkerResult(hfo_detection=hfo_detection,
+                         telemetry_records=telemetry.records() if telemetry is not None else None)
+
+
+def _add_telemetry_records_when_done(future, telemetry):
+    def add_telemetry_records(finished_future):
+        if finished_future.cancelled() or finished_future.exception() is not None:
+            return
+        telemetry.add_records(finished_future.result().telemetry_records)
+    future.add_done_callback(add_telemetry_records)
+
+
+def should_run_in_parallel(configuration):
+    return configuration.jobs > 1 and configuration.loading_path is None
+
+
+def with_shared_seed(configuration):
+    '''
+    Every worker builds its own network, so they need to agree on a seed
+    in order to produce the same results as a sequential run would.
+    Random inputs are reseeded per channel, so the order in which workers get channels does not matter either.
+    '''
+    if configuration.seed is not None:
+        return configuration
+    return configuration._replace(seed=random.randint(0, _MAX_SEED))
+
+
+def _to_hfo_detector(work_unit, future, configuration):
+    if future is None:
+        return work_unit, HfoDetector(lambda: load_hfo_detection(configuration.saving_path, work_unit.metadata))
+    return work_unit, HfoDetector(lambda: future.result().hfo_detection)
+
+
+def generate_parallel_hfo_detectors(work_units, configuration):
+    '''
+    Sends the work units to a pool of worker processes and yields
+    them back together with their HfoDetector in the order they were received.
+
+    Parameters
+    -------
+    work_units : Iterable[WorkUnit]
+        channels that should be analyzed
+    configuration : Configuration
+        configuration shared by all work units. Must contain a seed.
+    '''
+    max_pending_work_units = configuration.jobs * _LOOKAHEAD_PER_JOB
+    telemetry = get_active_telemetry()
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=configuration.jobs) as executor:
+        try:
+            for work_unit in work_units:
+                if work_unit.is_already_finished:
+                    pending.append((work_unit, None))
+                else:
+                    future = executor.submit(
+                        _run_all_hfo_detection_stages_in_worker, work_unit, configuration, telemetry is not None)
+                    if telemetry is not None:
+                        _add_telemetry_records_when_done(future, telemetry)
+                    pending.append((work_unit, future))
+                if len(pending) > max_pending_work_units:
+                    yield _to_hfo_detector(*pending.popleft(), configuration)
+            while len(pending) != 0:
+                yield _to_hfo_detector(*pending.popleft(), configuration)
+        finally:
+            for _work_unit, future in pending:
+                if future is not None:
+                    future.cancel()
@@ -0,0 +1,35 @@
+from typing import Dict, List
+from snn_hfo_detection.user_facing_data import ChannelSummary, Configuration, HfoDetection, HfoDetectionRun, PatientSummary
+
+
+def summarize_channel(hfo_detection_run: HfoDetectionRun) -> ChannelSummary:
+    '''
+    Keeps only the result of a run whose HFO detection already ran
+    '''
+    result = hfo_detection_run.detector.last_run.result
+    return ChannelSummary(
+        metadata=hfo_detection_run.metadata,
+        result=HfoDetection(frequency=float(result.frequency),
+                            total_amount=int(result.total_amount)))
+
+
+class PatientAggregator():
+    '''
+    Collects the summaries of all channels of a patient while they are analyzed,
+    so the runs with their signals and analytics can be released after every channel
+    '''
+
+    def __init__(self, configuration: Configuration):
+        self._configuration = configuration
+        self._intervals: Dict[int, List[ChannelSummary]] = {}
+
+    def add(self, hfo_detection_run: HfoDetectionRun):
+        channel_summary = summarize_channel(hfo_detection_run)
+        self._intervals.setdefault(
+            channel_summary.metadata.interval, []).append(channel_summary)
+
+    def create_summary(self) -> PatientSummary:
+        return PatientSummary(
+            intervals={interval: list(channel_summaries)
+                       for interval, channel_summaries in self._intervals.items()},
+            configuration=self._configuration)
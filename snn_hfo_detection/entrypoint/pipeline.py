@@ -0,0 +1,302 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from queue import Queue, Empty, Full
+from typing import Any, Callable, Iterable, Iterator, List, NamedTuple, Optional
+from snn_hfo_detection.user_facing_data import FilteredSpikes, HfoDetectionWithAnalytics, HfoDetector
+from snn_hfo_detection.stages.all import SnnOutput, run_filter_step, run_snn_step, run_detection_step, run_saving_step
+from snn_hfo_detection.stages.snn.cache import Caches
+from snn_hfo_detection.stages.persistence.loading import load_hfo_detection
+from snn_hfo_detection.entrypoint.work_units import WorkUnit
+from snn_hfo_detection.telemetry import channel_scope, get_active_telemetry
+
+# How often blocked stages check whether the pipeline was stopped
+_POLL_INTERVAL = 0.1
+
+
+class StageMetrics(NamedTuple):
+    '''
+    What a stage of a Pipeline spent its time on
+
+    Parameters
+    -------
+    name : str
+        name of the stage
+    processed_count : int
+        how many items the stage processed
+    busy_time : float
+        seconds spent processing items
+    starved_time : float
+        seconds spent waiting for the previous stage
+    blocked_time : float
+        seconds spent waiting for room in the output queue, i.e. backpressure of the next stage
+    max_queue_depth : int
+        maximum number of items waiting in the output queue
+    mean_queue_depth : float
+        mean number of items waiting in the output queue, sampled whenever an item was added
+    '''
+    name: str
+    processed_count: int
+    busy_time: float
+    starved_time: float
+    blocked_time: float
+    max_queue_depth: int
+    mean_queue_depth: float
+
+
+class PipelineStage(NamedTuple):
+    name: str
+    function: Callable[[Any], Any]
+
+
+class _End():
+    pass
+
+
+class _Failure(NamedTuple):
+    error: BaseException
+
+
+_END = _End()
+
+
+class _StageState():
+    def __init__(self, name, queue_depth):
+        self.name = name
+        self.output: Queue = Queue(maxsize=queue_depth)
+        self.processed_count = 0
+        self.busy_time = 0.0
+        self.starved_time = 0.0
+        self.blocked_time = 0.0
+        self.max_queue_depth = 0
+        self.queue_depth_sum = 0
+        self.queue_depth_samples = 0
+
+    def to_metrics(self):
+        return StageMetrics(
+            name=self.name,
+            processed_count=self.processed_count,
+            busy_time=self.busy_time,
+            starved_time=self.starved_time,
+            blocked_time=self.blocked_time,
+            max_queue_depth=self.max_queue_depth,
+            mean_queue_depth=self.queue_depth_sum / self.queue_depth_samples
+            if self.queue_depth_samples != 0 else 0.0)
+
+
+class Pipeline():
+    '''
+    Runs every stage on its own thread. The stages are connected by queues
+    holding at most queue_depth items, so a slow stage makes the ones
+    before it wait instead of piling up items in memory.
+    Iterating over the pipeline yields the outputs of the last stage
+    in the order in which the source produced its items.
+    An error in any stage stops the pipeline and is raised while iterating.
+
+    Parameters
+    -------
+    source_name : str
+        name of the stage producing the items
+    source : Iterable
+        items that should flow through the pipeline
+    stages : List[PipelineStage]
+        functions applied to every item one after another
+    queue_depth : int
+        how many items may wait between two stages
+    '''
+
+    def __init__(self, source_name: str, source: Iterable, stages: List[PipelineStage], queue_depth: int):
+        self._source = source
+        self._stages = stages
+        self._states = [_StageState(source_name, queue_depth)] + \
+            [_StageState(stage.name, queue_depth) for stage in stages]
+        self._stopped = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def metrics(self) -> List[StageMetrics]:
+        return [state.to_metrics() for state in self._states]
+
+    def _put(self, state, item):
+        started = time.perf_counter()
+        while not self._stopped.is_set():
+            try:
+                state.output.put(item, timeout=_POLL_INTERVAL)
+                break
+            except Full:
+                continue
+        state.blocked_time += time.perf_counter() - started
+        queue_depth = state.output.qsize()
+        state.max_queue_depth = max(state.max_queue_depth, queue_depth)
+        state.queue_depth_sum += queue_depth
+        state.queue_depth_samples += 1
+
+    def _get(self, state, queue) -> Any:
+        started = time.perf_counter()
+        try:
+            while not self._stopped.is_set():
+                try:
+                    return queue.get(timeout=_POLL_INTERVAL)
+                except Empty:
+                    continue
+            return _END
+        finally:
+            state.starved_time += time.perf_counter() - started
+
+    def _run_source(self, state):
+        try:
+            iterator = iter(self._source)
+            while not self._stopped.is_set():
+                started = time.perf_counter()
+                item = next(iterator, _END)
+                state.busy_time += time.perf_counter() - started
+                if item is _END:
+                    break
+                state.processed_count += 1
+                self._put(state, item)
+        except BaseException as error:
+            self._put(state, _Failure(error))
+            return
+        self._put(state, _END)
+
+    def _run_stage(self, stage, input_queue, state):
+        while True:
+            item = self._get(state, input_queue)
+            if item is _END or isinstance(item, _Failure):
+                self._put(state, item)
+                return
+            started = time.perf_counter()
+            try:
+                result = stage.function(item)
+            except BaseException as error:
+                self._put(state, _Failure(error))
+                return
+            finally:
+                state.busy_time += time.perf_counter() - started
+            state.processed_count += 1
+            self._put(state, result)
+
+    def _start(self):
+        # Every thread runs in its own copy of the context the pipeline is iterated in,
+        # so that the stages see e.g. the telemetry of the run
+        self._threads.append(threading.Thread(
+            target=contextvars.copy_context().run, args=(self._run_source, self._states[0]),
+            name=f'pipeline-{self._states[0].name}', daemon=True))
+        for stage, input_state, state in zip(self._stages, self._states, self._states[1:]):
+            self._threads.append(threading.Thread(
+                target=contextvars.copy_context().run, args=(self._run_stage, stage, input_state.output, state),
+                name=f'pipeline-{stage.name}', daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        '''
+        Stops all stages and waits for them to finish their current item
+        '''
+        self._stopped.set()
+        for thread in self._threads:
+            thread.join()
+
+    def __iter__(self) -> Iterator[Any]:
+        self._start()
+        output = self._states[-1].output
+        try:
+            while True:
+                item = output.get()
+                if item is _END:
+                    return
+                if isinstance(item, _Failure):
+                    raise item.error
+                yield item
+        finally:
+            self.stop()
+
+
+class _PipelineItem(NamedTuple):
+    work_unit: WorkUnit
+    filtered_spikes: Optional[FilteredSpikes] = None
+    snn_output: Optional[SnnOutput] = None
+    hfo_detection: Optional[HfoDetectionWithAnalytics] = None
+
+
+def _as_channel_step(function):
+    def run_unless_finished(item):
+        if item.work_unit.is_already_finished:
+            return item
+        with channel_scope(item.work_unit.metadata):
+            return function(item)
+    return run_unless_finished
+
+
+def _create_stages(configuration):
+    # Only the SNN stage touches the networks, so they are never shared between threads
+    snn_caches: Caches = {}
+
+    def filter_spikes(item):
+        work_unit = item.work_unit
+        return item._replace(filtered_spikes=run_filter_step(
+            work_unit.channel_data, configuration,
+            filtered_signals=work_unit.filtered_signals,
+            calibration_source=work_unit.calibration_source))
+
+    def simulate(item):
+        return item._replace(snn_output=run_snn_step(
+            item.filtered_spikes, item.work_unit.metadata.duration, configuration, snn_caches,
+            metadata=item.work_unit.metadata))
+
+    def detect(item):
+        work_unit = item.work_unit
+        return item._replace(hfo_detection=run_detection_step(
+            item.snn_output, item.filtered_spikes, work_unit.metadata.duration, work_unit.channel_data))
+
+    def save(item):
+        run_saving_step(item.hfo_detection, item.work_unit.metadata,
+                        configuration, fingerprint=item.work_unit.fingerprint)
+        return item
+
+    return [PipelineStage(name='filter', function=_as_channel_step(filter_spikes)),
+            PipelineStage(name='snn', function=_as_channel_step(simulate)),
+            PipelineStage(name='detection', function=_as_channel_step(detect)),
+            PipelineStage(name='saving', function=_as_channel_step(save))]
+
+
+def _to_hfo_detector(item, configuration):
+    work_unit = item.work_unit
+    if work_unit.is_already_finished:
+        return work_unit, HfoDetector(lambda: load_hfo_detection(configuration.saving_path, work_unit.metadata))
+    return work_unit, HfoDetector(lambda: item.hfo_detection)
+
+
+def save_pipeline_metrics(path, metrics: List[StageMetrics]):
+    directory = os.path.dirname(path)
+    if directory != '':
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as file:
+        json.dump([stage_metrics._asdict() for stage_metrics in metrics], file, indent=4)
+
+
+def generate_pipelined_hfo_detectors(work_units, configuration):
+    '''
+    Loads, filters, simulates, detects and saves consecutive work units at the same time,
+    each step on its own thread, and yields them back together with their
+    already evaluated HfoDetector in the order they were received.
+
+    Parameters
+    -------
+    work_units : Iterable[WorkUnit]
+        channels that should be analyzed
+    configuration : Configuration
+        configuration shared by all work units. Must contain a pipeline_depth.
+    '''
+    pipeline = Pipeline(source_name='loading',
+                        source=(_PipelineItem(work_unit=work_unit) for work_unit in work_units),
+                        stages=_create_stages(configuration),
+                        queue_depth=configuration.pipeline_depth)
+    for item in pipeline:
+        yield _to_hfo_detector(item, configuration)
+    if configuration.pipeline_metrics_path is not None:
+        save_pipeline_metrics(configuration.pipeline_metrics_path, pipeline.metrics())
+    telemetry = get_active_telemetry()
+    if telemetry is not None:
+        telemetry.set_pipeline_metrics(pipeline.metrics())
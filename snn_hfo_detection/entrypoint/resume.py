@@ -0,0 +1,43 @@
+import hashlib
+import json
+from snn_hfo_detection.stages.persistence.loading import load_fingerprint
+from snn_hfo_detection.stages.persistence.spike_cache import hash_channel_data
+
+
+def _should_fingerprint(configuration):
+    return configuration.loading_path is None and not configuration.disable_saving \
+        and configuration.saving_path is not None
+
+
+def calculate_fingerprint(configuration, metadata, channel_data):
+    '''
+    Identifies everything that influences the HFO detection of a single channel:
+    the channel's signal and time base and every setting that changes the result.
+    Only the channel itself is hashed, so the rest of the interval file is never read for it.
+    Returns None if the HFO detection will not be saved.
+    '''
+    if not _should_fingerprint(configuration):
+        return None
+    identity = {
+        'input': hash_channel_data(channel_data),
+        'interval': metadata.interval,
+        'channel': metadata.channel,
+        'duration': float(metadata.duration),
+        'measurement_mode': configuration.measurement_mode.name,
+        'hidden_neuron_count': configuration.hidden_neuron_count,
+        'calibration_time': configuration.calibration_time,
+        'calibration_interval': configuration.calibration_interval,
+        'signal_to_spike_algorithm': configuration.signal_to_spike_algorithm.name,
+        'seed': configuration.seed,
+    }
+    serialized_identity = json.dumps(identity, sort_keys=True)
+    return hashlib.sha256(serialized_identity.encode()).hexdigest()
+
+
+def is_already_finished(configuration, metadata, fingerprint):
+    '''
+    Whether a previous run already saved the HFO detection with the same fingerprint
+    '''
+    if not configuration.resume or fingerprint is None:
+        return False
+    return load_fingerprint(configuration.saving_path, metadata) == fingerprint
@@ -0,0 +1,63 @@
+import re
+from typing import NamedTuple, Set, Tuple
+from snn_hfo_detection.stages.loading.patient_data import load_channel_count
+
+_SHARD_REGEX = re.compile(r'^(\d+)/(\d+)$')
+
+
+class Shard(NamedTuple):
+    '''
+    Part of the work that a single machine is responsible for
+
+    Parameters
+    -------
+    index : int
+        which part should be processed, using 1 based indexing
+    count : int
+        in how many parts the work is split
+    '''
+    index: int
+    count: int
+
+
+def parse_shard(text) -> Shard:
+    match = _SHARD_REGEX.match(text)
+    if match is None:
+        raise ValueError(
+            f'shard must have the form <index>/<count>, e.g. 2/5, but got: {text}')
+    index, count = (int(group) for group in match.groups())
+    if not 1 <= index <= count:
+        raise ValueError(
+            f'shard index must be between 1 and the shard count, but got: {text}')
+    return Shard(index=index, count=count)
+
+
+def _is_selected(interval, channel, custom_overrides):
+    return (custom_overrides.intervals is None or interval in custom_overrides.intervals) \
+        and (custom_overrides.channels is None or channel in custom_overrides.channels)
+
+
+def get_shard_work_units(intervals, custom_overrides) -> Set[Tuple[int, int]]:
+    '''
+    Enumerates all selected (interval, channel) pairs of the patient in a
+    fixed order and deals them out round robin, so that every machine
+    arrives at the same partitioning without having to talk to the others.
+
+    Parameters
+    -------
+    intervals : Intervals
+        all intervals of the patient
+    custom_overrides : CustomOverrides
+        user selection, must contain a shard
+
+    Returns
+    -------
+    The (interval, channel) pairs of this shard. Channels use 1 based indexing.
+    '''
+    all_work_units = [(interval, channel)
+                      for interval, interval_path in sorted(intervals.items())
+                      for channel in range(1, load_channel_count(interval_path) + 1)
+                      if _is_selected(interval, channel, custom_overrides)]
+    shard = custom_overrides.shard
+    return {work_unit for work_unit_index, work_unit in enumerate(all_work_units)
+            if work_unit_index % shard.count == shard.index - 1}
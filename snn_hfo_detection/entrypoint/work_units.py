@@ -0,0 +1,186 @@
+from typing import Iterator, NamedTuple, Optional
+import numpy as np
+from snn_hfo_detection.user_facing_data import ChannelData, Metadata, PatientData
+from snn_hfo_detection.stages.loading.patient_data import as_read_only, close_patient_data, load_patient_data, extract_channel_data
+from snn_hfo_detection.stages.loading.folder_discovery import get_interval_paths
+from snn_hfo_detection.stages.loading.hashing import hash_file
+from snn_hfo_detection.stages.persistence.calibration import get_calibration_cache_path
+from snn_hfo_detection.stages.filter import CalibrationSource, FilteredSignals, filter_wideband_signals, get_channel_filtered_signals
+from snn_hfo_detection.entrypoint.sharding import get_shard_work_units
+from snn_hfo_detection.entrypoint.resume import calculate_fingerprint, is_already_finished
+from snn_hfo_detection.telemetry import measure
+from snn_hfo_detection.profiling import profile_stage
+
+
+class WorkUnit(NamedTuple):
+    '''
+    A single channel of a single interval, which can be analyzed on its own
+    '''
+    metadata: Metadata
+    channel_data: ChannelData
+    filtered_signals: Optional[FilteredSignals]
+    calibration_source: Optional[CalibrationSource]
+    fingerprint: Optional[str]
+    is_already_finished: bool
+
+
+def _calculate_duration(time_base):
+    extra_simulation_time = 0.050
+    return time_base.stop + extra_simulation_time
+
+
+def _is_in_shard(interval, channel, shard_work_units):
+    return shard_work_units is None or (interval, channel) in shard_work_units
+
+
+def _is_any_channel_in_shard(interval, shard_work_units):
+    return shard_work_units is None or any(
+        shard_interval == interval for shard_interval, _channel in shard_work_units)
+
+
+def _filter_selected_channels(channel_datas, time_base, configuration):
+    if configuration.loading_path is not None or len(channel_datas) == 0:
+        return None
+    # All channels of a block go through every filter in one batched call
+    return filter_wideband_signals(
+        np.stack([channel_data.wideband_signal for channel_data in channel_datas]), time_base, configuration)
+
+
+class _PinnedCalibration(NamedTuple):
+    interval: int
+    interval_path: str
+    patient_data: PatientData
+
+
+def _load_pinned_calibration(intervals, configuration):
+    interval = configuration.calibration_interval
+    if interval is None:
+        return None
+    if interval not in intervals:
+        raise ValueError(
+            f'Thresholds should be calibrated on interval {interval}, but no such interval was found in {configuration.data_path}')
+    interval_path = intervals[interval]
+    return _PinnedCalibration(interval=interval,
+                              interval_path=interval_path,
+                              patient_data=load_patient_data(interval_path))
+
+
+def _extract_calibration_channel_data(patient_data, channel, calibration_time):
+    if channel >= len(patient_data.wideband_signals):
+        raise ValueError(
+            f'Thresholds should be calibrated on channel {channel + 1} of another interval, but it only has {len(patient_data.wideband_signals)} channels')
+    # Only the calibration samples are needed, so they are copied and the rest of the channel is freed
+    time_base = patient_data.time_base.truncate(calibration_time)
+    return ChannelData(
+        wideband_signal=as_read_only(
+            np.array(patient_data.wideband_signals[channel][:time_base.sample_count])),
+        time_base=time_base)
+
+
+def _get_calibration_source(interval, interval_path, channel, pinned_calibration, configuration):
+    is_pinned = pinned_calibration is not None and pinned_calibration.interval != interval
+    should_cache = get_calibration_cache_path(configuration) is not None
+    if not is_pinned and not should_cache:
+        return None
+    calibration_path = pinned_calibration.interval_path if is_pinned else interval_path
+    return CalibrationSource(
+        pinned_channel_data=_extract_calibration_channel_data(
+            pinned_calibration.patient_data, channel, configuration.calibration_time) if is_pinned else None,
+        file_hash=hash_file(calibration_path) if should_cache else None,
+        channel=channel + 1)
+
+
+class _Interval(NamedTuple):
+    interval: int
+    interval_path: str
+    patient_data: PatientData
+
+
+def _get_block_size(configuration):
+    # Only as many channels as can be analyzed at the same time are filtered ahead
+    return max(configuration.jobs, configuration.pipeline_depth or 1)
+
+
+def _generate_block_work_units(interval, metadatas, pinned_calibration, configuration):
+    with measure('loading'):
+        channel_datas = {channel: extract_channel_data(interval.patient_data, channel)
+                         for channel in metadatas}
+    fingerprints = {channel: calculate_fingerprint(configuration, metadata, channel_datas[channel])
+                    for channel, metadata in metadatas.items()}
+    finished_channels = {channel for channel, metadata in metadatas.items()
+                         if is_already_finished(configuration, metadata, fingerprints[channel])}
+    channels = [channel for channel in metadatas if channel not in finished_channels]
+    filtered_signals = _filter_selected_channels(
+        [channel_datas[channel] for channel in channels], interval.patient_data.time_base, configuration)
+    filtered_signal_rows = {channel: row for row, channel in enumerate(channels)}
+
+    for channel, metadata in metadatas.items():
+        if channel in finished_channels:
+            yield WorkUnit(
+                metadata=metadata,
+                channel_data=channel_datas[channel],
+                filtered_signals=None,
+                calibration_source=None,
+                fingerprint=fingerprints[channel],
+                is_already_finished=True)
+            continue
+        yield WorkUnit(
+            metadata=metadata,
+            channel_data=channel_datas[channel],
+            filtered_signals=get_channel_filtered_signals(filtered_signals, filtered_signal_rows[channel])
+            if filtered_signals is not None else None,
+            calibration_source=_get_calibration_source(
+                interval.interval, interval.interval_path, channel, pinned_calibration, configuration)
+            if configuration.loading_path is None else None,
+            fingerprint=fingerprints[channel],
+            is_already_finished=False)
+
+
+def _generate_interval_work_units(interval, pinned_calibration, shard_work_units, configuration, custom_overrides):
+    patient_data = interval.patient_data
+    duration = custom_overrides.duration if custom_overrides.duration is not None else _calculate_duration(
+        patient_data.time_base)
+
+    metadatas = {channel: Metadata(
+        interval=interval.interval,
+        channel=channel + 1,
+        channel_label=patient_data.channel_labels[channel],
+        duration=duration
+    ) for channel in range(len(patient_data.wideband_signals))
+        if (custom_overrides.channels is None or channel + 1 in custom_overrides.channels)
+        and _is_in_shard(interval.interval, channel + 1, shard_work_units)}
+    # Channels are read and filtered one block at a time when their work units are requested,
+    # so only the blocks that are being analyzed occupy memory
+    channels = list(metadatas)
+    block_size = _get_block_size(configuration)
+    for block_start in range(0, len(channels), block_size):
+        yield from _generate_block_work_units(
+            interval, {channel: metadatas[channel] for channel in channels[block_start:block_start + block_size]},
+            pinned_calibration, configuration)
+
+
+def generate_work_units(configuration, custom_overrides) -> Iterator[WorkUnit]:
+    intervals = get_interval_paths(configuration.data_path)
+    shard_work_units = get_shard_work_units(
+        intervals, custom_overrides) if custom_overrides.shard is not None else None
+    pinned_calibration = _load_pinned_calibration(
+        intervals, configuration) if configuration.loading_path is None else None
+    try:
+        for interval, interval_path in sorted(intervals.items()):
+            if custom_overrides.intervals is not None and interval not in custom_overrides.intervals:
+                continue
+            if not _is_any_channel_in_shard(interval, shard_work_units):
+                continue
+            with measure('loading'), profile_stage('loading', interval=interval):
+                patient_data = load_patient_data(interval_path)
+            # Work units only hold channels that were read before they are yielded,
+            # so the interval file can be closed once all of them were handed out
+            try:
+                yield from _generate_interval_work_units(
+                    _Interval(interval=interval, interval_path=interval_path, patient_data=patient_data),
+                    pinned_calibration, shard_work_units, configuration, custom_overrides)
+            finally:
+                close_patient_data(patient_data)
+    finally:
+        if pinned_calibration is not None:
+            close_patient_data(pinned_calibration.patient_data)
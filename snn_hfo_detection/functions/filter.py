@@ -1,4 +1,5 @@
-from scipy.signal import butter, lfilter
+from functools import lru_cache
+from scipy.signal import butter, lfilter, sosfilt
 
 # ========================================================================================
 # Butterworth filter coefficients
@@ -22,6 +23,23 @@ def butter_bandpass(lowcut, highcut, sampling_frequency, order=5):
     return butter(order, [low, high], btype='band')
 
 
+@lru_cache(maxsize=None)
+def butter_bandpass_sos(lowcut, highcut, sampling_frequency, order=5):
+    '''
+    Same as butter_bandpass, but returns the filter as second-order sections, which are
+    numerically more stable. The result is cached, so every filter is designed only once.
+
+    :lowcut, highcut (int): cutoff frequencies for the bandpass filter
+    :sampling_frequency (float): sampling_frequency frequency of the wideband signal
+    :order (int): filter order
+    :return sos (array): second-order sections of the filter
+    '''
+    nyq = 0.5 * sampling_frequency
+    low = lowcut / nyq
+    high = highcut / nyq
+    return butter(order, [low, high], btype='band', output='sos')
+
+
 # ========================================================================================
 # Butterworth filters
 # ========================================================================================
@@ -41,3 +59,17 @@ def butter_bandpass_filter(data, lowcut, highcut, sampling_frequency, order=5):
     coefficient_b, coefficient_a = butter_bandpass(
         lowcut, highcut, sampling_frequency, order=order)
     return lfilter(coefficient_b, coefficient_a, data)
+
+
+def butter_bandpass_filter_bank(data, bands, sampling_frequency, order=5):
+    '''
+    This function applies several bandpass filters to many wideband signals at once.
+
+    :data (2-D array): amplitude values of the wideband signals, one signal per row
+    :bands (list): (lowcut, highcut) cutoff frequencies of every bandpass filter
+    :sampling_frequency (float): sampling frequency of the wideband signals
+    :order (int): filter order
+    :return (list of 2-D arrays): the filtered signals of every band, one signal per row
+    '''
+    return [sosfilt(butter_bandpass_sos(lowcut, highcut, sampling_frequency, order=order), data, axis=1)
+            for lowcut, highcut in bands]
@@ -1,5 +1,7 @@
+from itertools import repeat
 from typing import NamedTuple
 import numpy as np
+from snn_hfo_detection.functions.time_base import TimeBase
 
 # ========================================================================================
 # Account for changes in a binary signal
@@ -26,18 +28,97 @@ class Periods(NamedTuple):
     stop: np.array
 
 
+class Detections():
+    '''
+    Samples in which HFOs were detected, stored as runs of consecutive samples
+    instead of one boolean per sample. Behaves like the boolean list when it is
+    measured, indexed or iterated. Single samples are looked up in the runs,
+    while slices and other indices expand them every time.
+    Use to_mask or np.asarray to get the boolean list once.
+
+    Parameters
+    -----
+    sample_count : int
+        Amount of analyzed samples.
+    start : np.array
+        Index of the first sample of every run.
+    stop : np.array
+        Index after the last sample of every run.
+    '''
+    def __init__(self, sample_count, start, stop):
+        self.sample_count = sample_count
+        self.start = start
+        self.stop = stop
+
+    @staticmethod
+    def from_mask(mask) -> 'Detections':
+        mask = np.asarray(mask, dtype=bool)
+        changes = np.flatnonzero(np.diff(mask, prepend=False, append=False))
+        return Detections(sample_count=len(mask), start=changes[0::2], stop=changes[1::2])
+
+    def to_mask(self, start=None, stop=None) -> np.array:
+        '''
+        Boolean list of HFO detection of the samples in [start, stop), following the rules of slicing
+        '''
+        samples = range(self.sample_count)[start:stop]
+        first_index = samples.start
+        sample_count = max(samples.stop - samples.start, 0)
+        run_starts = np.clip(np.asarray(self.start) - first_index, 0, sample_count)
+        run_stops = np.clip(np.asarray(self.stop) - first_index, 0, sample_count)
+        changes = np.bincount(run_starts, minlength=sample_count + 1) - \
+            np.bincount(run_stops, minlength=sample_count + 1)
+        return np.cumsum(changes[:sample_count]) > 0
+
+    def _is_detected(self, sample):
+        # The first run that stops after the sample is the only one that can contain it
+        sample = range(self.sample_count)[sample]
+        run = np.searchsorted(self.stop, sample, side='right')
+        return bool(run < len(self.start) and self.start[run] <= sample)
+
+    def __array__(self, dtype=None):
+        mask = self.to_mask()
+        return mask if dtype is None else mask.astype(dtype)
+
+    def __len__(self):
+        return self.sample_count
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return self._is_detected(index)
+        return self.to_mask()[index]
+
+    def __iter__(self):
+        sample = 0
+        for start, stop in zip(self.start, self.stop):
+            yield from repeat(False, start - sample)
+            yield from repeat(True, stop - start)
+            sample = stop
+        yield from repeat(False, self.sample_count - sample)
+
+    def __eq__(self, other):
+        if not isinstance(other, Detections):
+            return NotImplemented
+        return self.sample_count == other.sample_count and \
+            np.array_equal(self.start, other.start) and np.array_equal(self.stop, other.stop)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f'Detections(sample_count={self.sample_count}, start={self.start!r}, stop={self.stop!r})'
+
+
 class Analytics(NamedTuple):
     '''
     Convenience data that can be used for plotting.
 
     Parameters
     -----
-    detections : np.array
-        Boolean list of HFO detection. The indices correspond to the input's analyzed times.
+    detections : Detections
+        HFO detection of every sample. The indices correspond to the input's analyzed times.
     periods : Periods
         The start and end times in which HFOs were detected.
     '''
-    detections: np.array
+    detections: Detections
     periods: Periods
 
 
@@ -71,57 +152,87 @@ class HfoDetectionWithAnalytics(NamedTuple):
     analytics: Analytics
 
 
-def _did_snn_find_hfo(spike_times, window):
-    return np.any(
-        (spike_times >= window.start) & (spike_times <= window.stop))
+def _get_windows_with_spikes(duration, spike_times, step_size, window_size):
+    starts = np.arange(start=0, stop=duration, step=step_size)
+    stops = starts + window_size
+    sorted_spike_times = np.sort(np.asarray(spike_times, dtype=float))
+    # A window contains a spike if the spikes up to its stop outnumber the ones before its start
+    has_spike = np.searchsorted(sorted_spike_times, stops, side='right') > \
+        np.searchsorted(sorted_spike_times, starts, side='left')
+    return Window(start=starts[has_spike], stop=stops[has_spike])
 
 
-def _get_time_indices_in_window(signal_times, window):
-    return np.where(
-        (signal_times >= window.start) & (signal_times <= window.stop))
+def _merge_ranges(first_indices, last_indices, sample_count):
+    # Both are sorted, so a range starting after the previous one ended begins a new run
+    is_not_empty = first_indices < last_indices
+    first_indices = first_indices[is_not_empty]
+    last_indices = last_indices[is_not_empty]
+    if len(first_indices) == 0:
+        return Detections(sample_count=sample_count, start=first_indices, stop=last_indices)
+    is_new_run = first_indices[1:] > last_indices[:-1]
+    return Detections(sample_count=sample_count,
+                      start=first_indices[np.concatenate(([True], is_new_run))],
+                      stop=last_indices[np.concatenate((is_new_run, [True]))])
 
 
-def get_binary_hfos(duration, spike_times, signal_times, step_size, window_size):
-    binary_hfo_signal = np.zeros(len(signal_times)).astype(bool)
-
-    for start_time in np.arange(start=0, stop=duration, step=step_size):
-        window = Window(start=start_time,
-                        stop=(start_time + window_size))
-
-        if _did_snn_find_hfo(spike_times, window):
-            hfo_indices = _get_time_indices_in_window(
-                signal_times, window)
-            binary_hfo_signal[hfo_indices] = True
-    return binary_hfo_signal
+def get_detections(duration, spike_times, signal_times, step_size, window_size) -> Detections:
+    '''
+    Marks every signal time that lies in a window of window_size containing a spike.
+    The windows start every step_size seconds between 0 and duration.
+    signal_times can be a TimeBase, whose sample indices are calculated instead of searched.
+    '''
+    windows = _get_windows_with_spikes(
+        duration, spike_times, step_size, window_size)
+    if isinstance(signal_times, TimeBase):
+        return _merge_ranges(signal_times.find_indices(windows.start, side='left'),
+                             signal_times.find_indices(
+                                 windows.stop, side='right'),
+                             signal_times.sample_count)
+
+    signal_times = np.asarray(signal_times, dtype=float)
+
+    is_sorted = np.all(signal_times[1:] >= signal_times[:-1])
+    order = None if is_sorted else np.argsort(signal_times, kind='stable')
+    sorted_signal_times = signal_times if is_sorted else signal_times[order]
+
+    # Every window covers a contiguous range of the sorted times
+    first_indices = np.searchsorted(
+        sorted_signal_times, windows.start, side='left')
+    last_indices = np.searchsorted(
+        sorted_signal_times, windows.stop, side='right')
+    detections = _merge_ranges(
+        first_indices, last_indices, len(signal_times))
+
+    if is_sorted:
+        return detections
+    binary_hfo_signal = np.zeros(len(signal_times), dtype=bool)
+    binary_hfo_signal[order] = detections.to_mask()
+    return Detections.from_mask(binary_hfo_signal)
 
 
-def _find_periods(signals, times):
-    if len(signals) == 0:
-        raise ValueError('signals is not allowed to be empty, but was')
-    if len(times) == 0:
+def get_binary_hfos(duration, spike_times, signal_times, step_size, window_size):
+    return get_detections(duration, spike_times, signal_times, step_size, window_size).to_mask()
+
+
+def _find_periods(detections, times):
+    if isinstance(times, TimeBase):
+        time_count = times.sample_count
+        get_times_at = times.get_times_at
+    else:
+        times = np.asarray(times)
+        time_count = len(times)
+        get_times_at = times.__getitem__
+    if detections.sample_count == 0:
+        raise ValueError('detections is not allowed to be empty, but was')
+    if time_count == 0:
         raise ValueError('times is not allowed to be empty, but was')
-    if len(signals) != len(times):
+    if detections.sample_count != time_count:
         raise ValueError(
-            f'signals and times need to have corresponding indices, but signals has length {len(signals)} while times has length {len(times)}')
-
-    periods = []
-    for signal, time in zip(signals, times):
-        is_last_period_finished = len(
-            periods) == 0 or periods[-1].stop is not None
-
-        if signal == 0 and not is_last_period_finished:
-            periods[-1] = Window(start=periods[-1].start, stop=time)
-        if signal == 1 and is_last_period_finished:
-            periods.append(Window(start=time, stop=None))
-    if len(periods) != 0 and periods[-1].stop is None:
-        periods[-1] = Window(periods[-1].start, times[-1])
-    return periods
-
+            f'detections and times need to have corresponding indices, but detections has length {detections.sample_count} while times has length {time_count}')
 
-def _flatten_periods(periods):
-    start = [period.start for period in periods]
-    stop = [period.stop for period in periods if period.stop is not None]
-    return Periods(start, stop)
+    # A period stops at the first sample without detection, or at the last sample
+    stop_indices = np.minimum(detections.stop, time_count - 1)
+    return Periods(start=get_times_at(detections.start).tolist(), stop=get_times_at(stop_indices).tolist())
 
 
 def detect_hfo(duration, spike_times, signal_times, step_size, window_size):
@@ -132,18 +243,17 @@ def detect_hfo(duration, spike_times, signal_times, step_size, window_size):
         raise ValueError(
             f'Tried to detect an HFO for a dataset with a duration that under or equal to zero. Got duration: {duration}')
 
-    binary_hfo_signal = get_binary_hfos(
+    detections = get_detections(
         duration, spike_times, signal_times, step_size, window_size)
-    periods = _find_periods(binary_hfo_signal, signal_times)
-    flat_periods = _flatten_periods(periods)
+    periods = _find_periods(detections, signal_times)
 
     return HfoDetectionWithAnalytics(
         result=HfoDetection(
-            total_amount=len(periods),
-            frequency=len(periods)/duration,
+            total_amount=len(periods.start),
+            frequency=len(periods.start)/duration,
         ),
         analytics=Analytics(
-            detections=binary_hfo_signal,
-            periods=flat_periods
+            detections=detections,
+            periods=periods
         )
     )
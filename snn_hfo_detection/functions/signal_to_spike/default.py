@@ -1,5 +1,5 @@
 import numpy as np
-from scipy.interpolate import interp1d
+from numba import njit
 from snn_hfo_detection.functions.signal_to_spike.utility import SpikeTrains, SignalToSpikeParameters
 
 
@@ -15,31 +15,86 @@ def signal_to_spike(parameters: SignalToSpikeParameters):
     :thr_dn (float): threshold crossing in a falling direction
     :refractory_period (float): period in which no spike will be generated [same units as time vector]
     '''
-    actual_dc = 0
-    spike_up = []
-    spike_dn = []
+    times = np.asarray(parameters.times, dtype=np.float64)
+    signal = np.asarray(parameters.signal, dtype=np.float64)
+    start = np.min(times)
+    stop = np.max(times)
+    sample_count = int(
+        np.round((stop - start)*parameters.interpolation_factor))
+    refractory_samples = int(
+        parameters.refractory_period * parameters.interpolation_factor)
+    spike_up, spike_dn = _signal_to_spike(times=times,
+                                          signal=signal,
+                                          start=start,
+                                          stop=stop,
+                                          sample_count=sample_count,
+                                          threshold_up=float(
+                                              parameters.threshold_up),
+                                          threshold_down=float(
+                                              parameters.threshold_down),
+                                          refractory_samples=refractory_samples)
+    return SpikeTrains(up=spike_up,
+                       down=spike_dn)
+
+
+@njit
+def _get_upsampled_time(index, start, stop, sample_count):
+    # Same arithmetic as np.linspace(start, stop, num=sample_count, endpoint=True)
+    if sample_count == 1:
+        return start
+    if index == sample_count - 1:
+        return stop
+    return index * ((stop - start) / (sample_count - 1)) + start
+
+
+@njit
+def _interpolate(time, times, signal, index):
+    # Same arithmetic as np.interp, which is what interp1d uses for linear interpolation
+    if index == len(times) - 1 or time == times[index]:
+        return signal[index]
+    slope = (signal[index + 1] - signal[index]) / \
+        (times[index + 1] - times[index])
+    value = slope * (time - times[index]) + signal[index]
+    if np.isnan(value):
+        value = slope * (time - times[index + 1]) + signal[index + 1]
+        if np.isnan(value) and signal[index] == signal[index + 1]:
+            value = signal[index]
+    return value
 
-    intepolated_time = interp1d(parameters.times, parameters.signal)
-    rangeint = np.round(
-        (np.max(parameters.times) - np.min(parameters.times))*parameters.interpolation_factor)
-    xnew = np.linspace(np.min(parameters.times), np.max(
-        parameters.times), num=int(rangeint), endpoint=True)
-    data = np.reshape([xnew, intepolated_time(xnew)], (2, len(xnew))).T
 
+@njit
+def _signal_to_spike(times, signal, start, stop, sample_count, threshold_up, threshold_down, refractory_samples):
+    '''
+    Walks through the signal as if it was upsampled to sample_count samples via linear
+    interpolation, but only computes the upsampled values it actually visits.
+    '''
+    # Every spike is followed by at least one skipped sample
+    max_spike_count = sample_count // max(refractory_samples, 1) + 1
+    spike_up = np.empty(max_spike_count)
+    spike_dn = np.empty(max_spike_count)
+    spike_up_count = 0
+    spike_dn_count = 0
+
+    actual_dc = 0.0
+    original_index = 0
     i = 0
-    while i < (len(data)):
-        if((actual_dc + parameters.threshold_up) < data[i, 1]):
-            spike_up.append(data[i, 0])  # spike up
-            actual_dc = data[i, 1]        # update current dc value
-            i += int(parameters.refractory_period *
-                     parameters.interpolation_factor)
-        elif((actual_dc - parameters.threshold_down) > data[i, 1]):
-            spike_dn.append(data[i, 0])  # spike dn
-            actual_dc = data[i, 1]        # update curre
-            i += int(parameters.refractory_period *
-                     parameters.interpolation_factor)
+    while i < sample_count:
+        time = _get_upsampled_time(i, start, stop, sample_count)
+        while original_index < len(times) - 1 and times[original_index + 1] <= time:
+            original_index += 1
+        value = _interpolate(time, times, signal, original_index)
+
+        if (actual_dc + threshold_up) < value:
+            spike_up[spike_up_count] = time  # spike up
+            spike_up_count += 1
+            actual_dc = value        # update current dc value
+            i += refractory_samples
+        elif (actual_dc - threshold_down) > value:
+            spike_dn[spike_dn_count] = time  # spike dn
+            spike_dn_count += 1
+            actual_dc = value        # update current dc value
+            i += refractory_samples
         else:
             i += 1
 
-    return SpikeTrains(up=spike_up,
-                       down=spike_dn)
+    return spike_up[:spike_up_count].copy(), spike_dn[:spike_dn_count].copy()
@@ -1,47 +1,115 @@
+from typing import List
 import numpy as np
-from numba import njit
+from numba import njit, prange
 from scipy.interpolate import interp1d
 from snn_hfo_detection.functions.signal_to_spike.utility import SpikeTrains, get_sampling_frequency, SignalToSpikeParameters
 
 
-def signal_to_spike(parameters: SignalToSpikeParameters) -> SpikeTrains:
-    sampling_frequency = get_sampling_frequency(parameters.times)
+def _interpolate_if_refractory_period_is_too_short(times, signals, refractory_period):
+    sampling_frequency = get_sampling_frequency(times)
     delta_time = 1/sampling_frequency
-    times = parameters.times
-    signal = parameters.signal
-    if parameters.refractory_period < delta_time:
-        interpolation_factor = 1
-        while delta_time > parameters.refractory_period:
-            interpolation_factor += 1
-            delta_time = 1/(sampling_frequency*interpolation_factor)
-        interpolation = interp1d(times, signal)
-        times = np.concatenate(
-            (np.arange(0, times[-1], delta_time), [times[-1]]))
-        signal = interpolation(times)
-        sampling_frequency = 1/times[1]
-    interpolated_parameters = SignalToSpikeParameters(
-        signal=signal,
-        threshold_up=parameters.threshold_up,
-        threshold_down=parameters.threshold_down,
-        times=times,
-        refractory_period=parameters.refractory_period)
-    return _signal_to_spike(interpolated_parameters)
-
-
-@ njit(fastmath=True, parallel=True)
-def _signal_to_spike(parameters: SignalToSpikeParameters) -> SpikeTrains:
-    delta_time = parameters.times[1] - parameters.times[0]
-    dc_voltage = parameters.signal[0]
+    if refractory_period >= delta_time:
+        return times, signals
+    interpolation_factor = 1
+    while delta_time > refractory_period:
+        interpolation_factor += 1
+        delta_time = 1/(sampling_frequency*interpolation_factor)
+    interpolation = interp1d(times, signals)
+    times = np.concatenate(
+        (np.arange(0, times[-1], delta_time), [times[-1]]))
+    return times, interpolation(times)
+
+
+def signal_to_spike(parameters: SignalToSpikeParameters) -> SpikeTrains:
+    times, signal = _interpolate_if_refractory_period_is_too_short(
+        np.asarray(parameters.times, dtype=np.float64),
+        np.asarray(parameters.signal, dtype=np.float64),
+        parameters.refractory_period)
+    # Every sample produces at most one spike
+    spike_t_up = np.empty(len(times))
+    spike_t_dn = np.empty(len(times))
+    up_count, dn_count = _signal_to_spike(times=times,
+                                          signal=signal,
+                                          threshold_up=float(
+                                              parameters.threshold_up),
+                                          threshold_down=float(
+                                              parameters.threshold_down),
+                                          refractory_period=parameters.refractory_period,
+                                          spike_t_up=spike_t_up,
+                                          spike_t_dn=spike_t_dn)
+    return SpikeTrains(
+        up=spike_t_up[:up_count].copy(),
+        down=spike_t_dn[:dn_count].copy(),
+    )
+
+
+def signal_to_spike_batch(signals, times, thresholds, refractory_period) -> List[SpikeTrains]:
+    '''
+    Same as signal_to_spike, but encodes many channels that share the same
+    time vector at once, distributing the channels over all available CPU cores.
+
+    Parameters
+    -------
+    signals : np.ndarray
+        filtered signals, one channel per row
+    times : np.ndarray
+        time vector shared by all channels
+    thresholds : np.ndarray
+        threshold of every channel, used for both directions
+    refractory_period : float
+        period in which no spike will be generated [same units as time vector]
+
+    Returns
+    -------
+    The spike trains of every channel
+    '''
+    times, signals = _interpolate_if_refractory_period_is_too_short(
+        np.asarray(times, dtype=np.float64),
+        np.atleast_2d(np.asarray(signals, dtype=np.float64)),
+        refractory_period)
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    spike_t_up = np.empty(signals.shape)
+    spike_t_dn = np.empty(signals.shape)
+    up_counts, dn_counts = _signal_to_spike_batch(
+        times, signals, thresholds, refractory_period, spike_t_up, spike_t_dn)
+    return [SpikeTrains(up=spike_t_up[channel, :up_counts[channel]].copy(),
+                        down=spike_t_dn[channel, :dn_counts[channel]].copy())
+            for channel in range(len(signals))]
+
+
+@njit(fastmath=True, parallel=True)
+def _signal_to_spike_batch(times, signals, thresholds, refractory_period, spike_t_up, spike_t_dn):
+    up_counts = np.zeros(len(signals), dtype=np.int64)
+    dn_counts = np.zeros(len(signals), dtype=np.int64)
+    for channel in prange(len(signals)):
+        up_counts[channel], dn_counts[channel] = _signal_to_spike(times,
+                                                                  signals[channel],
+                                                                  thresholds[channel],
+                                                                  thresholds[channel],
+                                                                  refractory_period,
+                                                                  spike_t_up[channel],
+                                                                  spike_t_dn[channel])
+    return up_counts, dn_counts
+
+
+@njit(fastmath=True)
+def _signal_to_spike(times, signal, threshold_up, threshold_down, refractory_period, spike_t_up, spike_t_dn):
+    '''
+    Writes the spike times into the preallocated spike_t_up and spike_t_dn,
+    which must have room for one spike per sample, and returns how many were written.
+    '''
+    delta_time = times[1] - times[0]
+    dc_voltage = signal[0]
     remainder_of_refractory = 0
-    spike_t_up = parameters.times[0:2]
-    spike_t_dn = parameters.times[0:2]
+    up_count = 0
+    dn_count = 0
     interpolate_from = 0.0
     interpolation_activation = 0
     intercept_point = 0
 
-    for i, time in enumerate(parameters.times[1:]):
+    for i, time in enumerate(times[1:]):
         slope = (
-            (parameters.signal[i]-parameters.signal[i-1])/delta_time)
+            (signal[i]-signal[i-1])/delta_time)
         if remainder_of_refractory >= 2*delta_time:
             remainder_of_refractory = remainder_of_refractory-delta_time
             interpolation_activation = 1
@@ -56,38 +124,33 @@ def _signal_to_spike(parameters: SignalToSpikeParameters) -> SpikeTrains:
             interpolate_from = (
                 interpolate_from+remainder_of_refractory) % delta_time
             voltage_below = (
-                parameters.signal[i-1] + interpolate_from*slope)
+                signal[i-1] + interpolate_from*slope)
             dc_voltage = voltage_below
 
         else:
-            voltage_below = parameters.signal[i-1]
+            voltage_below = signal[i-1]
             interpolate_from = 0
 
-        if dc_voltage + parameters.threshold_up <= parameters.signal[i]:
+        if dc_voltage + threshold_up <= signal[i]:
             intercept_point = time - delta_time + interpolate_from + \
-                ((parameters.threshold_up+dc_voltage-voltage_below)/slope)
-            spike_t_up = np.append(spike_t_up, intercept_point)
+                ((threshold_up+dc_voltage-voltage_below)/slope)
+            spike_t_up[up_count] = intercept_point
+            up_count += 1
             interpolate_from = delta_time+intercept_point-time
-            remainder_of_refractory = parameters.refractory_period
+            remainder_of_refractory = refractory_period
             interpolation_activation = 1
             continue
 
-        if dc_voltage - parameters.threshold_down >= parameters.signal[i]:
+        if dc_voltage - threshold_down >= signal[i]:
             intercept_point = time - delta_time + interpolate_from + \
-                ((-parameters.threshold_down+dc_voltage-voltage_below)/slope)
-            spike_t_dn = np.append(spike_t_dn, intercept_point)
+                ((-threshold_down+dc_voltage-voltage_below)/slope)
+            spike_t_dn[dn_count] = intercept_point
+            dn_count += 1
             interpolate_from = delta_time+intercept_point-time
-            remainder_of_refractory = parameters.refractory_period
+            remainder_of_refractory = refractory_period
             interpolation_activation = 1
             continue
 
         interpolation_activation = 0
 
-    index = [0, 1]
-    spike_t_up = np.delete(spike_t_up, index)
-    spike_t_dn = np.delete(spike_t_dn, index)
-
-    return SpikeTrains(
-        up=spike_t_up,
-        down=spike_t_dn,
-    )
+    return up_count, dn_count
@@ -66,13 +66,9 @@ def find_thresholds(signals, times, window_size, sample_ratio, scaling_factor):
 
     num_timesteps = int(np.ceil(duration / window_size))
     max_min_amplitude = np.zeros((num_timesteps, 2))
-    for interval_nr, interval_start in enumerate(np.arange(start=0, stop=duration, step=window_size)):
-        interval_end = interval_start + window_size
-        index = np.where((times >= interval_start) & (times <= interval_end))
-        max_amplitude = np.max(signals[index])
-        min_amplitude = np.min(signals[index])
-        max_min_amplitude[interval_nr, 0] = max_amplitude
-        max_min_amplitude[interval_nr, 1] = min_amplitude
+    interval_starts = np.arange(start=0, stop=duration, step=window_size)
+    max_min_amplitude[:len(interval_starts)] = _find_max_min_amplitudes(
+        np.asarray(signals), np.asarray(times), interval_starts, interval_starts + window_size)
 
     chosen_samples = max(int(np.round(num_timesteps * sample_ratio)), 1)
     threshold_up = np.mean(np.sort(max_min_amplitude[:, 0])[:chosen_samples])
@@ -81,6 +77,39 @@ def find_thresholds(signals, times, window_size, sample_ratio, scaling_factor):
     return scaling_factor*(threshold_up + threshold_dn)
 
 
+def _find_max_min_amplitudes_per_interval(signals, times, interval_starts, interval_ends):
+    max_min_amplitude = np.zeros((len(interval_starts), 2))
+    for interval_nr, (interval_start, interval_end) in enumerate(zip(interval_starts, interval_ends)):
+        index = np.where((times >= interval_start) & (times <= interval_end))
+        max_min_amplitude[interval_nr, 0] = np.max(signals[index])
+        max_min_amplitude[interval_nr, 1] = np.min(signals[index])
+    return max_min_amplitude
+
+
+def _find_max_min_amplitudes(signals, times, interval_starts, interval_ends):
+    '''
+    Finds the maximum and minimum amplitude of the signals in every closed interval
+    [interval_start, interval_end] with a single pass over the signals.
+    '''
+    if np.any(times[1:] < times[:-1]):
+        return _find_max_min_amplitudes_per_interval(signals, times, interval_starts, interval_ends)
+
+    first_indices = np.searchsorted(times, interval_starts, side='left')
+    end_indices = np.searchsorted(times, interval_ends, side='right')
+    if np.any(first_indices >= end_indices):
+        raise ValueError(
+            'Every window used to find thresholds must contain at least one sample')
+    # reduceat reduces between consecutive indices, so interleaving the interval
+    # bounds yields every interval at the even positions.
+    # The padding allows an interval to end after the last sample.
+    bounds = np.stack((first_indices, end_indices), axis=1).ravel()
+    padded_signals = np.append(signals, signals[-1])
+    max_min_amplitude = np.zeros((len(interval_starts), 2))
+    max_min_amplitude[:, 0] = np.maximum.reduceat(padded_signals, bounds)[::2]
+    max_min_amplitude[:, 1] = np.minimum.reduceat(padded_signals, bounds)[::2]
+    return max_min_amplitude
+
+
 # ========================================================================================
 # List of spiketimes for the SNN input
 # ========================================================================================
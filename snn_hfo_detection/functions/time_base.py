@@ -0,0 +1,146 @@
+from typing import NamedTuple
+import numpy as np
+
+# Exported recordings deviate from the ideal grid by rounding errors, but never by a noticeable part of a sample
+_MAX_SAMPLE_DEVIATION = 1e-3
+# Times this close to a sample are treated as if they were exactly on it
+_SAMPLE_TOLERANCE = 1e-6
+
+
+class TimeBase(NamedTuple):
+    '''
+    The times of a uniformly sampled recording. Instead of storing one time per sample,
+    they are calculated from the time of the first sample and the sampling frequency.
+
+    Parameters
+    -------
+    start : float
+        time of the first sample in seconds
+    sampling_frequency : float
+        samples per second
+    sample_count : int
+        amount of samples
+    '''
+    start: float
+    sampling_frequency: float
+    sample_count: int
+
+    @staticmethod
+    def from_times(times) -> 'TimeBase':
+        '''
+        Describes a time vector by its first time and its sampling frequency,
+        which is calculated from the first two times like get_sampling_frequency does.
+        Fails if the times are not sampled uniformly.
+        '''
+        times = np.asarray(times, dtype=np.float64).ravel()
+        if len(times) < 2:
+            raise ValueError(
+                f'At least two times are needed to determine the sampling frequency, but got {len(times)}')
+        time_base = TimeBase(start=float(times[0]),
+                             sampling_frequency=float(1 / (times[1] - times[0])),
+                             sample_count=len(times))
+        if not time_base.sampling_frequency > 0:
+            raise ValueError(
+                f'Times need to increase, but the first two are {times[0]} and {times[1]}')
+        deviations = np.abs(times - time_base.get_times()) * \
+            time_base.sampling_frequency
+        if np.max(deviations) > _MAX_SAMPLE_DEVIATION:
+            sample = int(np.argmax(deviations))
+            raise ValueError(
+                f'Only uniformly sampled recordings are supported, but sample {sample + 1} at {times[sample]} s '
+                f'is {deviations[sample]:.3g} samples off the sampling frequency of {time_base.sampling_frequency} Hz')
+        return time_base
+
+    @property
+    def stop(self) -> float:
+        '''
+        Time of the last sample
+        '''
+        return self.start + (self.sample_count - 1) / self.sampling_frequency
+
+    def get_times(self, start=None, stop=None) -> np.ndarray:
+        '''
+        Materializes the times of the samples in [start, stop), following the rules of slicing
+        '''
+        samples = range(self.sample_count)[start:stop]
+        return self.get_times_at(np.arange(samples.start, max(samples.stop, samples.start)))
+
+    def get_times_at(self, indices) -> np.ndarray:
+        return self.start + np.asarray(indices) / self.sampling_frequency
+
+    def find_indices(self, times, side='left') -> np.ndarray:
+        '''
+        Where the times would be inserted into the times of the samples to keep them sorted,
+        like np.searchsorted does for a materialized time vector
+        '''
+        positions = (np.asarray(times, dtype=np.float64) -
+                     self.start) * self.sampling_frequency
+        nearest_positions = np.round(positions)
+        positions = np.where(np.abs(positions - nearest_positions) <= _SAMPLE_TOLERANCE,
+                             nearest_positions, positions)
+        indices = np.ceil(positions) if side == 'left' else np.floor(
+            positions) + 1
+        return np.clip(indices, 0, self.sample_count).astype(np.int64)
+
+    def truncate(self, time) -> 'TimeBase':
+        '''
+        The time base of the samples up to and including time
+        '''
+        return self._replace(sample_count=int(self.find_indices(time, side='right')))
+
+
+class SampledTimes(NamedTuple):
+    '''
+    The times of a recording that is not sampled uniformly, stored one per sample.
+    Offers the same interface as TimeBase, so that such recordings are analyzed like before.
+
+    Parameters
+    -------
+    times : np.ndarray
+        times of the samples in seconds, in increasing order
+    '''
+    times: np.ndarray
+
+    @property
+    def start(self) -> float:
+        return float(self.times[0])
+
+    @property
+    def sampling_frequency(self) -> float:
+        '''
+        Calculated from the first two times like get_sampling_frequency does
+        '''
+        return float(1 / (self.times[1] - self.times[0]))
+
+    @property
+    def sample_count(self) -> int:
+        return len(self.times)
+
+    @property
+    def stop(self) -> float:
+        return float(np.max(self.times))
+
+    def __array__(self, dtype=None):
+        return np.asarray(self.times, dtype=dtype)
+
+    def get_times(self, start=None, stop=None) -> np.ndarray:
+        return self.times[start:stop]
+
+    def get_times_at(self, indices) -> np.ndarray:
+        return self.times[np.asarray(indices)]
+
+    def find_indices(self, times, side='left') -> np.ndarray:
+        return np.searchsorted(self.times, times, side=side)
+
+    def truncate(self, time) -> 'SampledTimes':
+        return SampledTimes(times=self.times[:int(self.find_indices(time, side='right'))])
+
+
+def describe_times(times):
+    '''
+    A TimeBase for uniformly sampled times. Other times are kept as they are in SampledTimes.
+    '''
+    try:
+        return TimeBase.from_times(times)
+    except ValueError:
+        return SampledTimes(times=np.asarray(times, dtype=np.float64).ravel())
@@ -1,13 +1,6 @@
 from os import path, makedirs
-from typing import List, TypedDict
 import matplotlib.pyplot as plt
-from snn_hfo_detection.user_facing_data import HfoDetectionRun
-from snn_hfo_detection.user_facing_data import HfoDetectionWithAnalytics, PlotMode
-
-
-class Intervals(TypedDict):
-    index: int
-    channel_data: List[HfoDetectionRun]
+from snn_hfo_detection.user_facing_data import HfoDetectionWithAnalytics, PatientSummary, PlotMode
 
 
 def _save_plot(plot_name, parent_directory):
@@ -34,8 +27,8 @@ def save_or_show_channel_plot(plot_name, hfo_detection_run: HfoDetectionWithAnal
         _save_plot(plot_name, parent_dir)
 
 
-def save_or_show_patient_plot(plot_name, intervals: Intervals):
-    configuration = next(iter(intervals.values())).channel_data.configuration
+def save_or_show_patient_plot(plot_name, patient_summary: PatientSummary):
+    configuration = patient_summary.configuration
     if should_show_plot(configuration):
         plt.show()
     if should_save_plot(configuration):
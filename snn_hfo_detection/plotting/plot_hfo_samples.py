@@ -24,8 +24,8 @@ def _should_draw_fast_ripple(hfo_run):
 
 def _plot_bandwidth(bandwidth_axes, hfo_run, start, stop):
     analytics = hfo_run.detector.last_run.analytics
-    start_index, stop_index = _get_start_to_stop_indices(
-        hfo_run.input.signal_time, start, stop)
+    start_index, stop_index = hfo_run.input.time_base.find_indices([
+        start, stop])
 
     should_draw_ripple = _should_draw_ripple(hfo_run)
     should_draw_fast_ripple = _should_draw_fast_ripple(hfo_run)
@@ -34,7 +34,7 @@ def _plot_bandwidth(bandwidth_axes, hfo_run, start, stop):
         start_index: stop_index]) if should_draw_ripple else np.zeros(stop_index - start_index)
     signal_fr = np.array(analytics.filtered_spikes.fast_ripple.signal[
         start_index: stop_index]) if should_draw_fast_ripple else np.zeros(stop_index - start_index)
-    signal_time = hfo_run.input.signal_time[start_index: stop_index]
+    signal_time = hfo_run.input.time_base.get_times(start_index, stop_index)
 
     scale_fr = 6
     scale_ripple = 3
@@ -53,8 +53,7 @@ def _plot_bandwidth(bandwidth_axes, hfo_run, start, stop):
     ylim_up_r = np.max(signal_r) * scale_ripple + shift_ripple * \
         np.abs(np.min(signal_r*scale_ripple)) + ylim_up_fr
 
-    signal_teacher = np.array(
-        analytics.detections[start_index: stop_index])
+    signal_teacher = analytics.detections.to_mask(start_index, stop_index)
     bandwidth_axes.fill_between(signal_time, 2 * np.min(signal_fr) * scale_fr,
                                 2.2 * np.min(signal_fr) * scale_fr, where=signal_teacher == 1,
                                 facecolor='#595959', alpha=0.7, label='teacher')
@@ -12,12 +12,12 @@ def _append_or_create(dict, key, value):
 
 def _convert_to_labels_to_hfo_rate_dict(intervals):
     label_to_hfo_rates = {}
-    for hfo_detection_runs in intervals.values():
-        for hfo_detection_run in hfo_detection_runs:
+    for channel_summaries in intervals.values():
+        for channel_summary in channel_summaries:
             _append_or_create(
                 dict=label_to_hfo_rates,
-                key=hfo_detection_run.metadata.channel_label,
-                value=hfo_detection_run.detector.last_run.result.frequency * 60)
+                key=channel_summary.metadata.channel_label,
+                value=channel_summary.result.frequency * 60)
 
     return label_to_hfo_rates
 
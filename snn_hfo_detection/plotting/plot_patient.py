@@ -1,19 +1,22 @@
-from snn_hfo_detection.plotting.persistence import Intervals, save_or_show_patient_plot
+from snn_hfo_detection.user_facing_data import PatientSummary
+from snn_hfo_detection.plotting.persistence import save_or_show_patient_plot
 from snn_hfo_detection.plotting.plot_mean_hfo_rate import plot_mean_hfo_rate as inner_plot_mean_hfo_rate
 
 
 class PatientDebugError(Exception):
-    def __init__(self, message, intervals: Intervals):
+    def __init__(self, message, patient_summary: PatientSummary):
         super().__init__(message)
-        self.intervals = intervals
+        self.patient_summary = patient_summary
 
 
-def plot_internal_patient_debug(intervals: Intervals):
+def plot_internal_patient_debug(patient_summary: PatientSummary):
     raise PatientDebugError(
         "plot_internal_patient_debug is just here for debugging purposes and should not be called",
-        intervals)
+        patient_summary)
 
 
-def plot_mean_hfo_rate(intervals: Intervals):
-    inner_plot_mean_hfo_rate(intervals)
-    save_or_show_patient_plot("mean_hfo_rate", intervals)
+def plot_mean_hfo_rate(patient_summary: PatientSummary):
+    if len(patient_summary.intervals) == 0:
+        return
+    inner_plot_mean_hfo_rate(patient_summary.intervals)
+    save_or_show_patient_plot("mean_hfo_rate", patient_summary)
@@ -0,0 +1,72 @@
+import cProfile
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from brian2 import profiling_summary
+from snn_hfo_detection.telemetry import get_channel_scope
+
+# Directory the profiles of the current run are written to, or None if nothing should be profiled.
+# Like the active telemetry, threads only see it if they run in a copy of the context it was set in
+_PROFILE_PATH = ContextVar('profile_path', default=None)
+
+
+@contextmanager
+def record_profiles(profile_path):
+    '''
+    Writes the profiles of every stage run while the context is active into profile_path.
+    Does nothing if profile_path is None.
+    '''
+    token = _PROFILE_PATH.set(profile_path)
+    try:
+        yield
+    finally:
+        _PROFILE_PATH.reset(token)
+
+
+def should_profile():
+    return _PROFILE_PATH.get() is not None
+
+
+def _get_profile_directory(interval, channel):
+    if interval is None and channel is None:
+        scope = get_channel_scope()
+        if scope is not None:
+            interval, channel = scope.interval, scope.channel
+    directory = _PROFILE_PATH.get()
+    if interval is not None:
+        directory = os.path.join(directory, f'I{interval}')
+    if channel is not None:
+        directory = os.path.join(directory, f'C{channel}')
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+@contextmanager
+def profile_stage(name, interval=None, channel=None):
+    '''
+    Profiles the enclosed code with cProfile if profiles are being recorded and writes
+    the statistics to <profile_path>/I<interval>/C<channel>/<name>.pstats.
+    The interval and channel default to the ones of the current channel_scope.
+    '''
+    if not should_profile():
+        yield
+        return
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        profile.dump_stats(os.path.join(
+            _get_profile_directory(interval, channel), f'{name}.pstats'))
+
+
+def save_network_profiling_summary(network, name):
+    '''
+    Writes how long every object of a network that was run with profile=True took,
+    e.g. the hidden and output layers, the artifact filters and the synapses,
+    to <profile_path>/I<interval>/C<channel>/<name>.txt
+    '''
+    path = os.path.join(_get_profile_directory(None, None), f'{name}.txt')
+    with open(path, 'w') as file:
+        file.write(str(profiling_summary(network)))
@@ -1,16 +1,38 @@
+from typing import NamedTuple
 from brian2.units import second
 import numpy as np
 from snn_hfo_detection.stages.filter import filter_stage
 from snn_hfo_detection.stages.snn.stage import snn_stage
 from snn_hfo_detection.functions.hfo_detection import detect_hfo
-from snn_hfo_detection.user_facing_data import HfoDetection, HfoDetectionWithAnalytics, Analytics
+from snn_hfo_detection.user_facing_data import FilteredSpikes, HfoDetection, HfoDetectionWithAnalytics, Analytics
 from snn_hfo_detection.stages.persistence.saving import save_hfo_detection
+from snn_hfo_detection.telemetry import channel_scope, measure
+from snn_hfo_detection.profiling import profile_stage
 
 HFO_DETECTION_STEP_SIZE = 0.01
 HFO_DETECTION_WINDOW_SIZE = 0.05
 
 
-def _convert_inner_hfo_detection_to_user_facing_one(hfo_detection, filtered_spikes, spike_monitor_hidden):
+class SnnOutput(NamedTuple):
+    '''
+    Spikes recorded while simulating the SNN. Unlike the spike monitors,
+    these stay valid when the network is reused for the next channel.
+
+    Parameters
+    -------
+    output_spike_times : np.ndarray
+        times in seconds when the output layer spiked
+    hidden_spike_times : np.ndarray
+        times in seconds when a neuron of the hidden layer spiked
+    hidden_neuron_ids : np.ndarray
+        the IDs of the hidden neurons that fired at the time of hidden_spike_times
+    '''
+    output_spike_times: np.ndarray
+    hidden_spike_times: np.ndarray
+    hidden_neuron_ids: np.ndarray
+
+
+def _convert_inner_hfo_detection_to_user_facing_one(hfo_detection, filtered_spikes, snn_output):
     return HfoDetectionWithAnalytics(
         result=HfoDetection(
             total_amount=hfo_detection.result.total_amount,
@@ -20,31 +42,70 @@ def _convert_inner_hfo_detection_to_user_facing_one(hfo_detection, filtered_spik
             detections=hfo_detection.analytics.detections,
             periods=hfo_detection.analytics.periods,
             filtered_spikes=filtered_spikes,
-            spike_times=np.array(spike_monitor_hidden.t/second),
-            neuron_ids=np.array(spike_monitor_hidden.i),
+            spike_times=snn_output.hidden_spike_times,
+            neuron_ids=snn_output.hidden_neuron_ids,
         )
     )
 
 
-def run_all_hfo_detection_stages(metadata, channel_data, duration, configuration, snn_cache):
-    filtered_spikes = filter_stage(channel_data, configuration)
-    spike_monitors = snn_stage(
-        filtered_spikes=filtered_spikes,
-        duration=duration,
-        configuration=configuration,
-        cache=snn_cache)
-
-    hfo_detection = detect_hfo(duration=duration,
-                               spike_times=(
-                                   spike_monitors.output.t/second),
-                               signal_times=channel_data.signal_time,
-                               step_size=HFO_DETECTION_STEP_SIZE,
-                               window_size=HFO_DETECTION_WINDOW_SIZE)
-    user_facing_hfo_detection = _convert_inner_hfo_detection_to_user_facing_one(
-        hfo_detection, filtered_spikes, spike_monitors.hidden)
-
-    if not configuration.disable_saving:
-        save_hfo_detection(user_facing_hfo_detection=user_facing_hfo_detection,
-                           saving_path=configuration.saving_path,
-                           metadata=metadata)
+def run_filter_step(channel_data, configuration, filtered_signals=None, calibration_source=None) -> FilteredSpikes:
+    with profile_stage('filter'):
+        return filter_stage(channel_data, configuration,
+                            filtered_signals=filtered_signals, calibration_source=calibration_source)
+
+
+def run_snn_step(filtered_spikes, duration, configuration, snn_caches, metadata=None) -> SnnOutput:
+    with profile_stage('snn'):
+        spike_monitors = snn_stage(
+            filtered_spikes=filtered_spikes,
+            duration=duration,
+            configuration=configuration,
+            caches=snn_caches,
+            metadata=metadata)
+    return SnnOutput(
+        output_spike_times=np.array(spike_monitors.output.t/second),
+        hidden_spike_times=np.array(spike_monitors.hidden.t/second),
+        hidden_neuron_ids=np.array(spike_monitors.hidden.i))
+
+
+def run_detection_step(snn_output, filtered_spikes, duration, channel_data) -> HfoDetectionWithAnalytics:
+    with measure('detection'), profile_stage('detection'):
+        hfo_detection = detect_hfo(duration=duration,
+                                   spike_times=snn_output.output_spike_times,
+                                   signal_times=channel_data.time_base,
+                                   step_size=HFO_DETECTION_STEP_SIZE,
+                                   window_size=HFO_DETECTION_WINDOW_SIZE)
+    return _convert_inner_hfo_detection_to_user_facing_one(
+        hfo_detection, filtered_spikes, snn_output)
+
+
+def run_saving_step(user_facing_hfo_detection, metadata, configuration, fingerprint=None, writer=None):
+    if configuration.disable_saving:
+        return
+
+    def save():
+        # The writer saves on another thread, so the channel has to be named explicitly
+        with measure('saving', metadata), profile_stage('saving', metadata.interval, metadata.channel):
+            save_hfo_detection(user_facing_hfo_detection=user_facing_hfo_detection,
+                               saving_path=configuration.saving_path,
+                               metadata=metadata,
+                               saving_format=configuration.saving_format,
+                               fingerprint=fingerprint)
+    if writer is None:
+        save()
+    else:
+        writer.submit(save)
+
+
+def run_all_hfo_detection_stages(metadata, channel_data, duration, configuration, snn_caches,
+                                 filtered_signals=None, calibration_source=None, fingerprint=None, writer=None):
+    with channel_scope(metadata):
+        filtered_spikes = run_filter_step(
+            channel_data, configuration, filtered_signals=filtered_signals, calibration_source=calibration_source)
+        snn_output = run_snn_step(filtered_spikes, duration,
+                                  configuration, snn_caches, metadata=metadata)
+        user_facing_hfo_detection = run_detection_step(
+            snn_output, filtered_spikes, duration, channel_data)
+        run_saving_step(user_facing_hfo_detection, metadata,
+                        configuration, fingerprint=fingerprint, writer=writer)
     return user_facing_hfo_detection
@@ -1,18 +1,84 @@
-from typing import NamedTuple
+from typing import NamedTuple, Optional
 import numpy as np
 from snn_hfo_detection.stages.loading.patient_data import ChannelData
-from snn_hfo_detection.user_facing_data import Bandwidth, FilteredSpikes, MeasurementMode
-from snn_hfo_detection.functions.filter import butter_bandpass_filter
-from snn_hfo_detection.functions.signal_to_spike.utility import find_thresholds, get_sampling_frequency, SignalToSpikeParameters
+from snn_hfo_detection.user_facing_data import Bandwidth, Configuration, FilteredSpikes, MeasurementMode
+from snn_hfo_detection.functions.filter import butter_bandpass_filter_bank
+from snn_hfo_detection.functions.signal_to_spike.utility import find_thresholds, SignalToSpikeParameters
 from snn_hfo_detection.functions.signal_to_spike.selector import signal_to_spike, SignalToSpikeAlgorithm
+from snn_hfo_detection.stages.snn.advanced_artifact_filter import should_add_advanced_artifact_filter
+from snn_hfo_detection.stages.persistence.calibration import CalibrationKey, get_calibration_cache_path, load_threshold, save_threshold
+from snn_hfo_detection.stages.persistence.spike_cache import SpikeCache, SpikeCacheKey, get_spike_cache, hash_channel_data, load_spike_trains, save_spike_trains
+from snn_hfo_detection.telemetry import count_input_spikes, measure
+
+
+class _Band(NamedTuple):
+    name: str
+    lowcut: int
+    highcut: int
+    refractory_period: float
+
+
+_RIPPLE_BAND = _Band(name='ripple', lowcut=80,
+                     highcut=250, refractory_period=3e-4)
+_FAST_RIPPLE_BAND = _Band(name='fast_ripple', lowcut=250,
+                          highcut=500, refractory_period=3e-4)
+_ABOVE_FAST_RIPPLE_BAND = _Band(name='above_fast_ripple', lowcut=500,
+                                highcut=900, refractory_period=1e-3)
+_FILTER_ORDER = 2
+_INTERPOLATION_FACTOR = 35_000
+
+
+class FilteredSignals(NamedTuple):
+    '''
+    Bandpass filtered wideband signals. If some of these are None, it means
+    that the bandwidth is not needed in the specified MeasurementMode
+
+    Parameters
+    -------
+    ripple : Optional[np.ndarray]
+        signals in the ripple bandwidth (80-250 Hz)
+    fast_ripple : Optional[np.ndarray]
+        signals in the fast ripple bandwidth (250-500 Hz)
+    above_fast_ripple : Optional[np.ndarray]
+        signals above the fast ripple bandwidth (500-900 Hz)
+    '''
+    ripple: Optional[np.ndarray]
+    fast_ripple: Optional[np.ndarray]
+    above_fast_ripple: Optional[np.ndarray]
+
+
+class CalibrationSource(NamedTuple):
+    '''
+    Where the thresholds of a channel come from
+
+    Parameters
+    -------
+    pinned_channel_data : Optional[ChannelData]
+        calibration samples of the same channel in another interval whose
+        thresholds should be reused. None if the channel calibrates itself
+    file_hash : Optional[str]
+        content hash of the interval file the thresholds are calculated from.
+        None if thresholds should not be cached
+    channel : int
+        channel of the interval file, using 1 based indexing
+    '''
+    pinned_channel_data: Optional[ChannelData]
+    file_hash: Optional[str]
+    channel: int
 
 
 class _FilterParameters(NamedTuple):
     '''
     Parameters
     -------
+    band_name : str
+        name of the bandwidth, used for telemetry
     channel_data : ChannelData
         channel measurements
+    signal_times : np.ndarray
+        times of the channel's samples, shared by all bandwidths
+    signal: np.ndarray
+        the channel's wideband signal, already filtered to the bandwidth
     lowcut: int
         lowcut frequency
     highcut: int
@@ -25,52 +91,137 @@ class _FilterParameters(NamedTuple):
         time for the refractory period
     signal_to_spike_algorithm: SignalToSpikeAlgorithm
         the underlying algorithm
+    calibration_source: Optional[CalibrationSource]
+        where the thresholds come from. None if the channel calibrates itself without caching
+    calibration_cache_path: Optional[str]
+        directory of the calibration cache. None if thresholds should not be cached
+    spike_cache: Optional[SpikeCache]
+        cache of the resulting spike trains. None if spike trains should not be cached
+    channel_hash: Optional[str]
+        content hash of channel_data. None if spike trains should not be cached
     '''
+    band_name: str
     channel_data: ChannelData
+    signal_times: np.ndarray
+    signal: np.ndarray
     lowcut: int
     highcut: int
     scaling_factor: float
     calibration_time: float
     refractory_period: float
     signal_to_spike_algorithm: SignalToSpikeAlgorithm
+    calibration_source: Optional[CalibrationSource]
+    calibration_cache_path: Optional[str]
+    spike_cache: Optional[SpikeCache]
+    channel_hash: Optional[str]
 
 
-def _get_signal_times_in_calibration_time(signal, filter_parameters):
-    signal_times = zip(signal, filter_parameters.channel_data.signal_time)
-    signal_times_in_calibration = [(signal, time) for signal, time
-                                   in signal_times
-                                   if time <= filter_parameters.calibration_time]
-    signals = np.array([signal for signal, _ in signal_times_in_calibration])
-    times = np.array([time for _, time in signal_times_in_calibration])
-    return signals, times
+def _get_signal_times_in_calibration_time(signal, time_base, calibration_time):
+    calibration_time_base = time_base.truncate(calibration_time)
+    # Only the calibration samples get their times materialized
+    return signal[:calibration_time_base.sample_count], calibration_time_base.get_times()
 
 
-def _filter_signal_to_spike(filter_parameters: _FilterParameters) -> Bandwidth:
-    sampling_frequency = get_sampling_frequency(
-        filter_parameters.channel_data.signal_time)
-    signal = butter_bandpass_filter(data=filter_parameters.channel_data.wideband_signal,
-                                    lowcut=filter_parameters.lowcut,
-                                    highcut=filter_parameters.highcut,
-                                    sampling_frequency=sampling_frequency,
-                                    order=2)
-
-    calibration_signals, calibration_times = _get_signal_times_in_calibration_time(
-        signal, filter_parameters)
-    thresholds = np.ceil(find_thresholds(signals=calibration_signals,
-                                         times=calibration_times,
-                                         window_size=0.5,
-                                         sample_ratio=1/6,
-                                         scaling_factor=filter_parameters.scaling_factor))
+def _get_calibration_signal_times(filter_parameters):
+    calibration_source = filter_parameters.calibration_source
+    if calibration_source is None or calibration_source.pinned_channel_data is None:
+        return _get_signal_times_in_calibration_time(
+            filter_parameters.signal, filter_parameters.channel_data.time_base, filter_parameters.calibration_time)
+    # The filters are causal, so filtering only the calibration samples
+    # yields the same values as filtering the entire pinned channel
+    pinned_channel_data = calibration_source.pinned_channel_data
+    wideband_signal, signal_time = _get_signal_times_in_calibration_time(
+        pinned_channel_data.wideband_signal, pinned_channel_data.time_base, filter_parameters.calibration_time)
+    [[signal]] = butter_bandpass_filter_bank(data=np.atleast_2d(wideband_signal),
+                                             bands=[(filter_parameters.lowcut,
+                                                     filter_parameters.highcut)],
+                                             sampling_frequency=pinned_channel_data.time_base.sampling_frequency,
+                                             order=_FILTER_ORDER)
+    return signal, signal_time
+
+
+def _calculate_thresholds(filter_parameters):
+    calibration_signals, calibration_times = _get_calibration_signal_times(
+        filter_parameters)
+    return np.ceil(find_thresholds(signals=calibration_signals,
+                                   times=calibration_times,
+                                   window_size=0.5,
+                                   sample_ratio=1/6,
+                                   scaling_factor=filter_parameters.scaling_factor))
+
+
+def _get_calibration_key(filter_parameters):
+    calibration_source = filter_parameters.calibration_source
+    if filter_parameters.calibration_cache_path is None or calibration_source is None \
+            or calibration_source.file_hash is None:
+        return None
+    return CalibrationKey(
+        file_hash=calibration_source.file_hash,
+        channel=calibration_source.channel,
+        lowcut=filter_parameters.lowcut,
+        highcut=filter_parameters.highcut,
+        scaling_factor=filter_parameters.scaling_factor,
+        calibration_time=filter_parameters.calibration_time)
+
+
+def _find_thresholds(filter_parameters):
+    calibration_key = _get_calibration_key(filter_parameters)
+    if calibration_key is None:
+        return _calculate_thresholds(filter_parameters)
+    thresholds = load_threshold(
+        filter_parameters.calibration_cache_path, calibration_key)
+    if thresholds is None:
+        thresholds = _calculate_thresholds(filter_parameters)
+        save_threshold(filter_parameters.calibration_cache_path,
+                       calibration_key, thresholds)
+    return thresholds
+
+
+def _get_spike_cache_key(filter_parameters, thresholds):
+    return SpikeCacheKey(
+        channel_hash=filter_parameters.channel_hash,
+        sampling_frequency=filter_parameters.channel_data.time_base.sampling_frequency,
+        lowcut=filter_parameters.lowcut,
+        highcut=filter_parameters.highcut,
+        filter_order=_FILTER_ORDER,
+        threshold=float(thresholds),
+        refractory_period=filter_parameters.refractory_period,
+        interpolation_factor=_INTERPOLATION_FACTOR,
+        signal_to_spike_algorithm=filter_parameters.signal_to_spike_algorithm.name)
+
+
+def _convert_signal_to_spike(filter_parameters, thresholds):
     signal_to_spike_parameters = SignalToSpikeParameters(
-        signal=signal,
+        signal=filter_parameters.signal,
         threshold_up=thresholds,
         threshold_down=thresholds,
-        times=filter_parameters.channel_data.signal_time,
+        times=filter_parameters.signal_times,
         refractory_period=filter_parameters.refractory_period,
-        interpolation_factor=35_000
+        interpolation_factor=_INTERPOLATION_FACTOR
     )
-    spike_trains = signal_to_spike(parameters=signal_to_spike_parameters,
-                                   algorithm=filter_parameters.signal_to_spike_algorithm)
+    return signal_to_spike(parameters=signal_to_spike_parameters,
+                           algorithm=filter_parameters.signal_to_spike_algorithm)
+
+
+def _find_spike_trains(filter_parameters, thresholds):
+    if filter_parameters.spike_cache is None:
+        return _convert_signal_to_spike(filter_parameters, thresholds)
+    spike_cache_key = _get_spike_cache_key(filter_parameters, thresholds)
+    spike_trains = load_spike_trains(
+        filter_parameters.spike_cache, spike_cache_key)
+    if spike_trains is None:
+        spike_trains = _convert_signal_to_spike(filter_parameters, thresholds)
+        save_spike_trains(filter_parameters.spike_cache,
+                          spike_cache_key, spike_trains)
+    return spike_trains
+
+
+def _filter_signal_to_spike(filter_parameters: _FilterParameters) -> Bandwidth:
+    signal = filter_parameters.signal
+    with measure(f'filter.{filter_parameters.band_name}.calibration'):
+        thresholds = _find_thresholds(filter_parameters)
+    with measure(f'filter.{filter_parameters.band_name}.signal_to_spike'):
+        spike_trains = _find_spike_trains(filter_parameters, thresholds)
     return Bandwidth(
         signal=signal,
         spike_trains=spike_trains
@@ -106,37 +257,128 @@ def _get_scaling_factors(configuration):
     raise ValueError("Unknown measurement mode")
 
 
-def filter_stage(channel_data, configuration) -> FilteredSpikes:
-    scaling_factors = _get_scaling_factors(configuration)
-    ripple = _filter_signal_to_spike(_FilterParameters(
-        channel_data=channel_data,
-        lowcut=80,
-        highcut=250,
-        scaling_factor=scaling_factors.ripple,
-        calibration_time=configuration.calibration_time,
-        refractory_period=3e-4,
-        signal_to_spike_algorithm=configuration.signal_to_spike_algorithm,
-    ))
-    fast_ripple = _filter_signal_to_spike(_FilterParameters(
-        channel_data=channel_data,
-        lowcut=250,
-        highcut=500,
-        scaling_factor=scaling_factors.fast_ripple,
-        calibration_time=configuration.calibration_time,
-        refractory_period=3e-4,
-        signal_to_spike_algorithm=configuration.signal_to_spike_algorithm,
-    ))
-    above_fast_ripple = _filter_signal_to_spike(_FilterParameters(
-        channel_data=channel_data,
-        lowcut=500,
-        highcut=900,
-        scaling_factor=scaling_factors.above_fast_ripple,
+def _is_ripple_needed(configuration):
+    return configuration.measurement_mode is MeasurementMode.IEEG or configuration.measurement_mode is MeasurementMode.SCALP
+
+
+def _is_fast_ripple_needed(configuration):
+    return configuration.measurement_mode is MeasurementMode.IEEG or configuration.measurement_mode is MeasurementMode.ECOG
+
+
+def _is_above_fast_ripple_needed(configuration):
+    return should_add_advanced_artifact_filter(configuration)
+
+
+def _get_needed_bands(configuration):
+    return [
+        _RIPPLE_BAND if _is_ripple_needed(configuration) else None,
+        _FAST_RIPPLE_BAND if _is_fast_ripple_needed(configuration) else None,
+        _ABOVE_FAST_RIPPLE_BAND if _is_above_fast_ripple_needed(
+            configuration) else None,
+    ]
+
+
+def _filter_band(wideband_signals, band, sampling_frequency):
+    with measure(f'filter.{band.name}.bandpass'):
+        return butter_bandpass_filter_bank(
+            data=wideband_signals,
+            bands=[(band.lowcut, band.highcut)],
+            sampling_frequency=sampling_frequency,
+            order=_FILTER_ORDER)[0]
+
+
+def filter_wideband_signals(wideband_signals, time_base, configuration) -> FilteredSignals:
+    '''
+    Filters many channels at once into the bandwidths that the SNN
+    uses in the configured measurement mode. All others are None.
+
+    Parameters
+    -------
+    wideband_signals : np.ndarray
+        wideband signals, one channel per row
+    time_base : TimeBase
+        time base shared by all channels
+    configuration : Configuration
+        user configuration
+
+    Returns
+    -------
+    The filtered signals of every band, one channel per row.
+    Rows can be handed to filter_stage as views via get_channel_filtered_signals.
+    '''
+    wideband_signals = np.atleast_2d(wideband_signals)
+    sampling_frequency = time_base.sampling_frequency
+    return FilteredSignals(*(_filter_band(wideband_signals, band, sampling_frequency) if band is not None else None
+                             for band in _get_needed_bands(configuration)))
+
+
+def get_channel_filtered_signals(filtered_signals, row) -> FilteredSignals:
+    return FilteredSignals(*(signals[row] if signals is not None else None
+                             for signals in filtered_signals))
+
+
+class _BandContext(NamedTuple):
+    channel_data: ChannelData
+    signal_times: np.ndarray
+    configuration: Configuration
+    calibration_source: Optional[CalibrationSource]
+    calibration_cache_path: Optional[str]
+    spike_cache: Optional[SpikeCache]
+    channel_hash: Optional[str]
+
+
+def _filter_band_signal_to_spike(band_context, signal, band, scaling_factor):
+    if signal is None:
+        return None
+    configuration = band_context.configuration
+    return _filter_signal_to_spike(_FilterParameters(
+        band_name=band.name,
+        channel_data=band_context.channel_data,
+        signal_times=band_context.signal_times,
+        signal=signal,
+        lowcut=band.lowcut,
+        highcut=band.highcut,
+        scaling_factor=scaling_factor,
         calibration_time=configuration.calibration_time,
-        refractory_period=1e-3,
+        refractory_period=band.refractory_period,
         signal_to_spike_algorithm=configuration.signal_to_spike_algorithm,
+        calibration_source=band_context.calibration_source,
+        calibration_cache_path=band_context.calibration_cache_path,
+        spike_cache=band_context.spike_cache,
+        channel_hash=band_context.channel_hash,
     ))
 
-    return FilteredSpikes(
-        ripple=ripple,
-        fast_ripple=fast_ripple,
-        above_fast_ripple=above_fast_ripple)
+
+def filter_stage(channel_data, configuration, filtered_signals=None, calibration_source=None) -> FilteredSpikes:
+    '''
+    Filters and converts to spikes only the bandwidths that the SNN
+    uses in the configured measurement mode. All others are None.
+    If the channel was already filtered together with the others
+    of its interval, its filtered_signals are used instead.
+    The calibration_source decides where the thresholds come from,
+    by default they are calculated from the channel itself.
+    '''
+    if filtered_signals is None:
+        filtered_signals = get_channel_filtered_signals(filter_wideband_signals(
+            channel_data.wideband_signal, channel_data.time_base, configuration), 0)
+    spike_cache = get_spike_cache(configuration)
+    band_context = _BandContext(
+        channel_data=channel_data,
+        # The conversion walks over every sample, so all times are materialized once for all bandwidths
+        signal_times=channel_data.time_base.get_times(),
+        configuration=configuration,
+        calibration_source=calibration_source,
+        calibration_cache_path=get_calibration_cache_path(configuration),
+        spike_cache=spike_cache,
+        channel_hash=hash_channel_data(channel_data) if spike_cache is not None else None)
+    scaling_factors = _get_scaling_factors(configuration)
+    filtered_spikes = FilteredSpikes(
+        ripple=_filter_band_signal_to_spike(
+            band_context, filtered_signals.ripple, _RIPPLE_BAND, scaling_factors.ripple),
+        fast_ripple=_filter_band_signal_to_spike(
+            band_context, filtered_signals.fast_ripple, _FAST_RIPPLE_BAND, scaling_factors.fast_ripple),
+        above_fast_ripple=_filter_band_signal_to_spike(
+            band_context, filtered_signals.above_fast_ripple, _ABOVE_FAST_RIPPLE_BAND,
+            scaling_factors.above_fast_ripple))
+    count_input_spikes(filtered_spikes)
+    return filtered_spikes
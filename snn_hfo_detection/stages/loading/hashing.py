@@ -0,0 +1,23 @@
+import hashlib
+import os
+from functools import lru_cache
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+@lru_cache(maxsize=None)
+def _hash_file_version(path, _size, _modification_time):
+    file_hash = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(_CHUNK_SIZE), b''):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def hash_file(path) -> str:
+    '''
+    Returns the SHA-256 hash of the file's content as a hex string.
+    Every version of a file is only read once per process.
+    '''
+    stat = os.stat(path)
+    return _hash_file_version(os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
@@ -0,0 +1,217 @@
+import struct
+from enum import Enum
+from typing import NamedTuple, Optional
+import h5py
+import numpy as np
+import scipy.io as sio
+from scipy.io.matlab import matfile_version
+
+
+class MatFormat(Enum):
+    V4 = 'v4'
+    V5 = 'v5'
+    V73 = 'v7.3'
+
+
+def detect_mat_format(path) -> MatFormat:
+    '''
+    v5 also covers the v6 and v7 formats, which only differ in compression.
+    v7.3 files are HDF5 files with a MATLAB header
+    '''
+    major_version, _minor_version = matfile_version(path)
+    return {0: MatFormat.V4, 1: MatFormat.V5, 2: MatFormat.V73}[major_version]
+
+
+class HdfChannels:
+    '''
+    The channels matrix of a MAT v7.3 file. A channel is read from the file every time it is indexed
+    and not kept afterwards, so only the channels that are currently analyzed occupy memory.
+    '''
+
+    def __init__(self, file):
+        # MATLAB stores matrices column major, so the HDF5 dataset is transposed
+        self._file = file
+        self._dataset = file['channels']
+
+    def close(self):
+        '''
+        Closes the file. Channels that were already read stay valid, but no others can be read
+        '''
+        self._file.close()
+
+    @property
+    def shape(self):
+        return tuple(reversed(self._dataset.shape))
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return self._read_channel(range(len(self))[index])
+        channels = [range(len(self))[channel] for channel in index]
+        signals = np.empty((len(channels), self.shape[1]), dtype=self._dataset.dtype)
+        for row, channel in enumerate(channels):
+            signals[row] = self._read_channel(channel)
+        return signals
+
+    def _read_channel(self, channel):
+        return self._dataset[:, channel]
+
+
+def _decode_hdf_chars(dataset):
+    # Every column holds the UTF-16 codes of a row of the MATLAB char matrix
+    return np.array([''.join(chr(code) for code in row) for row in np.asarray(dataset).T])
+
+
+class MatVariables(NamedTuple):
+    '''
+    Parameters
+    -------
+    channels : Any
+        channels x samples matrix supporting len() and indexing by a channel or a list of channels.
+        Its rows are only read when they are used if the file allows it
+    times : np.array
+        times of the samples in seconds
+    channel_labels : np.array
+        name of every channel
+    '''
+    channels: object
+    times: np.array
+    channel_labels: np.array
+
+
+def _read_v73_variables(path):
+    file = h5py.File(path, 'r')
+    try:
+        return MatVariables(channels=HdfChannels(file),
+                            times=np.asarray(file['times']).ravel(),
+                            channel_labels=_decode_hdf_chars(file['channel_labels']))
+    except Exception:
+        file.close()
+        raise
+
+
+_MAT_HEADER_SIZE = 128
+_MI_MATRIX = 14
+_MI_COMPRESSED = 15
+# Data types of the elements storing matrix data, see the MAT-file format specification
+_STORAGE_DTYPES = {1: 'i1', 2: 'u1', 3: 'i2', 4: 'u2', 5: 'i4',
+                   6: 'u4', 7: 'f4', 9: 'f8', 12: 'i8', 13: 'u8'}
+# MATLAB classes of numeric matrices and the data types they are stored as without conversion
+_CLASS_STORAGE_TYPES = {6: 9, 7: 7, 8: 1, 9: 2, 10: 3,
+                        11: 4, 12: 5, 13: 6, 14: 12, 15: 13}
+_COMPLEX_FLAG = 0x0800
+
+
+class _Layout(NamedTuple):
+    offset: int
+    dtype: np.dtype
+    shape: tuple
+
+
+def _read_tag(file, byte_order):
+    '''
+    Reads the type and size of a data element and, for small data elements, their inline data
+    '''
+    data_type, byte_count = struct.unpack(f'{byte_order}II', file.read(8))
+    if data_type >> 16 != 0:
+        # Small data elements pack type, size and up to four bytes of data into eight bytes
+        return data_type & 0xFFFF, data_type >> 16, True
+    return data_type, byte_count, False
+
+
+def _get_padded_size(byte_count):
+    return byte_count + (-byte_count % 8)
+
+
+def _read_element_data(file, byte_order):
+    data_type, byte_count, is_small = _read_tag(file, byte_order)
+    if is_small:
+        file.seek(-4, 1)
+        data = file.read(4)[:byte_count]
+    else:
+        data = file.read(_get_padded_size(byte_count))[:byte_count]
+    return data_type, data
+
+
+def _find_uncompressed_matrix(path, name) -> Optional[_Layout]:
+    '''
+    Where the data of an uncompressed real numeric matrix is in a MAT v5 file.
+    None if there is no such matrix with the given name, e.g. because it is compressed.
+    '''
+    with open(path, 'rb') as file:
+        file.seek(0, 2)
+        file_size = file.tell()
+        file.seek(_MAT_HEADER_SIZE - 2)
+        byte_order = '<' if file.read(2) == b'IM' else '>'
+        position = _MAT_HEADER_SIZE
+        while position + 8 <= file_size:
+            file.seek(position)
+            data_type, byte_count, _is_small = _read_tag(file, byte_order)
+            next_position = position + 8 + (byte_count if data_type == _MI_COMPRESSED
+                                            else _get_padded_size(byte_count))
+            if data_type == _MI_MATRIX and byte_count != 0:
+                _flags_type, flags = _read_element_data(file, byte_order)
+                _dimensions_type, dimensions = _read_element_data(
+                    file, byte_order)
+                _name_type, variable_name = _read_element_data(
+                    file, byte_order)
+                if variable_name.decode('latin-1') == name:
+                    return _get_matrix_layout(file, byte_order, flags, dimensions)
+            position = next_position
+    return None
+
+
+def _get_matrix_layout(file, byte_order, flags, dimensions):
+    flags, = struct.unpack(f'{byte_order}I', flags[:4])
+    matlab_class = flags & 0xFF
+    shape = struct.unpack(f'{byte_order}{len(dimensions) // 4}i', dimensions)
+    storage_type = _CLASS_STORAGE_TYPES.get(matlab_class)
+    if storage_type is None or flags & _COMPLEX_FLAG or len(shape) != 2:
+        return None
+    data_type, byte_count, is_small = _read_tag(file, byte_order)
+    dtype = np.dtype(_STORAGE_DTYPES[storage_type]).newbyteorder(byte_order)
+    # MATLAB stores matrices in smaller types when their values fit, which would need a conversion.
+    # Foreign byte orders are converted as well, as the numba functions expect native arrays
+    if is_small or data_type != storage_type or byte_count != dtype.itemsize * np.prod(shape) \
+            or not dtype.isnative:
+        return None
+    return _Layout(offset=file.tell(), dtype=dtype, shape=shape)
+
+
+def _read_v5_channels(path):
+    layout = _find_uncompressed_matrix(path, 'channels')
+    if layout is None:
+        return sio.loadmat(path, variable_names=['channels'])['channels']
+    if 0 in layout.shape:
+        return np.zeros(layout.shape, dtype=layout.dtype)
+    return np.memmap(path, dtype=layout.dtype, mode='r', offset=layout.offset,
+                     shape=layout.shape, order='F')
+
+
+def read_mat_variables(path) -> MatVariables:
+    '''
+    Reads the variables of an interval file without loading the channels matrix into memory where possible.
+    MAT v7.3 files are read channel by channel through HDF5 and uncompressed MAT v5 files are memory mapped.
+    Other files are loaded as a whole.
+    '''
+    mat_format = detect_mat_format(path)
+    if mat_format == MatFormat.V73:
+        return _read_v73_variables(path)
+    variables = sio.loadmat(path, variable_names=['times', 'channel_labels'],
+                            chars_as_strings=True)
+    channels = _read_v5_channels(path) if mat_format == MatFormat.V5 else sio.loadmat(
+        path, variable_names=['channels'])['channels']
+    return MatVariables(channels=channels,
+                        times=variables['times'].ravel(),
+                        channel_labels=variables['channel_labels'])
+
+
+def read_channel_count(path) -> int:
+    if detect_mat_format(path) == MatFormat.V73:
+        with h5py.File(path, 'r') as file:
+            return len(HdfChannels(file))
+    _name, shape, _type = next(
+        variable for variable in sio.whosmat(path) if variable[0] == 'channels')
+    return shape[0]
@@ -1,16 +1,48 @@
-import scipy.io as sio
+import numpy as np
 from snn_hfo_detection.user_facing_data import PatientData, ChannelData
+from snn_hfo_detection.functions.time_base import describe_times
+from snn_hfo_detection.stages.loading.mat_file import read_channel_count, read_mat_variables
 
 
 def load_patient_data(full_intervals_path):
-    interval = sio.loadmat(full_intervals_path, chars_as_strings=True)
+    '''
+    Loads an interval file. Where the file format allows it, the signal of a channel
+    is only read once it is indexed, so unselected channels never occupy memory.
+    '''
+    interval = read_mat_variables(full_intervals_path)
     return PatientData(
-        wideband_signals=interval['channels'],
-        signal_time=interval['times'][0],
-        channel_labels=interval['channel_labels'])
+        wideband_signals=interval.channels,
+        time_base=describe_times(interval.times),
+        channel_labels=interval.channel_labels)
+
+
+def close_patient_data(patient_data):
+    '''
+    Closes the interval file that the wideband signals are read from, if it is still open.
+    Channels that were already indexed stay available
+    '''
+    close = getattr(patient_data.wideband_signals, 'close', None)
+    if close is not None:
+        close()
+
+
+def load_channel_count(full_intervals_path):
+    return read_channel_count(full_intervals_path)
+
+
+def as_read_only(array):
+    '''
+    A view of the array that cannot be written to, so it can be shared instead of copied
+    '''
+    view = np.asarray(array).view()
+    view.flags.writeable = False
+    return view
 
 
 def extract_channel_data(patient_data, channel):
+    '''
+    A read only view of a channel's signal along with the time base shared by all channels
+    '''
     return ChannelData(
-        wideband_signal=patient_data.wideband_signals[channel],
-        signal_time=patient_data.signal_time)
+        wideband_signal=as_read_only(patient_data.wideband_signals[channel]),
+        time_base=patient_data.time_base)
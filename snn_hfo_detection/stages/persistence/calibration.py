@@ -0,0 +1,77 @@
+import hashlib
+import json
+import os
+import tempfile
+from typing import NamedTuple, Optional
+
+_CALIBRATION_DIRECTORY = 'calibration'
+
+
+class CalibrationKey(NamedTuple):
+    '''
+    Everything that determines the threshold of a channel in a bandwidth
+
+    Parameters
+    -------
+    file_hash : str
+        content hash of the interval file the thresholds were calculated from
+    channel : int
+        channel of the interval file, using 1 based indexing
+    lowcut : int
+        lowcut frequency of the bandwidth
+    highcut : int
+        highcut frequency of the bandwidth
+    scaling_factor : float
+        scaling factor of the bandwidth
+    calibration_time : float
+        how many seconds of the signal were used for calibration
+    '''
+    file_hash: str
+    channel: int
+    lowcut: int
+    highcut: int
+    scaling_factor: float
+    calibration_time: float
+
+
+def get_calibration_cache_path(configuration) -> Optional[str]:
+    if not configuration.cache_calibration or configuration.saving_path is None:
+        return None
+    return os.path.join(configuration.saving_path, _CALIBRATION_DIRECTORY)
+
+
+def _get_calibration_path(cache_path, calibration_key):
+    serialized_key = json.dumps(calibration_key._asdict(), sort_keys=True)
+    filename = hashlib.sha256(serialized_key.encode()).hexdigest()
+    return os.path.join(cache_path, f'{filename}.json')
+
+
+def load_threshold(cache_path, calibration_key) -> Optional[float]:
+    filepath = _get_calibration_path(cache_path, calibration_key)
+    if not os.path.isfile(filepath):
+        return None
+    with open(filepath, 'r') as file:
+        calibration = json.load(file)
+    if CalibrationKey(**calibration['key']) != calibration_key:
+        return None
+    return calibration['threshold']
+
+
+def save_threshold(cache_path, calibration_key, threshold):
+    os.makedirs(cache_path, exist_ok=True)
+    calibration = {
+        'key': calibration_key._asdict(),
+        'threshold': float(threshold),
+    }
+    # Parallel jobs and shards may calibrate the same channel at the same time,
+    # so every file is written completely before it becomes visible
+    file_descriptor, temporary_path = tempfile.mkstemp(
+        dir=cache_path, suffix='.tmp')
+    try:
+        with os.fdopen(file_descriptor, 'w') as file:
+            json.dump(calibration, file)
+        os.replace(temporary_path, _get_calibration_path(
+            cache_path, calibration_key))
+    except BaseException:
+        os.remove(temporary_path)
+        raise
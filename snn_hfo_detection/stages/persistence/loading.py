@@ -1,14 +1,156 @@
 import json
+import re
 from os import path
+from typing import Optional
 from types import SimpleNamespace
-from snn_hfo_detection.user_facing_data import HfoDetectionWithAnalytics
-from snn_hfo_detection.stages.persistence.utility import get_persistence_path
+import numpy as np
+from snn_hfo_detection.user_facing_data import Detections
+from snn_hfo_detection.stages.persistence.utility import NUMPY_HEADER_FILENAME, get_persistence_path, get_numpy_persistence_path
 
+# json.dump keeps the field order of HfoDetectionWithAnalytics, so the small result comes first
+_JSON_RESULT_PREFIX = '{"result": '
+_JSON_RESULT_READ_SIZE = 4096
+# ...while the fingerprint comes last, so a file that was only partially written has none
+_JSON_FINGERPRINT_REGEX = re.compile(r'"fingerprint": "([0-9a-f]+)"}$')
+_JSON_FINGERPRINT_READ_SIZE = 256
 
-def load_hfo_detection(loading_path, metadata) -> HfoDetectionWithAnalytics:
-    filepath = get_persistence_path(loading_path, metadata)
-    if not path.isfile(filepath):
-        raise ValueError(
-            f'No HFO detection data was saved for interval {metadata.interval}, channel {metadata.channel}')
+
+class LoadedHfoDetection():
+    '''
+    An HFO detection loaded from disk. The result is read right away,
+    while the much bigger analytics are only loaded when they are first accessed.
+    '''
+
+    def __init__(self, result, load_analytics_cb):
+        self.result = result
+        self._load_analytics_cb = load_analytics_cb
+        self._analytics = None
+
+    @property
+    def analytics(self):
+        if self._analytics is None:
+            self._analytics = self._load_analytics_cb()
+        return self._analytics
+
+
+class _LazyNamespace():
+    '''
+    Like the SimpleNamespace returned for JSON, but every attribute
+    is only loaded from the header's arrays when it is first accessed
+    '''
+
+    def __init__(self, header, directory):
+        self._header = header
+        self._directory = directory
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name not in self._header:
+            raise AttributeError(name)
+        value = _convert_from_header(self._header[name], self._directory)
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return list(self._header)
+
+
+def _to_namespace(dictionary):
+    return SimpleNamespace(**dictionary)
+
+
+def _load_from_json(filepath):
     with open(filepath, 'r') as file:
-        return json.load(file, object_hook=lambda d: SimpleNamespace(**d))
+        return json.load(file, object_hook=_to_namespace)
+
+
+def _load_result_from_json(filepath):
+    with open(filepath, 'r') as file:
+        beginning = file.read(_JSON_RESULT_READ_SIZE)
+    if beginning.startswith(_JSON_RESULT_PREFIX):
+        try:
+            result, _end = json.JSONDecoder(object_hook=_to_namespace).raw_decode(
+                beginning, len(_JSON_RESULT_PREFIX))
+            return result
+        except json.JSONDecodeError:
+            pass
+    return _load_from_json(filepath).result
+
+
+def _convert_from_header(header, directory):
+    if isinstance(header, dict):
+        if set(header) == {'array'}:
+            return np.load(path.join(directory, header['array']), mmap_mode='r')
+        return _LazyNamespace(header, directory)
+    if isinstance(header, list):
+        return [_convert_from_header(item, directory) for item in header]
+    return header
+
+
+def _restore_detections(analytics):
+    detections = analytics.detections
+    if isinstance(detections, (list, np.ndarray)):
+        # Older versions saved one boolean per sample
+        analytics.detections = Detections.from_mask(detections)
+    else:
+        analytics.detections = Detections(sample_count=detections.sample_count,
+                                          start=np.asarray(
+                                              detections.start, dtype=np.int64),
+                                          stop=np.asarray(detections.stop, dtype=np.int64))
+    return analytics
+
+
+def _load_from_numpy(directory):
+    with open(path.join(directory, NUMPY_HEADER_FILENAME), 'r') as file:
+        header = json.load(file)
+    return LoadedHfoDetection(
+        result=_convert_from_header(header['result'], directory),
+        load_analytics_cb=lambda: _restore_detections(_convert_from_header(header['analytics'], directory)))
+
+
+def _load_lazily_from_json(filepath):
+    return LoadedHfoDetection(
+        result=_load_result_from_json(filepath),
+        load_analytics_cb=lambda: _restore_detections(_load_from_json(filepath).analytics))
+
+
+def load_hfo_detection(loading_path, metadata) -> LoadedHfoDetection:
+    '''
+    Loads an HFO detection saved in any PersistenceFormat.
+    Only the result is read right away, the analytics are loaded on first access.
+    '''
+    numpy_directory = get_numpy_persistence_path(loading_path, metadata)
+    if path.isfile(path.join(numpy_directory, NUMPY_HEADER_FILENAME)):
+        return _load_from_numpy(numpy_directory)
+    filepath = get_persistence_path(loading_path, metadata)
+    if path.isfile(filepath):
+        return _load_lazily_from_json(filepath)
+    raise ValueError(
+        f'No HFO detection data was saved for interval {metadata.interval}, channel {metadata.channel}')
+
+
+def _load_fingerprint_from_numpy(directory):
+    with open(path.join(directory, NUMPY_HEADER_FILENAME), 'r') as file:
+        return json.load(file).get('fingerprint')
+
+
+def _load_fingerprint_from_json(filepath):
+    with open(filepath, 'rb') as file:
+        file.seek(0, 2)
+        file.seek(max(file.tell() - _JSON_FINGERPRINT_READ_SIZE, 0))
+        ending = file.read().decode(errors='ignore')
+    match = _JSON_FINGERPRINT_REGEX.search(ending)
+    return match.group(1) if match is not None else None
+
+
+def load_fingerprint(loading_path, metadata) -> Optional[str]:
+    '''
+    Returns the fingerprint a saved HFO detection was saved with.
+    None if there is no HFO detection or it was saved without a fingerprint.
+    '''
+    numpy_directory = get_numpy_persistence_path(loading_path, metadata)
+    if path.isfile(path.join(numpy_directory, NUMPY_HEADER_FILENAME)):
+        return _load_fingerprint_from_numpy(numpy_directory)
+    filepath = get_persistence_path(loading_path, metadata)
+    if path.isfile(filepath):
+        return _load_fingerprint_from_json(filepath)
+    return None
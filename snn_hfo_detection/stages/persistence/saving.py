@@ -1,8 +1,10 @@
 import os
 import json
+import shutil
 from pathlib import Path
 import numpy as np
-from snn_hfo_detection.stages.persistence.utility import get_persistence_path
+from snn_hfo_detection.user_facing_data import Detections, PersistenceFormat
+from snn_hfo_detection.stages.persistence.utility import NUMPY_HEADER_FILENAME, get_persistence_path, get_numpy_persistence_path
 
 
 def _create_parent_directory(path):
@@ -19,6 +21,13 @@ def _is_namedtuple(obj) -> bool:
     )
 
 
+def _convert_detections(detections):
+    # Saved as its runs, which loading turns back into Detections
+    return {'sample_count': detections.sample_count,
+            'start': detections.start,
+            'stop': detections.stop}
+
+
 def _is_list(obj) -> bool:
     return (
         hasattr(obj, '__iter__') and
@@ -39,6 +48,8 @@ def _is_np_int(obj) -> bool:
 
 
 def _convert_to_dict(object):
+    if isinstance(object, Detections):
+        return _convert_to_dict(_convert_detections(object))
     if _is_namedtuple(object):
         return _convert_to_dict(object._asdict())
     if _is_list(object):
@@ -56,9 +67,73 @@ def _convert_to_dict(object):
     return object
 
 
-def save_hfo_detection(user_facing_hfo_detection, saving_path, metadata):
+def _remove_saved_hfo_detection(saving_path, metadata):
+    # Loading prefers the NUMPY format, so results of older runs in another format must go
+    filepath = get_persistence_path(saving_path, metadata)
+    if os.path.isfile(filepath):
+        os.remove(filepath)
+    directory = get_numpy_persistence_path(saving_path, metadata)
+    if os.path.isdir(directory):
+        shutil.rmtree(directory)
+
+
+def _save_as_json(user_facing_hfo_detection, saving_path, metadata, fingerprint):
     filepath = get_persistence_path(saving_path, metadata)
     _create_parent_directory(filepath)
     dictionary = _convert_to_dict(user_facing_hfo_detection)
+    if fingerprint is not None:
+        dictionary['fingerprint'] = fingerprint
     with open(filepath, 'w') as file:
         json.dump(dictionary, file)
+
+
+def _convert_to_header(value, name, directory):
+    '''
+    Converts the object to a JSON serializable tree in which every array
+    is replaced by a reference to the .npy file it was saved to
+    '''
+    if isinstance(value, Detections):
+        return _convert_to_header(_convert_detections(value), name, directory)
+    if _is_namedtuple(value):
+        return _convert_to_header(value._asdict(), name, directory)
+    if _is_dict(value):
+        return {key: _convert_to_header(item, f'{name}.{key}' if name else key, directory)
+                for key, item in value.items()}
+    if value is None:
+        return None
+    if _is_list(value):
+        array = np.asarray(value)
+        if array.dtype == np.object_:
+            return [_convert_to_header(item, f'{name}.{index}', directory)
+                    for index, item in enumerate(value)]
+        filename = f'{name}.npy'
+        np.save(os.path.join(directory, filename), array)
+        return {'array': filename}
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _save_as_numpy(user_facing_hfo_detection, saving_path, metadata, fingerprint):
+    directory = get_numpy_persistence_path(saving_path, metadata)
+    os.makedirs(directory)
+    header = _convert_to_header(user_facing_hfo_detection, '', directory)
+    if fingerprint is not None:
+        header['fingerprint'] = fingerprint
+    # The header is written last, so a directory without one is incomplete
+    with open(os.path.join(directory, NUMPY_HEADER_FILENAME), 'w') as file:
+        json.dump(header, file)
+
+
+def save_hfo_detection(user_facing_hfo_detection, saving_path, metadata, saving_format=PersistenceFormat.JSON, fingerprint=None):
+    '''
+    Saves the HFO detection of a channel. The optional fingerprint
+    identifies the inputs and settings the HFO detection was created with.
+    '''
+    _remove_saved_hfo_detection(saving_path, metadata)
+    if saving_format is PersistenceFormat.JSON:
+        _save_as_json(user_facing_hfo_detection, saving_path, metadata, fingerprint)
+    elif saving_format is PersistenceFormat.NUMPY:
+        _save_as_numpy(user_facing_hfo_detection, saving_path, metadata, fingerprint)
+    else:
+        raise ValueError(f'Unknown persistence format: {saving_format}')
@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+import tempfile
+from typing import NamedTuple, Optional
+import numpy as np
+from snn_hfo_detection.functions.signal_to_spike.utility import SpikeTrains
+from snn_hfo_detection.functions.time_base import SampledTimes
+
+_MEGABYTE = 1024 * 1024
+_CACHE_FILE_EXTENSION = '.npz'
+
+
+class SpikeCache(NamedTuple):
+    '''
+    On disk cache of the spike trains produced by the filter stage
+
+    Parameters
+    -------
+    path : str
+        directory of the cache. Can be shared by any number of runs
+    max_size : float
+        maximum size of the cache in megabytes. The least recently used spike trains are evicted first
+    '''
+    path: str
+    max_size: float
+
+
+class SpikeCacheKey(NamedTuple):
+    '''
+    Everything that determines the spike trains of a channel in a bandwidth
+
+    Parameters
+    -------
+    channel_hash : str
+        content hash of the channel's wideband signal and time vector, see hash_channel_data
+    sampling_frequency : float
+        sampling frequency of the wideband signal
+    lowcut : int
+        lowcut frequency of the bandwidth
+    highcut : int
+        highcut frequency of the bandwidth
+    filter_order : int
+        order of the bandpass filter
+    threshold : float
+        threshold used for both directions
+    refractory_period : float
+        time for the refractory period
+    interpolation_factor : float
+        upsampling factor of the signal to spike conversion
+    signal_to_spike_algorithm : str
+        name of the SignalToSpikeAlgorithm
+    '''
+    channel_hash: str
+    sampling_frequency: float
+    lowcut: int
+    highcut: int
+    filter_order: int
+    threshold: float
+    refractory_period: float
+    interpolation_factor: float
+    signal_to_spike_algorithm: str
+
+
+def get_spike_cache(configuration) -> Optional[SpikeCache]:
+    if configuration.spike_cache_path is None:
+        return None
+    return SpikeCache(path=configuration.spike_cache_path, max_size=configuration.spike_cache_size)
+
+
+def hash_channel_data(channel_data) -> str:
+    channel_hash = hashlib.sha256()
+    array = np.ascontiguousarray(channel_data.wideband_signal)
+    channel_hash.update(f'{array.dtype.str}{array.shape}'.encode())
+    channel_hash.update(memoryview(array).cast('B'))
+    time_base = channel_data.time_base
+    if isinstance(time_base, SampledTimes):
+        channel_hash.update(memoryview(np.ascontiguousarray(time_base.times)).cast('B'))
+    else:
+        channel_hash.update(repr(tuple(time_base)).encode())
+    return channel_hash.hexdigest()
+
+
+def _get_cache_file_path(spike_cache, spike_cache_key):
+    serialized_key = json.dumps(spike_cache_key._asdict(), sort_keys=True)
+    filename = hashlib.sha256(serialized_key.encode()).hexdigest()
+    return os.path.join(spike_cache.path, f'{filename}{_CACHE_FILE_EXTENSION}')
+
+
+def load_spike_trains(spike_cache, spike_cache_key) -> Optional[SpikeTrains]:
+    filepath = _get_cache_file_path(spike_cache, spike_cache_key)
+    try:
+        with np.load(filepath) as cached:
+            spike_trains = SpikeTrains(up=cached['up'], down=cached['down'])
+        # The modification time doubles as the time of last use for the eviction
+        os.utime(filepath)
+    except (FileNotFoundError, ValueError, KeyError, OSError):
+        return None
+    return spike_trains
+
+
+def _evict_least_recently_used(spike_cache):
+    entries = []
+    for filename in os.listdir(spike_cache.path):
+        if not filename.endswith(_CACHE_FILE_EXTENSION):
+            continue
+        try:
+            stat = os.stat(os.path.join(spike_cache.path, filename))
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime_ns, stat.st_size, filename))
+    total_size = sum(size for _mtime, size, _filename in entries)
+    max_size = spike_cache.max_size * _MEGABYTE
+    for _mtime, size, filename in sorted(entries):
+        if total_size <= max_size:
+            break
+        try:
+            os.remove(os.path.join(spike_cache.path, filename))
+        except FileNotFoundError:
+            pass
+        total_size -= size
+
+
+def save_spike_trains(spike_cache, spike_cache_key, spike_trains):
+    os.makedirs(spike_cache.path, exist_ok=True)
+    # Other runs may use the same cache at the same time,
+    # so every file is written completely before it becomes visible
+    file_descriptor, temporary_path = tempfile.mkstemp(
+        dir=spike_cache.path, suffix='.tmp')
+    try:
+        with os.fdopen(file_descriptor, 'wb') as file:
+            np.savez(file,
+                     up=np.asarray(spike_trains.up, dtype=np.float64),
+                     down=np.asarray(spike_trains.down, dtype=np.float64))
+        os.replace(temporary_path, _get_cache_file_path(
+            spike_cache, spike_cache_key))
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+    _evict_least_recently_used(spike_cache)
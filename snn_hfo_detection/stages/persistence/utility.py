@@ -1,9 +1,21 @@
 import os
 
+NUMPY_HEADER_FILENAME = 'header.json'
+
+
+def _get_interval_directory(path, metadata):
+    return os.path.join(path, f'I{metadata.interval}')
+
 
 def get_persistence_path(saving_path, metadata) -> str:
-    parent_directory = os.path.join(saving_path,
-                                    f'I{metadata.interval}')
+    parent_directory = _get_interval_directory(saving_path, metadata)
     filename = f'C{metadata.channel}.json'
 
     return os.path.join(parent_directory, filename)
+
+
+def get_numpy_persistence_path(saving_path, metadata) -> str:
+    '''
+    Directory containing the header and arrays of a channel saved with PersistenceFormat.NUMPY
+    '''
+    return os.path.join(_get_interval_directory(saving_path, metadata), f'C{metadata.channel}')
@@ -0,0 +1,82 @@
+import contextvars
+import threading
+from queue import Queue
+from typing import Callable, Optional
+
+_MAX_PENDING_WRITES = 4
+_STOP = None
+
+
+class BackgroundWriter():
+    '''
+    Runs write callbacks one after another on a background thread, so that
+    saving a channel overlaps with analyzing the next one.
+    At most max_pending_writes callbacks wait at once, further submissions block.
+    Errors of a callback are raised in the submitting thread on the next
+    call to submit, flush or close. After closing, callbacks run right away.
+    Callbacks run in a copy of the context they were submitted from.
+    '''
+
+    def __init__(self, max_pending_writes=_MAX_PENDING_WRITES):
+        self._queue: Queue = Queue(maxsize=max_pending_writes)
+        self._error: Optional[BaseException] = None
+        self._is_closed = False
+        self._thread = threading.Thread(
+            target=self._write_until_stopped, name='background-writer', daemon=True)
+        self._thread.start()
+
+    def _write_until_stopped(self):
+        while True:
+            write_cb = self._queue.get()
+            try:
+                if write_cb is _STOP:
+                    return
+                write_cb()
+            except BaseException as error:
+                # Only the first error is reported, the ones after are most likely caused by it
+                if self._error is None:
+                    self._error = error
+            finally:
+                self._queue.task_done()
+
+    def _raise_error(self):
+        if self._error is not None:
+            error = self._error
+            self._error = None
+            raise error
+
+    def submit(self, write_cb: Callable[[], None]):
+        self._raise_error()
+        if self._is_closed:
+            write_cb()
+            return
+        context = contextvars.copy_context()
+        self._queue.put(lambda: context.run(write_cb))
+
+    def flush(self):
+        '''
+        Waits until all submitted callbacks ran
+        '''
+        if not self._is_closed:
+            self._queue.join()
+        self._raise_error()
+
+    def close(self):
+        if not self._is_closed:
+            self._is_closed = True
+            self._queue.put(_STOP)
+            self._thread.join()
+        self._raise_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, _exception, _traceback):
+        if exception_type is None:
+            self.close()
+            return
+        # Don't hide the original exception behind a write error
+        try:
+            self.close()
+        except BaseException:
+            pass
@@ -1,5 +1,6 @@
-from typing import NamedTuple, Optional
-from brian2 import Network, SpikeMonitor
+from typing import Dict, NamedTuple, Optional
+import numpy as np
+from brian2 import Network, SpikeMonitor, seed
 from brian2.units import amp
 from brian2.input.spikegeneratorgroup import SpikeGeneratorGroup
 from snn_hfo_detection.stages.snn.model_paths import ModelPaths, load_model_paths
@@ -9,6 +10,7 @@ from snn_hfo_detection.user_facing_data import MeasurementMode
 from snn_hfo_detection.stages.snn.artifact_filter import add_artifact_filter_to_network, should_add_artifact_filter
 from snn_hfo_detection.stages.snn.advanced_artifact_filter import should_add_advanced_artifact_filter, add_advanced_artifact_filter_to_network
 from snn_hfo_detection.functions.dynapse_biases import get_current
+from snn_hfo_detection.telemetry import measure
 
 
 class SpikeMonitors(NamedTuple):
@@ -25,6 +27,19 @@ class Cache(NamedTuple):
     advanced_artifact_filter_input_layer: Optional[SpikeGeneratorGroup]
 
 
+class CacheKey(NamedTuple):
+    '''
+    The parts of the configuration that shape the SNN.
+    Runs with the same key can share a network.
+    '''
+    measurement_mode: MeasurementMode
+    hidden_neuron_count: int
+    seed: Optional[int]
+
+
+Caches = Dict[CacheKey, Cache]
+
+
 def _read_neuron_counts(configuration):
     input_count = _measurement_mode_to_input_count(
         configuration.measurement_mode)
@@ -46,7 +61,26 @@ def _get_layers_connected_to_output_count(configuration):
     return 1 + int(should_add_artifact_filter(configuration)) + int(should_add_advanced_artifact_filter(configuration))
 
 
+def _seed_random_number_generators(configuration):
+    if configuration.seed is None:
+        return
+    seed(configuration.seed)
+
+
+def seed_channel(configuration, metadata):
+    '''
+    Reseeds the random number generators before a channel is simulated, so random inputs like the
+    Poisson group of the artifact filter do not depend on which channels a process simulated before
+    '''
+    if configuration.seed is None or metadata is None:
+        return
+    seed_sequence = np.random.SeedSequence(
+        [configuration.seed, metadata.interval, metadata.channel])
+    seed(int(seed_sequence.generate_state(1)[0]))
+
+
 def create_cache(configuration):
+    _seed_random_number_generators(configuration)
     model_paths = load_model_paths()
     neuron_counts = _read_neuron_counts(configuration)
     hidden_layer = create_non_input_layer(
@@ -98,3 +132,18 @@ def create_cache(configuration):
         input_layer=input_layer,
         advanced_artifact_filter_input_layer=advanced_artifact_filter_input_layer,
     )
+
+
+def get_cache_key(configuration) -> CacheKey:
+    return CacheKey(
+        measurement_mode=configuration.measurement_mode,
+        hidden_neuron_count=configuration.hidden_neuron_count,
+        seed=configuration.seed)
+
+
+def get_or_create_cache(caches: Caches, configuration) -> Cache:
+    key = get_cache_key(configuration)
+    if key not in caches:
+        with measure('snn.build'):
+            caches[key] = create_cache(configuration)
+    return caches[key]
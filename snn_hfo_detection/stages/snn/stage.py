@@ -1,22 +1,28 @@
 import warnings
 from brian2.units import second
-from snn_hfo_detection.stages.snn.cache import Cache, SpikeMonitors, create_cache
+from snn_hfo_detection.stages.snn.cache import Caches, SpikeMonitors, get_or_create_cache, seed_channel
 from snn_hfo_detection.stages.snn.set_input import set_input_spikes, set_advanced_artifact_filter_input_spikes
+from snn_hfo_detection.telemetry import measure
+from snn_hfo_detection.profiling import save_network_profiling_summary, should_profile
 
 
-def snn_stage(filtered_spikes, duration, configuration, cache: Cache) -> SpikeMonitors:
+def snn_stage(filtered_spikes, duration, configuration, caches: Caches, metadata=None) -> SpikeMonitors:
     warnings.simplefilter("ignore", DeprecationWarning)
-    if cache is None:
-        cache = create_cache(configuration)
+    cache = get_or_create_cache(caches, configuration)
 
-    cache.network.restore()
+    with measure('snn.restore'):
+        cache.network.restore()
 
-    set_input_spikes(filtered_spikes, cache.input_layer,
-                     configuration.measurement_mode)
-    if cache.advanced_artifact_filter_input_layer is not None:
-        set_advanced_artifact_filter_input_spikes(
-            filtered_spikes, cache.advanced_artifact_filter_input_layer)
+        set_input_spikes(filtered_spikes, cache.input_layer,
+                         configuration.measurement_mode)
+        if cache.advanced_artifact_filter_input_layer is not None:
+            set_advanced_artifact_filter_input_spikes(
+                filtered_spikes, cache.advanced_artifact_filter_input_layer)
 
-    cache.network.run(duration * second)
+    seed_channel(configuration, metadata)
+    with measure('snn.run'):
+        cache.network.run(duration * second, profile=should_profile())
+    if should_profile():
+        save_network_profiling_summary(cache.network, 'snn_network')
 
     return cache.spike_monitors
@@ -1,12 +1,11 @@
-import random
 import numpy as np
 from snn_hfo_detection.stages.snn.concatenation import concatenate_excitatory_and_inhibitory_with_generator_function
 POSSIBLE_ABSOLUTE_WEIGHTS = [1000, 2000]
 
 
 def _generate_weights(hidden_neuron_count):
-    excitatory_weights = np.array(random.choices(POSSIBLE_ABSOLUTE_WEIGHTS,
-                                                 k=int(hidden_neuron_count)))
+    excitatory_weights = np.random.choice(POSSIBLE_ABSOLUTE_WEIGHTS,
+                                          size=int(hidden_neuron_count))
     inhibitory_weights = excitatory_weights * -1
     return excitatory_weights, inhibitory_weights
 
@@ -0,0 +1,305 @@
+import argparse
+import json
+import os
+from typing import List, NamedTuple
+import numpy as np
+import scipy.io as sio
+from snn_hfo_detection.user_facing_data import PatientData, TimeBase
+
+
+class SyntheticRecordingSettings(NamedTuple):
+    '''
+    Parameters
+    -------
+    channel_count : int
+        amount of channels
+    duration : float
+        length of the recording in seconds
+    sampling_frequency : float
+        samples per second
+    noise_amplitude : float
+        standard deviation of the pink noise background
+    ripple_rate : float
+        expected ripples per second in every channel
+    fast_ripple_rate : float
+        expected fast ripples per second in every channel
+    ripple_amplitude : float
+        peak amplitude of the ripples
+    fast_ripple_amplitude : float
+        peak amplitude of the fast ripples
+    artifact_rate : float
+        expected artifacts per second. Artifacts appear in all channels at the same time
+    artifact_amplitude : float
+        peak amplitude of the artifacts
+    seed : int
+        seed of the random number generator, so the same settings always produce the same recording
+    '''
+    channel_count: int = 4
+    duration: float = 60.0
+    sampling_frequency: float = 2_000.0
+    noise_amplitude: float = 10.0
+    ripple_rate: float = 0.2
+    fast_ripple_rate: float = 0.1
+    ripple_amplitude: float = 40.0
+    fast_ripple_amplitude: float = 25.0
+    artifact_rate: float = 0.02
+    artifact_amplitude: float = 500.0
+    seed: int = 0
+
+
+class SyntheticEvent(NamedTuple):
+    '''
+    An event that was injected into a synthetic recording
+
+    Parameters
+    -------
+    channel : int
+        channel of the event, using 1 based indexing
+    kind : str
+        one of "ripple", "fast_ripple" or "artifact"
+    start : float
+        time in seconds when the event starts
+    stop : float
+        time in seconds when the event stops
+    frequency : float
+        oscillation frequency of ripples and fast ripples, 0 for artifacts
+    '''
+    channel: int
+    kind: str
+    start: float
+    stop: float
+    frequency: float
+
+
+class _Burst(NamedTuple):
+    kind: str
+    lowcut: float
+    highcut: float
+    rate: float
+    amplitude: float
+
+
+# An HFO consists of at least four oscillations standing out of the background
+_MIN_CYCLES = 4
+_MAX_CYCLES = 10
+_ARTIFACT_DURATION = 0.02
+_ARTIFACT_TIME_CONSTANT = 0.003
+# Ground truth events of a channel never overlap
+_MIN_EVENT_GAP = 0.1
+_HFO_KINDS = ('ripple', 'fast_ripple')
+
+
+def generate_pink_noise(sample_count, amplitude, random_generator):
+    '''
+    Generates noise with a power spectral density proportional to 1/f,
+    like the background activity of EEG recordings
+    '''
+    spectrum = np.fft.rfft(random_generator.normal(size=sample_count))
+    frequencies = np.arange(len(spectrum), dtype=float)
+    frequencies[0] = 1
+    noise = np.fft.irfft(spectrum / np.sqrt(frequencies), n=sample_count)
+    standard_deviation = np.std(noise)
+    if standard_deviation == 0:
+        return noise
+    return noise / standard_deviation * amplitude
+
+
+def _get_bursts(settings):
+    return [_Burst('ripple', 80, 250, settings.ripple_rate, settings.ripple_amplitude),
+            _Burst('fast_ripple', 250, 500, settings.fast_ripple_rate, settings.fast_ripple_amplitude)]
+
+
+def _generate_event_starts(rate, duration, event_duration, random_generator):
+    event_count = random_generator.poisson(rate * duration)
+    latest_start = duration - event_duration
+    if latest_start <= 0:
+        return np.array([])
+    return np.sort(random_generator.uniform(0, latest_start, size=event_count))
+
+
+def _overlaps(events, start, stop):
+    return any(start < event.stop + _MIN_EVENT_GAP and event.start - _MIN_EVENT_GAP < stop
+               for event in events)
+
+
+def _add_burst(signal, burst, start, random_generator, settings, channel, events):
+    # Bursts above the Nyquist frequency cannot be represented
+    highcut = min(burst.highcut, settings.sampling_frequency / 2.5)
+    if highcut <= burst.lowcut:
+        return
+    frequency = random_generator.uniform(burst.lowcut, highcut)
+    cycles = random_generator.integers(_MIN_CYCLES, _MAX_CYCLES + 1)
+    stop = start + cycles / frequency
+    if _overlaps(events, start, stop):
+        return
+    first_sample = int(np.ceil(start * settings.sampling_frequency))
+    last_sample = int(stop * settings.sampling_frequency)
+    time = np.arange(first_sample, last_sample + 1) / \
+        settings.sampling_frequency - start
+    envelope = np.sin(np.pi * time / (stop - start)) ** 2
+    signal[first_sample:last_sample + 1] += burst.amplitude * envelope * \
+        np.sin(2 * np.pi * frequency * time)
+    events.append(SyntheticEvent(channel=channel, kind=burst.kind,
+                                 start=float(start), stop=float(stop), frequency=float(frequency)))
+
+
+def _generate_artifact(settings):
+    sample_count = max(1, int(_ARTIFACT_DURATION * settings.sampling_frequency))
+    time = np.arange(sample_count) / settings.sampling_frequency
+    return settings.artifact_amplitude * np.exp(-time / _ARTIFACT_TIME_CONSTANT)
+
+
+def generate_recording(settings: SyntheticRecordingSettings):
+    '''
+    Generates channels of pink noise with ripples, fast ripples and artifacts injected at random times.
+    Returns the recording as PatientData along with the injected events, sorted by channel and time.
+    '''
+    random_generator = np.random.default_rng(settings.seed)
+    sample_count = int(settings.duration * settings.sampling_frequency)
+    time_base = TimeBase(start=0.0, sampling_frequency=float(settings.sampling_frequency),
+                         sample_count=sample_count)
+    wideband_signals = np.empty((settings.channel_count, sample_count))
+    events_per_channel: List[List[SyntheticEvent]] = []
+    for channel_index in range(settings.channel_count):
+        wideband_signals[channel_index] = generate_pink_noise(
+            sample_count, settings.noise_amplitude, random_generator)
+        events = []
+        for burst in _get_bursts(settings):
+            for start in _generate_event_starts(burst.rate, settings.duration, _MAX_CYCLES / burst.lowcut, random_generator):
+                _add_burst(wideband_signals[channel_index], burst, start,
+                           random_generator, settings, channel_index + 1, events)
+        events_per_channel.append(events)
+
+    artifact = _generate_artifact(settings)
+    artifact_duration = len(artifact) / settings.sampling_frequency
+    for start in _generate_event_starts(settings.artifact_rate, settings.duration, artifact_duration, random_generator):
+        first_sample = int(np.ceil(start * settings.sampling_frequency))
+        polarity = random_generator.choice([-1, 1])
+        for channel_index in range(settings.channel_count):
+            # Artifacts reach every channel, but not equally strong
+            scale = polarity * random_generator.uniform(0.5, 1)
+            sample_count_in_recording = min(
+                len(artifact), sample_count - first_sample)
+            wideband_signals[channel_index, first_sample:first_sample + sample_count_in_recording] += \
+                scale * artifact[:sample_count_in_recording]
+            events_per_channel[channel_index].append(SyntheticEvent(
+                channel=channel_index + 1, kind='artifact',
+                start=float(first_sample / settings.sampling_frequency),
+                stop=float(first_sample / settings.sampling_frequency + artifact_duration),
+                frequency=0.0))
+
+    events = sorted((event for events in events_per_channel for event in events),
+                    key=lambda event: (event.channel, event.start))
+    return PatientData(
+        wideband_signals=wideband_signals,
+        time_base=time_base,
+        channel_labels=np.array([f'SYN{channel}' for channel in range(1, settings.channel_count + 1)])), events
+
+
+def get_truth_path(interval_path):
+    '''
+    Path of the ground truth sidecar of an interval file, e.g. I1.truth.json for I1.mat
+    '''
+    return f'{os.path.splitext(interval_path)[0]}.truth.json'
+
+
+def write_interval(directory, interval, settings: SyntheticRecordingSettings):
+    '''
+    Writes a synthetic recording as I<interval>.mat in the format load_patient_data expects
+    and its ground truth as I<interval>.truth.json
+    '''
+    os.makedirs(directory, exist_ok=True)
+    patient_data, events = generate_recording(settings)
+    interval_path = os.path.join(directory, f'I{interval}.mat')
+    sio.savemat(interval_path, {
+        'channels': patient_data.wideband_signals,
+        'times': patient_data.signal_time,
+        'channel_labels': patient_data.channel_labels,
+    })
+    with open(get_truth_path(interval_path), 'w') as file:
+        json.dump({
+            'settings': settings._asdict(),
+            'events': [event._asdict() for event in events],
+        }, file, indent=4)
+    return interval_path
+
+
+def load_truth(interval_path) -> List[SyntheticEvent]:
+    with open(get_truth_path(interval_path), 'r') as file:
+        return [SyntheticEvent(**event) for event in json.load(file)['events']]
+
+
+def generate_dataset(directory, interval_count, settings: SyntheticRecordingSettings):
+    '''
+    Writes interval_count intervals, each with its own seed derived from settings.seed
+    '''
+    return [write_interval(directory, interval, settings._replace(seed=settings.seed + interval))
+            for interval in range(1, interval_count + 1)]
+
+
+class DetectionScore(NamedTuple):
+    '''
+    Parameters
+    -------
+    true_positives : int
+        injected HFOs that overlap a detected period
+    false_negatives : int
+        injected HFOs that overlap no detected period
+    false_positives : int
+        detected periods that overlap no injected HFO
+    '''
+    true_positives: int
+    false_negatives: int
+    false_positives: int
+
+    @property
+    def precision(self) -> float:
+        detected_count = self.true_positives + self.false_positives
+        return self.true_positives / detected_count if detected_count != 0 else 1.0
+
+    @property
+    def recall(self) -> float:
+        injected_count = self.true_positives + self.false_negatives
+        return self.true_positives / injected_count if injected_count != 0 else 1.0
+
+
+def score_detection(events: List[SyntheticEvent], channel, periods, tolerance=0.05) -> DetectionScore:
+    '''
+    Compares the periods detected in a channel to the ripples and fast ripples injected into it.
+    Periods and events match if they are at most tolerance seconds apart.
+    '''
+    hfos = [event for event in events
+            if event.channel == channel and event.kind in _HFO_KINDS]
+    detected_periods = list(zip(periods.start, periods.stop))
+
+    def is_matching(event, period):
+        start, stop = period
+        return start <= event.stop + tolerance and event.start - tolerance <= stop
+
+    true_positives = sum(any(is_matching(event, period) for period in detected_periods)
+                         for event in hfos)
+    false_positives = sum(not any(is_matching(event, period) for event in hfos)
+                          for period in detected_periods)
+    return DetectionScore(true_positives=true_positives,
+                          false_negatives=len(hfos) - true_positives,
+                          false_positives=false_positives)
+
+
+def _parse_arguments():
+    defaults = SyntheticRecordingSettings()
+    parser = argparse.ArgumentParser(
+        description='Generate synthetic recordings with known HFOs in the format expected by run.py')
+    parser.add_argument('directory', type=str,
+                        help='Where to write the I<interval>.mat files and their I<interval>.truth.json ground truths')
+    parser.add_argument('--intervals', type=int, default=1,
+                        help='How many intervals to generate. Default is 1')
+    for field, default in defaults._asdict().items():
+        parser.add_argument(f'--{field.replace("_", "-")}', type=type(default), default=default,
+                            help=f'Default is {default}')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    arguments = _parse_arguments()
+    generate_dataset(arguments.directory, arguments.intervals, SyntheticRecordingSettings(
+        **{field: getattr(arguments, field) for field in SyntheticRecordingSettings._fields}))
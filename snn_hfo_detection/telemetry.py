@@ -0,0 +1,354 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+_PROMETHEUS_PREFIX = 'snn_hfo_detection'
+
+
+class Measurement(NamedTuple):
+    '''
+    How long a single step took
+
+    Parameters
+    -------
+    name : str
+        name of the step, e.g. "snn.run" or "filter.ripple.signal_to_spike"
+    wall_time : float
+        elapsed seconds
+    cpu_time : float
+        seconds the executing thread spent on the CPU
+    interval : Optional[int]
+        interval the step worked on. None if it was not specific to a channel
+    channel : Optional[int]
+        channel the step worked on, using 1 based indexing. None if it was not specific to a channel
+    '''
+    name: str
+    wall_time: float
+    cpu_time: float
+    interval: Optional[int]
+    channel: Optional[int]
+
+
+class ChannelRecord(NamedTuple):
+    '''
+    Parameters
+    -------
+    interval : int
+        interval of the channel
+    channel : int
+        channel of the interval, using 1 based indexing
+    recording_time : float
+        seconds of the recording that were analyzed
+    input_spike_count : int
+        amount of up and down spikes of all bandwidths fed into the SNN
+    '''
+    interval: int
+    channel: int
+    recording_time: float
+    input_spike_count: int
+
+
+class TelemetryRecords(NamedTuple):
+    '''
+    Everything a Telemetry recorded. Can be sent between processes.
+    '''
+    measurements: List[Measurement]
+    channels: List[ChannelRecord]
+
+
+class _Scope(NamedTuple):
+    interval: int
+    channel: int
+
+
+class Telemetry():
+    '''
+    Collects measurements from any thread of the process.
+    '''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._measurements: List[Measurement] = []
+        self._channels: Dict[_Scope, ChannelRecord] = {}
+        self._pipeline_metrics = None
+        self._started = time.perf_counter()
+        self._wall_time = None
+
+    def add_measurement(self, measurement: Measurement):
+        with self._lock:
+            self._measurements.append(measurement)
+
+    def add_channel(self, channel_record: ChannelRecord):
+        with self._lock:
+            scope = _Scope(channel_record.interval, channel_record.channel)
+            previous_record = self._channels.get(scope)
+            if previous_record is not None:
+                channel_record = channel_record._replace(
+                    recording_time=max(previous_record.recording_time,
+                                       channel_record.recording_time),
+                    input_spike_count=previous_record.input_spike_count + channel_record.input_spike_count)
+            self._channels[scope] = channel_record
+
+    def add_records(self, records: TelemetryRecords):
+        for measurement in records.measurements:
+            self.add_measurement(measurement)
+        for channel_record in records.channels:
+            self.add_channel(channel_record)
+
+    def set_pipeline_metrics(self, pipeline_metrics):
+        self._pipeline_metrics = pipeline_metrics
+
+    def stop(self):
+        self._wall_time = time.perf_counter() - self._started
+
+    def records(self) -> TelemetryRecords:
+        with self._lock:
+            return TelemetryRecords(measurements=list(self._measurements),
+                                    channels=list(self._channels.values()))
+
+    def create_report(self):
+        '''
+        Summarizes all measurements into a JSON serializable dict
+        '''
+        records = self.records()
+        wall_time = self._wall_time if self._wall_time is not None else time.perf_counter() - \
+            self._started
+        recording_time = sum(
+            channel_record.recording_time for channel_record in records.channels)
+        report = {
+            'wall_time': wall_time,
+            'recording_time': recording_time,
+            'realtime_factor': _divide(recording_time, wall_time),
+            'stages': _summarize_stages(records.measurements),
+            'channels': _summarize_channels(records),
+            'measurements': [measurement._asdict() for measurement in records.measurements],
+        }
+        if self._pipeline_metrics is not None:
+            report['pipeline'] = [stage_metrics._asdict()
+                                  for stage_metrics in self._pipeline_metrics]
+        return report
+
+
+# The Telemetry of the current run, or None if nothing should be recorded. Threads only
+# record into it if they run in a copy of the context it was activated in, like the pipeline's
+_ACTIVE_TELEMETRY = ContextVar('active_telemetry', default=None)
+# The channel every thread is currently working on
+_current_scope = threading.local()
+
+
+def _divide(dividend, divisor):
+    return dividend / divisor if divisor > 0 else None
+
+
+def _summarize_stages(measurements):
+    stages = {}
+    for measurement in measurements:
+        stage = stages.setdefault(
+            measurement.name, {'count': 0, 'wall_time': 0.0, 'cpu_time': 0.0})
+        stage['count'] += 1
+        stage['wall_time'] += measurement.wall_time
+        stage['cpu_time'] += measurement.cpu_time
+    return dict(sorted(stages.items()))
+
+
+def _summarize_channels(records):
+    processing_times = {}
+    for measurement in records.measurements:
+        if measurement.channel is None:
+            continue
+        scope = _Scope(measurement.interval, measurement.channel)
+        processing_times[scope] = processing_times.get(
+            scope, 0.0) + measurement.wall_time
+    channels = []
+    for channel_record in sorted(records.channels):
+        processing_time = processing_times.get(
+            _Scope(channel_record.interval, channel_record.channel), 0.0)
+        channels.append({
+            **channel_record._asdict(),
+            'processing_time': processing_time,
+            'realtime_factor': _divide(channel_record.recording_time, processing_time),
+        })
+    return channels
+
+
+def get_active_telemetry() -> Optional[Telemetry]:
+    return _ACTIVE_TELEMETRY.get()
+
+
+@contextmanager
+def record_telemetry(should_record=True) -> Iterator[Optional[Telemetry]]:
+    '''
+    Records every measurement taken while the context is active.
+    Yields None without recording anything if should_record is False.
+    '''
+    if not should_record:
+        yield None
+        return
+    telemetry = Telemetry()
+    token = _ACTIVE_TELEMETRY.set(telemetry)
+    try:
+        yield telemetry
+    finally:
+        telemetry.stop()
+        _ACTIVE_TELEMETRY.reset(token)
+
+
+def get_channel_scope():
+    '''
+    The interval and channel the current thread is working on. None outside of a channel_scope
+    '''
+    return getattr(_current_scope, 'value', None)
+
+
+@contextmanager
+def channel_scope(metadata):
+    '''
+    Attributes all measurements taken by the current thread
+    while the context is active to the channel described by metadata
+    '''
+    previous_scope = get_channel_scope()
+    _current_scope.value = _Scope(metadata.interval, metadata.channel)
+    telemetry = get_active_telemetry()
+    if telemetry is not None:
+        telemetry.add_channel(ChannelRecord(interval=metadata.interval,
+                                                    channel=metadata.channel,
+                                                    recording_time=float(
+                                                        metadata.duration),
+                                                    input_spike_count=0))
+    try:
+        yield
+    finally:
+        _current_scope.value = previous_scope
+
+
+@contextmanager
+def measure(name, metadata=None):
+    '''
+    Measures the wall and CPU time of the enclosed code if telemetry is being recorded.
+    The measurement belongs to the channel described by metadata or,
+    if none is given, to the one of the current channel_scope.
+    '''
+    telemetry = get_active_telemetry()
+    if telemetry is None:
+        yield
+        return
+    scope = _Scope(metadata.interval, metadata.channel) if metadata is not None else get_channel_scope()
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    try:
+        yield
+    finally:
+        telemetry.add_measurement(Measurement(
+            name=name,
+            wall_time=time.perf_counter() - wall_start,
+            cpu_time=time.thread_time() - cpu_start,
+            interval=scope.interval if scope is not None else None,
+            channel=scope.channel if scope is not None else None))
+
+
+def count_input_spikes(filtered_spikes):
+    '''
+    Adds the spikes that will be fed into the SNN to the channel of the current scope
+    '''
+    telemetry = get_active_telemetry()
+    scope = get_channel_scope()
+    if telemetry is None or scope is None:
+        return
+    spike_count = sum(len(bandwidth.spike_trains.up) + len(bandwidth.spike_trains.down)
+                      for bandwidth in filtered_spikes if bandwidth is not None)
+    telemetry.add_channel(ChannelRecord(interval=scope.interval,
+                                        channel=scope.channel,
+                                        recording_time=0.0,
+                                        input_spike_count=spike_count))
+
+
+def _write_atomically(path, text):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    # Readers like the node exporter must never see a half written file
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=directory)
+    try:
+        with os.fdopen(file_descriptor, 'w') as file:
+            file.write(text)
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+
+
+def save_telemetry_report(path, report):
+    _write_atomically(path, json.dumps(report, indent=4))
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if len(labels) == 0:
+        return ''
+    formatted_labels = ','.join(
+        f'{name}="{_escape_label(value)}"' for name, value in labels.items())
+    return f'{{{formatted_labels}}}'
+
+
+def _format_metric(name, metric_type, help_text, samples):
+    lines = [f'# HELP {_PROMETHEUS_PREFIX}_{name} {help_text}',
+             f'# TYPE {_PROMETHEUS_PREFIX}_{name} {metric_type}']
+    for labels, value in samples:
+        if value is None:
+            continue
+        lines.append(
+            f'{_PROMETHEUS_PREFIX}_{name}{_format_labels(labels)} {float(value)!r}')
+    return lines
+
+
+def convert_report_to_prometheus(report) -> str:
+    '''
+    Converts a report created by Telemetry.create_report into the Prometheus text format
+    '''
+    stages = report['stages'].items()
+    channels = report['channels']
+
+    def channel_labels(channel):
+        return {'interval': channel['interval'], 'channel': channel['channel']}
+
+    lines = []
+    lines += _format_metric('run_wall_seconds', 'gauge', 'Wall time of the entire run',
+                            [({}, report['wall_time'])])
+    lines += _format_metric('run_recording_seconds', 'gauge', 'Seconds of recordings analyzed in the run',
+                            [({}, report['recording_time'])])
+    lines += _format_metric('run_realtime_factor', 'gauge', 'Recording seconds analyzed per second of the run',
+                            [({}, report['realtime_factor'])])
+    lines += _format_metric('stage_wall_seconds', 'gauge', 'Wall time spent in a stage',
+                            [({'stage': name}, stage['wall_time']) for name, stage in stages])
+    lines += _format_metric('stage_cpu_seconds', 'gauge', 'CPU time spent in a stage',
+                            [({'stage': name}, stage['cpu_time']) for name, stage in stages])
+    lines += _format_metric('stage_calls', 'gauge', 'How often a stage was executed',
+                            [({'stage': name}, stage['count']) for name, stage in stages])
+    lines += _format_metric('channel_input_spikes', 'gauge', 'Spikes fed into the SNN for a channel',
+                            [(channel_labels(channel), channel['input_spike_count']) for channel in channels])
+    lines += _format_metric('channel_processing_seconds', 'gauge', 'Wall time spent on a channel',
+                            [(channel_labels(channel), channel['processing_time']) for channel in channels])
+    lines += _format_metric('channel_realtime_factor', 'gauge', 'Recording seconds of a channel analyzed per second',
+                            [(channel_labels(channel), channel['realtime_factor']) for channel in channels])
+    if 'pipeline' in report:
+        pipeline = report['pipeline']
+        for field, help_text in [('busy_time', 'Seconds a pipeline stage spent processing'),
+                                 ('starved_time', 'Seconds a pipeline stage waited for the previous one'),
+                                 ('blocked_time', 'Seconds a pipeline stage waited for room in its output queue'),
+                                 ('max_queue_depth', 'Maximum amount of items waiting behind a pipeline stage'),
+                                 ('mean_queue_depth', 'Mean amount of items waiting behind a pipeline stage')]:
+            metric_name = field.replace('_time', '_seconds')
+            lines += _format_metric(f'pipeline_{metric_name}', 'gauge', help_text,
+                                    [({'stage': stage_metrics['name']}, stage_metrics[field]) for stage_metrics in pipeline])
+    return '\n'.join(lines) + '\n'
+
+
+def save_prometheus_metrics(path, report):
+    _write_atomically(path, convert_report_to_prometheus(report))
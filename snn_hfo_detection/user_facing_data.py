@@ -1,7 +1,9 @@
-from typing import NamedTuple, Optional, Callable, List
+from typing import Dict, NamedTuple, Optional, Callable, List, Union
 from enum import Enum, auto
 import numpy as np
 from snn_hfo_detection.functions.signal_to_spike.selector import SignalToSpikeAlgorithm
+from snn_hfo_detection.functions.hfo_detection import Detections
+from snn_hfo_detection.functions.time_base import SampledTimes, TimeBase
 
 
 class SpikeTrains(NamedTuple):
@@ -72,8 +74,8 @@ class Analytics(NamedTuple):
 
     Parameters
     -----
-    detections : np.array
-        Boolean list of HFO detection. The indices correspond to analyzed_times.
+    detections : Detections
+        HFO detection of every sample, stored as runs of detected samples. The indices correspond to analyzed_times.
     periods : Periods
         The start and end times in which HFOs were detected.
     filtered_spikes : FilteredSpikes
@@ -85,7 +87,7 @@ class Analytics(NamedTuple):
     neuron_ids : np.array
         The IDs of the neurons that fired at the time of spike_times. The indices match.
     '''
-    detections: np.array
+    detections: Detections
     periods: Periods
     filtered_spikes: FilteredSpikes
     spike_times: np.array
@@ -109,19 +111,36 @@ class HfoDetectionWithAnalytics(NamedTuple):
 
 class PatientData(NamedTuple):
     '''
-    Patient measurements
+    Patient measurements.
+    The wideband signals of a loaded interval are read from the file when a channel is indexed if possible.
+    Recordings that are not sampled uniformly keep their times in SampledTimes.
     '''
     wideband_signals: np.array
-    signal_time: np.array
+    time_base: Union[TimeBase, SampledTimes]
     channel_labels: np.array
 
+    @property
+    def signal_time(self) -> np.array:
+        '''
+        Times of all samples, calculated on every access
+        '''
+        return self.time_base.get_times()
+
 
 class ChannelData(NamedTuple):
     '''
-    Patient measurements for a specific channel
+    Patient measurements for a specific channel.
+    The loaded arrays are read only views shared by all users of the channel.
     '''
     wideband_signal: np.array
-    signal_time: np.array
+    time_base: Union[TimeBase, SampledTimes]
+
+    @property
+    def signal_time(self) -> np.array:
+        '''
+        Times of all samples, calculated on every access
+        '''
+        return self.time_base.get_times()
 
 
 class Metadata(NamedTuple):
@@ -170,6 +189,18 @@ class PlotMode(Enum):
     BOTH = auto()
 
 
+class PersistenceFormat(Enum):
+    '''
+    How HFO detections are saved
+
+    JSON: one human readable file per channel
+    NUMPY: one directory per channel with a small JSON header and
+    every array in its own .npy file, which can be memory mapped
+    '''
+    JSON = auto()
+    NUMPY = auto()
+
+
 class Configuration(NamedTuple):
     data_path: str
     measurement_mode: MeasurementMode
@@ -182,6 +213,19 @@ class Configuration(NamedTuple):
     plot_path: str
     plot_mode: PlotMode
     signal_to_spike_algorithm: SignalToSpikeAlgorithm
+    seed: Optional[int] = None
+    jobs: int = 1
+    cache_calibration: bool = False
+    calibration_interval: Optional[int] = None
+    saving_format: PersistenceFormat = PersistenceFormat.JSON
+    resume: bool = False
+    spike_cache_path: Optional[str] = None
+    spike_cache_size: float = 1024
+    pipeline_depth: Optional[int] = None
+    pipeline_metrics_path: Optional[str] = None
+    telemetry_path: Optional[str] = None
+    prometheus_path: Optional[str] = None
+    profile_path: Optional[str] = None
 
 
 class HfoDetectionRun(NamedTuple):
@@ -189,3 +233,34 @@ class HfoDetectionRun(NamedTuple):
     detector: HfoDetector
     input: ChannelData
     configuration: Configuration
+
+
+class ChannelSummary(NamedTuple):
+    '''
+    What remains of an HfoDetectionRun after its channel was handled.
+    Unlike the run, it holds no signals or analytics.
+
+    Parameters
+    -------
+    metadata : Metadata
+        The analyzed channel
+    result : HfoDetection
+        The HFO detection result of the channel
+    '''
+    metadata: Metadata
+    result: HfoDetection
+
+
+class PatientSummary(NamedTuple):
+    '''
+    Everything the per patient plots receive
+
+    Parameters
+    -------
+    intervals : Dict[int, List[ChannelSummary]]
+        The summaries of the analyzed channels of every interval, in the order they were analyzed
+    configuration : Configuration
+        The configuration of the run
+    '''
+    intervals: Dict[int, List[ChannelSummary]]
+    configuration: Configuration
@@ -0,0 +1,68 @@
+from benchmarks.cases import BenchmarkCase
+from benchmarks.parameters import SCALES, get_parameters
+from benchmarks.runner import BenchmarkResult, compare_results, load_results, run_benchmarks, save_results
+
+
+def _result(case, best, duration=10):
+    return BenchmarkResult(case=case, parameters={'duration': duration}, times=[best * 2, best])
+
+
+def test_compare_results_flags_regressions_beyond_tolerance():
+    baseline = [_result('fast', 1.0), _result('slow', 1.0)]
+    current = [_result('fast', 1.05), _result('slow', 1.2), _result('new', 1.0),
+               _result('fast', 5.0, duration=60)]
+
+    comparisons = compare_results(baseline, current, tolerance=0.1)
+
+    assert [comparison.is_regression for comparison in comparisons] == [
+        False, True, False, False]
+    assert comparisons[1].ratio == 1.2
+    assert comparisons[2].baseline is None
+    assert comparisons[3].baseline is None
+
+
+def test_run_benchmarks_skips_parameters_the_case_ignores():
+    calls = []
+    case = BenchmarkCase(name='duration_only',
+                         parameter_names=('duration',),
+                         prepare=lambda parameters: parameters.duration,
+                         run=calls.append)
+
+    results = run_benchmarks([case], get_parameters(SCALES['default']), repeat=2)
+
+    assert [result.parameters for result in results] == [
+        {'duration': 10}, {'duration': 60}]
+    assert all(len(result.times) == 2 for result in results)
+    # Every benchmark is warmed up once before being measured
+    assert calls == [10, 10, 10, 60, 60, 60]
+
+
+def test_saved_results_can_be_loaded(tmp_path):
+    results = [_result('fast', 1.0)]
+    path = str(tmp_path / 'baselines' / 'baseline.json')
+    save_results(path, results)
+    assert load_results(path) == results
+
+
+def test_compare_results_flags_quality_drops():
+    baseline = [_result('detection', 1.0)._replace(
+        quality={'precision': 0.9, 'recall': 0.8})]
+    current = [_result('detection', 1.0)._replace(
+        quality={'precision': 0.88, 'recall': 0.6})]
+
+    comparisons = compare_results(baseline, current, tolerance=0.1)
+
+    assert comparisons[0].is_regression
+    assert comparisons[0].quality_regressions == ('recall',)
+
+
+def test_run_benchmarks_evaluates_quality_once():
+    case = BenchmarkCase(name='evaluated',
+                         parameter_names=('duration',),
+                         prepare=lambda parameters: parameters.duration,
+                         run=lambda duration: duration * 2,
+                         evaluate=lambda duration, output: {'ratio': output / duration})
+
+    results = run_benchmarks([case], get_parameters(SCALES['quick']), repeat=1)
+
+    assert [result.quality for result in results] == [{'ratio': 2}]
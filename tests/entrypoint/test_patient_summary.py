@@ -0,0 +1,40 @@
+from types import SimpleNamespace
+from snn_hfo_detection.entrypoint.patient_summary import PatientAggregator
+from snn_hfo_detection.user_facing_data import HfoDetection, HfoDetectionRun, HfoDetector, Metadata
+
+CONFIGURATION = SimpleNamespace(plot_path='plots/')
+
+
+def _run_channel(interval, channel, frequency):
+    analytics = object()
+    detector = HfoDetector(lambda: SimpleNamespace(
+        result=HfoDetection(frequency=frequency, total_amount=2), analytics=analytics))
+    detector.run()
+    return HfoDetectionRun(
+        metadata=Metadata(interval=interval, channel=channel,
+                          channel_label=f'C{channel}', duration=10),
+        detector=detector,
+        input=None,
+        configuration=CONFIGURATION)
+
+
+def test_aggregator_keeps_only_results_by_interval():
+    aggregator = PatientAggregator(CONFIGURATION)
+    aggregator.add(_run_channel(interval=1, channel=1, frequency=0.1))
+    aggregator.add(_run_channel(interval=2, channel=1, frequency=0.2))
+    aggregator.add(_run_channel(interval=1, channel=2, frequency=0.3))
+
+    patient_summary = aggregator.create_summary()
+
+    assert patient_summary.configuration is CONFIGURATION
+    assert list(patient_summary.intervals) == [1, 2]
+    assert [summary.metadata.channel for summary in patient_summary.intervals[1]] == [
+        1, 2]
+    assert patient_summary.intervals[1][1].result == HfoDetection(
+        frequency=0.3, total_amount=2)
+    assert all(set(summary._fields) == {'metadata', 'result'}
+               for summaries in patient_summary.intervals.values() for summary in summaries)
+
+
+def test_empty_aggregator_has_no_intervals():
+    assert PatientAggregator(CONFIGURATION).create_summary().intervals == {}
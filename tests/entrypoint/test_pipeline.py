@@ -0,0 +1,121 @@
+import threading
+import pytest
+from snn_hfo_detection.entrypoint.pipeline import Pipeline, PipelineStage
+from snn_hfo_detection.telemetry import measure, record_telemetry
+
+
+def _double(value):
+    return value * 2
+
+
+def _increment(value):
+    return value + 1
+
+
+def test_pipeline_applies_stages_in_order():
+    pipeline = Pipeline(source_name='source',
+                        source=range(20),
+                        stages=[PipelineStage(name='double', function=_double),
+                                PipelineStage(name='increment', function=_increment)],
+                        queue_depth=2)
+    assert list(pipeline) == [value * 2 + 1 for value in range(20)]
+
+
+def test_pipeline_without_stages_yields_source():
+    assert list(Pipeline(source_name='source', source=[3, 1, 2], stages=[], queue_depth=1)) == [3, 1, 2]
+
+
+def _fail_on_three(value):
+    if value == 3:
+        raise ValueError('three')
+    return value
+
+
+def test_pipeline_raises_error_of_stage():
+    pipeline = Pipeline(source_name='source',
+                        source=range(10),
+                        stages=[PipelineStage(name='fail', function=_fail_on_three)],
+                        queue_depth=1)
+    with pytest.raises(ValueError, match='three'):
+        for _value in pipeline:
+            pass
+
+
+def _failing_source():
+    yield 1
+    raise KeyError('source')
+
+
+def test_pipeline_raises_error_of_source():
+    pipeline = Pipeline(source_name='source',
+                        source=_failing_source(),
+                        stages=[PipelineStage(name='double', function=_double)],
+                        queue_depth=1)
+    with pytest.raises(KeyError, match='source'):
+        list(pipeline)
+
+
+def test_pipeline_bounds_items_between_stages():
+    queue_depth = 2
+    released = threading.Event()
+    produced = []
+
+    def source():
+        for value in range(10):
+            produced.append(value)
+            yield value
+
+    def wait_for_release(value):
+        released.wait()
+        return value
+
+    pipeline = Pipeline(source_name='source',
+                        source=source(),
+                        stages=[PipelineStage(name='slow', function=wait_for_release)],
+                        queue_depth=queue_depth)
+    produced_while_blocked = []
+
+    def release():
+        # Once released, the source is free to produce more, so count before
+        produced_while_blocked.append(len(produced))
+        released.set()
+
+    outputs = iter(pipeline)
+    threading.Timer(0.5, release).start()
+    assert next(outputs) == 0
+    # The slow stage held one item while at most queue_depth items waited for it
+    assert produced_while_blocked[0] <= queue_depth + 2
+    assert list(outputs) == list(range(1, 10))
+
+    metrics = pipeline.metrics()
+    assert [stage_metrics.name for stage_metrics in metrics] == ['source', 'slow']
+    assert [stage_metrics.processed_count for stage_metrics in metrics] == [10, 10]
+    assert metrics[0].max_queue_depth == queue_depth
+    assert metrics[0].blocked_time > 0
+    assert metrics[1].busy_time > 0
+
+
+def test_pipeline_stops_when_consumer_stops_early():
+    pipeline = Pipeline(source_name='source',
+                        source=range(1000),
+                        stages=[PipelineStage(name='double', function=_double)],
+                        queue_depth=1)
+    for value in pipeline:
+        if value == 4:
+            break
+    assert pipeline.metrics()[0].processed_count < 1000
+
+
+def test_pipeline_stages_see_active_telemetry():
+    def measure_double(value):
+        with measure('double'):
+            return value * 2
+
+    with record_telemetry() as telemetry:
+        pipeline = Pipeline(source_name='source',
+                            source=range(3),
+                            stages=[PipelineStage(name='double', function=measure_double)],
+                            queue_depth=1)
+        assert list(pipeline) == [0, 2, 4]
+
+    assert [measurement.name for measurement in telemetry.records().measurements] == ['double'] * 3
@@ -0,0 +1,56 @@
+import pytest
+from snn_hfo_detection.entrypoint.sharding import Shard, parse_shard, get_shard_work_units
+from snn_hfo_detection.entrypoint.hfo_detection import CustomOverrides
+from snn_hfo_detection.stages.loading.folder_discovery import get_interval_paths
+from tests.integration.utility import get_hfo_directory
+
+DUMMY_CHANNEL_COUNT = 10
+
+
+def _get_dummy_shard_work_units(shard, channels=None):
+    intervals = get_interval_paths(get_hfo_directory('dummy'))
+    return get_shard_work_units(intervals, CustomOverrides(
+        duration=None,
+        channels=channels,
+        intervals=None,
+        shard=shard))
+
+
+@pytest.mark.parametrize(
+    'text, expected_shard',
+    [('1/1', Shard(index=1, count=1)),
+     ('2/5', Shard(index=2, count=5)),
+     ('5/5', Shard(index=5, count=5))]
+)
+def test_parse_shard(text, expected_shard):
+    assert parse_shard(text) == expected_shard
+
+
+@pytest.mark.parametrize(
+    'text',
+    ['', '1', '0/5', '6/5', '-1/5', '1/0', 'a/b']
+)
+def test_parse_shard_fails_on_invalid_shard(text):
+    with pytest.raises(ValueError):
+        parse_shard(text)
+
+
+@pytest.mark.parametrize('count', [1, 3, 10, 11])
+def test_shards_cover_all_work_units_exactly_once(count):
+    shards = [_get_dummy_shard_work_units(Shard(index=index, count=count))
+              for index in range(1, count + 1)]
+    all_work_units = [work_unit for shard in shards for work_unit in shard]
+    assert sorted(all_work_units) == [(1, channel)
+                                      for channel in range(1, DUMMY_CHANNEL_COUNT + 1)]
+
+
+def test_shards_are_balanced():
+    shard_sizes = [len(_get_dummy_shard_work_units(Shard(index=index, count=3)))
+                   for index in range(1, 4)]
+    assert shard_sizes == [4, 3, 3]
+
+
+def test_shards_only_contain_selected_channels():
+    work_units = _get_dummy_shard_work_units(
+        Shard(index=1, count=2), channels=[2, 3, 5])
+    assert work_units == {(1, 2), (1, 5)}
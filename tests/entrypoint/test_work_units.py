@@ -0,0 +1,36 @@
+import numpy as np
+from snn_hfo_detection.entrypoint import work_units
+from snn_hfo_detection.entrypoint.work_units import generate_work_units
+from snn_hfo_detection.stages.filter import filter_wideband_signals
+from snn_hfo_detection.synthetic import SyntheticRecordingSettings, generate_recording, write_interval
+from tests.integration.utility import EMPTY_CUSTOM_OVERRIDES, generate_test_configuration
+
+_SETTINGS = SyntheticRecordingSettings(channel_count=5, duration=1, seed=3)
+
+
+def test_channels_are_filtered_one_block_at_a_time(tmp_path, monkeypatch):
+    write_interval(str(tmp_path), 1, _SETTINGS)
+    configuration = generate_test_configuration('dummy')._replace(
+        data_path=str(tmp_path), pipeline_depth=2)
+    filtered_channel_counts = []
+
+    def count_filtered_channels(wideband_signals, time_base, configuration):
+        filtered_channel_counts.append(len(wideband_signals))
+        return filter_wideband_signals(wideband_signals, time_base, configuration)
+    monkeypatch.setattr(work_units, 'filter_wideband_signals',
+                        count_filtered_channels)
+
+    generated_work_units = generate_work_units(
+        configuration, EMPTY_CUSTOM_OVERRIDES)
+    first_work_unit = next(generated_work_units)
+
+    assert filtered_channel_counts == [2]
+    all_work_units = [first_work_unit, *generated_work_units]
+    assert filtered_channel_counts == [2, 2, 1]
+    patient_data, _events = generate_recording(_SETTINGS)
+    expected_signals = filter_wideband_signals(
+        patient_data.wideband_signals, patient_data.time_base, configuration)
+    for channel, work_unit in enumerate(all_work_units):
+        assert work_unit.metadata.channel == channel + 1
+        assert np.allclose(work_unit.filtered_signals.fast_ripple,
+                           expected_signals.fast_ripple[channel])
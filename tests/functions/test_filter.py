@@ -72,3 +72,19 @@ def test_butter_bandpass_filter(data, lowcut, highcut, sampling_frequency, expec
     actual_amplitude = butter_bandpass_filter(
         data, lowcut, highcut, sampling_frequency)
     assert_are_lists_approximately_equal(actual_amplitude, expected_amplitude)
+
+
+def test_butter_bandpass_filter_bank_matches_butter_bandpass_filter():
+    random_number_generator = np.random.default_rng(42)
+    data = random_number_generator.normal(scale=20, size=(3, 2000))
+    bands = [(80, 250), (250, 500)]
+    filtered_bands = butter_bandpass_filter_bank(
+        data, bands, sampling_frequency=2000, order=2)
+    assert len(filtered_bands) == len(bands)
+    for (lowcut, highcut), filtered_band in zip(bands, filtered_bands):
+        assert filtered_band.shape == data.shape
+        for channel, filtered_signal in zip(data, filtered_band):
+            expected_signal = butter_bandpass_filter(
+                channel, lowcut, highcut, sampling_frequency=2000, order=2)
+            np.testing.assert_allclose(
+                filtered_signal, expected_signal, atol=1e-9)
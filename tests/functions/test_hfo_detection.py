@@ -1,5 +1,7 @@
+import pickle
 import pytest
-from snn_hfo_detection.functions.hfo_detection import Periods, detect_hfo, HfoDetectionWithAnalytics, HfoDetection, Analytics
+from snn_hfo_detection.functions.hfo_detection import Detections, Periods, detect_hfo, HfoDetectionWithAnalytics, HfoDetection, Analytics
+from snn_hfo_detection.functions.time_base import TimeBase
 from tests.utility import *
 
 
@@ -73,3 +75,94 @@ def test_hfo_detection_fails_when_step_size_is_zero():
 def test_hfo_detection_fails_when_duration_is_zero():
     with pytest.raises(ValueError):
         detect_hfo(0, [0], [0], 1, 0.5)
+
+
+def _get_binary_hfos_by_sliding_window(duration, spike_times, signal_times, step_size, window_size):
+    binary_hfo_signal = np.zeros(len(signal_times), dtype=bool)
+    for start in np.arange(0, duration, step_size):
+        stop = start + window_size
+        if np.any((spike_times >= start) & (spike_times <= stop)):
+            binary_hfo_signal[(signal_times >= start) &
+                              (signal_times <= stop)] = True
+    return binary_hfo_signal
+
+
+@pytest.mark.parametrize('seed, is_shuffled', [(0, False), (1, False), (2, True)])
+def test_hfo_detection_matches_sliding_window(seed, is_shuffled):
+    random_generator = np.random.default_rng(seed)
+    signal_times = np.arange(0, 2, 1 / 500)
+    if is_shuffled:
+        random_generator.shuffle(signal_times)
+    # Rounded spike times fall exactly on window borders
+    spike_times = np.round(random_generator.uniform(0, 2, size=15), 2)
+
+    hfo_detection = detect_hfo(2, spike_times, signal_times, 0.01, 0.05)
+
+    expected_detections = _get_binary_hfos_by_sliding_window(
+        2, spike_times, signal_times, 0.01, 0.05)
+    assert np.array_equal(
+        hfo_detection.analytics.detections, expected_detections)
+
+
+def test_hfo_detection_with_time_base_matches_sliding_window():
+    random_generator = np.random.default_rng(3)
+    time_base = TimeBase(start=0.0, sampling_frequency=500, sample_count=1000)
+    spike_times = np.round(random_generator.uniform(0, 2, size=15), 2)
+
+    hfo_detection = detect_hfo(2, spike_times, time_base, 0.01, 0.05)
+
+    expected_hfo_detection = detect_hfo(
+        2, spike_times, time_base.get_times(), 0.01, 0.05)
+    assert np.array_equal(hfo_detection.analytics.detections,
+                          expected_hfo_detection.analytics.detections)
+    assert np.allclose(hfo_detection.analytics.periods.start,
+                       expected_hfo_detection.analytics.periods.start)
+    assert np.allclose(hfo_detection.analytics.periods.stop,
+                       expected_hfo_detection.analytics.periods.stop)
+
+
+def test_hfo_detection_finds_separate_periods():
+    signal_times = np.arange(0, 1, 0.01)
+    hfo_detection = detect_hfo(1, [0.2, 0.205, 0.9], signal_times, 0.1, 0.1)
+
+    assert hfo_detection.result.total_amount == 2
+    assert np.allclose(hfo_detection.analytics.periods.start, [0.1, 0.8])
+    assert np.allclose(hfo_detection.analytics.periods.stop, [0.31, 0.99])
+
+
+@pytest.mark.parametrize('mask, expected_start, expected_stop', [
+    ([], [], []),
+    ([False, False], [], []),
+    ([True, True, False, True], [0, 3], [2, 4]),
+    ([False, True, True, False], [1], [3]),
+])
+def test_detections_store_runs_of_mask(mask, expected_start, expected_stop):
+    detections = Detections.from_mask(mask)
+
+    assert detections.sample_count == len(mask)
+    assert list(detections.start) == expected_start
+    assert list(detections.stop) == expected_stop
+    assert list(detections.to_mask()) == mask
+    assert list(np.asarray(detections)) == mask
+
+
+@pytest.mark.parametrize('start, stop', [(None, None), (1, 4), (2, None), (-3, -1), (4, 2), (0, 100)])
+def test_detections_expand_slices_of_mask(start, stop):
+    mask = [False, True, True, False, True, False]
+    assert list(Detections.from_mask(mask).to_mask(start, stop)) == mask[start:stop]
+
+
+def test_detections_behave_like_mask():
+    mask = [False, True, True, False, True]
+    detections = Detections.from_mask(mask)
+
+    assert len(detections) == len(mask)
+    assert [detections[index] for index in range(len(mask))] == mask
+    assert detections[-1] == mask[-1]
+    with pytest.raises(IndexError):
+        _ = detections[len(mask)]
+    assert list(detections[1:3]) == mask[1:3]
+    assert list(detections) == mask
+    assert detections == Detections.from_mask(mask)
+    assert detections != Detections.from_mask(mask[:-1])
+    assert pickle.loads(pickle.dumps(detections)) == detections
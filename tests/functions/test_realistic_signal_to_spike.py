@@ -0,0 +1,51 @@
+import numpy as np
+from snn_hfo_detection.functions.signal_to_spike import realistic
+from snn_hfo_detection.functions.signal_to_spike.utility import SignalToSpikeParameters
+
+SAMPLING_FREQUENCY = 2000
+SAMPLE_COUNT = 2000
+REFRACTORY_PERIOD = 3e-4
+
+
+def _generate_signals(channel_count):
+    random_number_generator = np.random.default_rng(42)
+    return random_number_generator.normal(scale=20, size=(channel_count, SAMPLE_COUNT))
+
+
+def _generate_times():
+    return np.arange(SAMPLE_COUNT) / SAMPLING_FREQUENCY
+
+
+def test_realistic_signal_to_spike_finds_spikes_in_both_directions():
+    spike_trains = realistic.signal_to_spike(SignalToSpikeParameters(
+        signal=_generate_signals(1)[0],
+        threshold_up=10,
+        threshold_down=10,
+        times=_generate_times(),
+        refractory_period=REFRACTORY_PERIOD,
+        interpolation_factor=None))
+    assert len(spike_trains.up) != 0
+    assert len(spike_trains.down) != 0
+    assert np.all(np.diff(spike_trains.up) > 0)
+    assert np.all(np.diff(spike_trains.down) > 0)
+
+
+def test_realistic_signal_to_spike_batch_matches_single_channels():
+    signals = _generate_signals(4)
+    thresholds = np.array([5, 10, 15, 20])
+    batch_spike_trains = realistic.signal_to_spike_batch(
+        signals, _generate_times(), thresholds, REFRACTORY_PERIOD)
+    assert len(batch_spike_trains) == len(signals)
+    for signal, threshold, batch_spike_train in zip(signals, thresholds, batch_spike_trains):
+        spike_trains = realistic.signal_to_spike(SignalToSpikeParameters(
+            signal=signal,
+            threshold_up=threshold,
+            threshold_down=threshold,
+            times=_generate_times(),
+            refractory_period=REFRACTORY_PERIOD,
+            interpolation_factor=None))
+        # The batch kernel is compiled separately, so fastmath may round differently
+        np.testing.assert_allclose(
+            batch_spike_train.up, spike_trains.up, rtol=1e-12)
+        np.testing.assert_allclose(
+            batch_spike_train.down, spike_trains.down, rtol=1e-12)
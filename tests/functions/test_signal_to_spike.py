@@ -84,3 +84,48 @@ def test_concatenate_spikes(spikes, expected_concatenation):
     expected_spike_times, expected_neuron_ids = expected_concatenation
     assert_are_lists_approximately_equal(spike_times, expected_spike_times)
     assert_are_lists_approximately_equal(neuron_ids, expected_neuron_ids)
+
+
+def _find_thresholds_per_window(signals, times, window_size, sample_ratio, scaling_factor):
+    duration = np.max(times) - np.min(times)
+    num_timesteps = int(np.ceil(duration / window_size))
+    max_min_amplitude = np.zeros((num_timesteps, 2))
+    for interval_nr, interval_start in enumerate(np.arange(start=0, stop=duration, step=window_size)):
+        interval_end = interval_start + window_size
+        index = np.where((times >= interval_start) & (times <= interval_end))
+        max_min_amplitude[interval_nr, 0] = np.max(signals[index])
+        max_min_amplitude[interval_nr, 1] = np.min(signals[index])
+    chosen_samples = max(int(np.round(num_timesteps * sample_ratio)), 1)
+    threshold_up = np.mean(np.sort(max_min_amplitude[:, 0])[:chosen_samples])
+    threshold_dn = np.mean(
+        np.sort(max_min_amplitude[:, 1] * -1)[:chosen_samples])
+    return scaling_factor*(threshold_up + threshold_dn)
+
+
+@pytest.mark.parametrize(
+    'time_jitter, should_shuffle',
+    [(0, False),
+     (2e-4, False),
+     (0, True)]
+)
+def test_find_thresholds_matches_looking_at_every_window_separately(time_jitter, should_shuffle):
+    random_number_generator = np.random.default_rng(42)
+    times = np.arange(20_000) / 2000 + \
+        random_number_generator.uniform(0, time_jitter, size=20_000)
+    signals = random_number_generator.normal(scale=20, size=20_000)
+    if should_shuffle:
+        order = random_number_generator.permutation(len(times))
+        times = times[order]
+        signals = signals[order]
+    assert find_thresholds(signals, times, 0.5, 1/6, 0.3) == _find_thresholds_per_window(
+        signals, times, 0.5, 1/6, 0.3)
+
+
+def test_find_thresholds_does_not_accept_empty_windows():
+    with pytest.raises(ValueError):
+        find_thresholds(
+            signals=np.array([0, 1, 2]),
+            times=np.array([0, 0.1, 3]),
+            window_size=1,
+            sample_ratio=0.5,
+            scaling_factor=0.1)
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from snn_hfo_detection.functions.time_base import SampledTimes, TimeBase, describe_times
+
+
+def test_from_times_describes_uniform_times():
+    time_base = TimeBase.from_times(np.arange(10) / 1000 + 2)
+
+    assert time_base.start == 2
+    assert time_base.sampling_frequency == pytest.approx(1000)
+    assert time_base.sample_count == 10
+    assert time_base.stop == pytest.approx(2.009)
+    assert np.allclose(time_base.get_times(), np.arange(10) / 1000 + 2)
+
+
+@pytest.mark.parametrize('times', [
+    [0],
+    [1, 0.5, 0],
+    [0, 0.5, 1, 1.6],
+])
+def test_from_times_rejects_times_without_time_base(times):
+    with pytest.raises(ValueError):
+        TimeBase.from_times(times)
+
+
+def test_get_times_follows_slicing():
+    time_base = TimeBase(start=0.0, sampling_frequency=10, sample_count=5)
+
+    assert np.allclose(time_base.get_times(1, 3), [0.1, 0.2])
+    assert np.allclose(time_base.get_times(3), [0.3, 0.4])
+    assert np.allclose(time_base.get_times(-2, 10), [0.3, 0.4])
+    assert len(time_base.get_times(4, 2)) == 0
+
+
+@pytest.mark.parametrize('side', ['left', 'right'])
+def test_find_indices_matches_searchsorted(side):
+    time_base = TimeBase(start=0.5, sampling_frequency=100, sample_count=200)
+    # Times on samples, between samples and outside of the recording
+    times = np.concatenate([time_base.get_times_at([0, 7, 199]),
+                            [0.5049, 1.2345, 0, 3]])
+
+    assert list(time_base.find_indices(times, side=side)) == \
+        list(np.searchsorted(time_base.get_times(), times, side=side))
+
+
+def test_truncate_keeps_samples_up_to_time():
+    time_base = TimeBase(start=0.0, sampling_frequency=10, sample_count=50)
+
+    assert time_base.truncate(1).sample_count == 11
+    assert time_base.truncate(1.05).sample_count == 11
+    assert time_base.truncate(10).sample_count == 50
+
+
+def test_describe_times_keeps_times_that_are_not_sampled_uniformly():
+    uniform_times = np.arange(10) / 1000
+    times = np.array([0, 0.5, 1, 1.6, 2])
+
+    sampled_times = describe_times(times)
+
+    assert isinstance(describe_times(uniform_times), TimeBase)
+    assert isinstance(sampled_times, SampledTimes)
+    assert sampled_times.start == 0
+    assert sampled_times.sampling_frequency == 2
+    assert sampled_times.sample_count == 5
+    assert sampled_times.stop == 2
+    assert list(sampled_times.get_times(1, 3)) == [0.5, 1]
+    assert list(sampled_times.get_times_at([3])) == [1.6]
+    assert list(sampled_times.find_indices([1, 1.2], side='right')) == [3, 3]
+    assert list(sampled_times.truncate(1.6).get_times()) == [0, 0.5, 1, 1.6]
+    assert list(np.asarray(sampled_times)) == list(times)
@@ -0,0 +1,81 @@
+import pytest
+import numpy as np
+from scipy.interpolate import interp1d
+from snn_hfo_detection.functions.filter import butter_bandpass_filter
+from snn_hfo_detection.functions.signal_to_spike.default import signal_to_spike
+from snn_hfo_detection.functions.signal_to_spike.utility import find_thresholds, get_sampling_frequency, SignalToSpikeParameters
+from snn_hfo_detection.stages.loading.folder_discovery import get_interval_paths
+from snn_hfo_detection.stages.loading.patient_data import load_patient_data
+from tests.integration.utility import get_hfo_directory
+
+
+def _reference_signal_to_spike(parameters):
+    # The original implementation, which materializes the whole upsampled signal
+    actual_dc = 0
+    spike_up = []
+    spike_dn = []
+
+    intepolated_time = interp1d(parameters.times, parameters.signal)
+    rangeint = np.round(
+        (np.max(parameters.times) - np.min(parameters.times))*parameters.interpolation_factor)
+    xnew = np.linspace(np.min(parameters.times), np.max(
+        parameters.times), num=int(rangeint), endpoint=True)
+    data = np.reshape([xnew, intepolated_time(xnew)], (2, len(xnew))).T
+
+    i = 0
+    while i < (len(data)):
+        if (actual_dc + parameters.threshold_up) < data[i, 1]:
+            spike_up.append(data[i, 0])
+            actual_dc = data[i, 1]
+            i += int(parameters.refractory_period *
+                     parameters.interpolation_factor)
+        elif (actual_dc - parameters.threshold_down) > data[i, 1]:
+            spike_dn.append(data[i, 0])
+            actual_dc = data[i, 1]
+            i += int(parameters.refractory_period *
+                     parameters.interpolation_factor)
+        else:
+            i += 1
+    return spike_up, spike_dn
+
+
+def _generate_parameters(dataset_name, lowcut, highcut, refractory_period):
+    interval_path = next(iter(get_interval_paths(
+        get_hfo_directory(dataset_name)).values()))
+    patient_data = load_patient_data(interval_path)
+    times = patient_data.signal_time
+    signal = butter_bandpass_filter(data=patient_data.wideband_signals[0],
+                                    lowcut=lowcut,
+                                    highcut=highcut,
+                                    sampling_frequency=get_sampling_frequency(
+                                        times),
+                                    order=2)
+    threshold = np.ceil(find_thresholds(signals=signal,
+                                        times=times,
+                                        window_size=0.5,
+                                        sample_ratio=1/6,
+                                        scaling_factor=0.3))
+    return SignalToSpikeParameters(
+        signal=signal,
+        threshold_up=threshold,
+        threshold_down=threshold,
+        times=times,
+        refractory_period=refractory_period,
+        interpolation_factor=35_000)
+
+
+@pytest.mark.parametrize('dataset_name', ['ieeg', 'ecog', 'scalp'])
+@pytest.mark.parametrize(
+    'lowcut, highcut, refractory_period',
+    [(80, 250, 3e-4),
+     (250, 500, 3e-4),
+     (500, 900, 1e-3)]
+)
+def test_default_signal_to_spike_matches_original_implementation(dataset_name, lowcut, highcut, refractory_period):
+    parameters = _generate_parameters(
+        dataset_name, lowcut, highcut, refractory_period)
+    expected_up, expected_down = _reference_signal_to_spike(parameters)
+    spike_trains = signal_to_spike(parameters)
+    assert len(expected_up) != 0 and len(expected_down) != 0
+    np.testing.assert_array_equal(spike_trains.up, expected_up)
+    np.testing.assert_array_equal(spike_trains.down, expected_down)
@@ -1,12 +1,9 @@
 import pytest
-from snn_hfo_detection.plotting.persistence import PlotMode
 from snn_hfo_detection.user_facing_data import HfoDetection, Periods, Analytics, HfoDetectionWithAnalytics
-from snn_hfo_detection.user_facing_data import Configuration, MeasurementMode
+from snn_hfo_detection.user_facing_data import MeasurementMode
 from snn_hfo_detection.entrypoint.hfo_detection import run_hfo_detection_with_configuration
-from snn_hfo_detection.plotting.plot_loader import PlottingFunctions
-from snn_hfo_detection.functions.signal_to_spike.selector import SignalToSpikeAlgorithm
 from tests.utility import assert_are_hfo_detections_equal
-from tests.integration.utility import get_hfo_directory, EMPTY_CUSTOM_OVERRIDES
+from tests.integration.utility import generate_test_configuration, EMPTY_CUSTOM_OVERRIDES
 
 
 # Empirical values
@@ -14,25 +11,6 @@ PERIOD_ACCURACY = 1.5
 FREQUENCY_ACCURACY = 0.042
 
 
-def _generate_test_configuration(dataset_name, measurement_mode=MeasurementMode.IEEG,):
-    return Configuration(
-        data_path=get_hfo_directory(dataset_name),
-        measurement_mode=measurement_mode,
-        hidden_neuron_count=86,
-        calibration_time=10,
-        plots=PlottingFunctions(
-            channel=[],
-            patient=[]
-        ),
-        disable_saving=True,
-        saving_path=None,
-        loading_path=None,
-        plot_mode=PlotMode.SAVE,
-        plot_path='plots/',
-        signal_to_spike_algorithm=SignalToSpikeAlgorithm.DEFAULT
-    )
-
-
 def _assert_dummy_hfo_is_empty(hfo_detection_run):
     expected_hfo_detection = HfoDetectionWithAnalytics(
         result=HfoDetection(
@@ -56,7 +34,7 @@ def _assert_dummy_hfo_is_empty(hfo_detection_run):
 
 def test_dummy_data():
     run_hfo_detection_with_configuration(
-        configuration=_generate_test_configuration('dummy'),
+        configuration=generate_test_configuration('dummy'),
         custom_overrides=EMPTY_CUSTOM_OVERRIDES,
         hfo_cb=_assert_dummy_hfo_is_empty)
 
@@ -78,7 +56,7 @@ def _generate_add_detected_hfo_to_list_cb(detected_hfos):
 def test_hfo_detection_frequency(dataset, measurement_mode, frequency):
     detected_hfos = []
     run_hfo_detection_with_configuration(
-        configuration=_generate_test_configuration(dataset, measurement_mode),
+        configuration=generate_test_configuration(dataset, measurement_mode),
         custom_overrides=EMPTY_CUSTOM_OVERRIDES,
         hfo_cb=_generate_add_detected_hfo_to_list_cb(detected_hfos))
     assert len(detected_hfos) == 1
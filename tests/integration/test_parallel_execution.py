@@ -0,0 +1,101 @@
+import json
+import os
+import numpy as np
+from snn_hfo_detection.entrypoint.hfo_detection import run_hfo_detection_with_configuration, CustomOverrides
+from snn_hfo_detection.stages.all import run_all_hfo_detection_stages
+from snn_hfo_detection.stages.loading.patient_data import extract_channel_data, load_patient_data
+from snn_hfo_detection.user_facing_data import MeasurementMode, Metadata
+from tests.utility import assert_are_lists_approximately_equal
+from tests.integration.utility import generate_test_configuration
+
+SHORT_CUSTOM_OVERRIDES = CustomOverrides(
+    duration=2,
+    channels=None,
+    intervals=None,
+    shard=None,
+)
+
+
+def _run_and_collect(configuration):
+    hfo_detection_runs = []
+
+    def collect(hfo_detection_run):
+        hfo_detection_run.detector.run()
+        hfo_detection_runs.append(hfo_detection_run)
+
+    run_hfo_detection_with_configuration(
+        configuration=configuration,
+        custom_overrides=SHORT_CUSTOM_OVERRIDES,
+        hfo_cb=collect)
+    return hfo_detection_runs
+
+
+def test_parallel_run_matches_sequential_run():
+    configuration = generate_test_configuration('ieeg')._replace(seed=42)
+    sequential_runs = _run_and_collect(configuration)
+    parallel_runs = _run_and_collect(configuration._replace(jobs=2))
+
+    assert len(sequential_runs) == len(parallel_runs)
+    for sequential_run, parallel_run in zip(sequential_runs, parallel_runs):
+        assert sequential_run.metadata == parallel_run.metadata
+        sequential_analytics = sequential_run.detector.last_run.analytics
+        parallel_analytics = parallel_run.detector.last_run.analytics
+        assert_are_lists_approximately_equal(
+            sequential_analytics.spike_times, parallel_analytics.spike_times)
+        assert_are_lists_approximately_equal(
+            sequential_analytics.neuron_ids, parallel_analytics.neuron_ids)
+
+
+def test_channel_does_not_depend_on_previously_simulated_channels():
+    # The Poisson input of the artifact filter draws random numbers while simulating,
+    # so a worker's result must not depend on which channels it simulated before
+    configuration = generate_test_configuration(
+        'ecog', measurement_mode=MeasurementMode.ECOG)._replace(seed=42)
+    patient_data = load_patient_data(
+        os.path.join(configuration.data_path, 'I1.mat'))
+    metadata = Metadata(interval=1, channel=1, channel_label='foo', duration=10)
+    snn_caches = {}
+
+    def run():
+        return run_all_hfo_detection_stages(metadata=metadata,
+                                            channel_data=extract_channel_data(
+                                                patient_data, 0),
+                                            duration=metadata.duration,
+                                            configuration=configuration,
+                                            snn_caches=snn_caches)
+
+    first_hfo_detection = run()
+    second_hfo_detection = run()
+
+    assert first_hfo_detection.result == second_hfo_detection.result
+    assert np.array_equal(first_hfo_detection.analytics.detections.to_mask(),
+                          second_hfo_detection.analytics.detections.to_mask())
+
+
+def test_parallel_run_keeps_channel_order():
+    configuration = generate_test_configuration('dummy')._replace(jobs=3)
+    channels = [hfo_detection_run.metadata.channel
+                for hfo_detection_run in _run_and_collect(configuration)]
+    assert channels == list(range(1, 11))
+
+
+def test_pipelined_run_matches_sequential_run(tmp_path):
+    configuration = generate_test_configuration('dummy')._replace(seed=42)
+    sequential_runs = _run_and_collect(configuration)
+    metrics_path = tmp_path / 'metrics.json'
+    pipelined_runs = _run_and_collect(configuration._replace(
+        pipeline_depth=2, pipeline_metrics_path=str(metrics_path)))
+
+    assert len(sequential_runs) == len(pipelined_runs)
+    for sequential_run, pipelined_run in zip(sequential_runs, pipelined_runs):
+        assert sequential_run.metadata == pipelined_run.metadata
+        sequential_analytics = sequential_run.detector.last_run.analytics
+        pipelined_analytics = pipelined_run.detector.last_run.analytics
+        assert_are_lists_approximately_equal(
+            sequential_analytics.spike_times, pipelined_analytics.spike_times)
+        assert_are_lists_approximately_equal(
+            sequential_analytics.neuron_ids, pipelined_analytics.neuron_ids)
+
+    stage_names = [stage_metrics['name']
+                   for stage_metrics in json.loads(metrics_path.read_text())]
+    assert stage_names == ['loading', 'filter', 'snn', 'detection', 'saving']
@@ -0,0 +1,24 @@
+from snn_hfo_detection.entrypoint.hfo_detection import run_hfo_detection_with_configuration
+from tests.integration.utility import generate_test_configuration
+from tests.integration.test_parallel_execution import SHORT_CUSTOM_OVERRIDES
+
+
+def test_profile_is_written_for_every_stage_and_channel(tmp_path):
+    run_hfo_detection_with_configuration(
+        configuration=generate_test_configuration('dummy')._replace(
+            seed=42,
+            disable_saving=False,
+            saving_path=str(tmp_path / 'saved'),
+            profile_path=str(tmp_path / 'profile')),
+        custom_overrides=SHORT_CUSTOM_OVERRIDES._replace(channels=[1, 2]),
+        hfo_cb=lambda hfo_detection_run: hfo_detection_run.detector.run())
+
+    interval_directory = tmp_path / 'profile' / 'I1'
+    assert (interval_directory / 'loading.pstats').is_file()
+    for channel in [1, 2]:
+        channel_directory = interval_directory / f'C{channel}'
+        for stage in ['filter', 'snn', 'detection', 'saving']:
+            assert (channel_directory / f'{stage}.pstats').is_file()
+        network_profile = (channel_directory / 'snn_network.txt').read_text()
+        assert 'hidden' in network_profile
+        assert 'output' in network_profile
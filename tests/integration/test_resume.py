@@ -0,0 +1,62 @@
+import pytest
+from snn_hfo_detection.entrypoint import hfo_detection
+from snn_hfo_detection.entrypoint.hfo_detection import run_hfo_detection_with_configuration
+from tests.integration.utility import generate_test_configuration, EMPTY_CUSTOM_OVERRIDES
+
+
+def _run_and_collect_results(configuration):
+    results = []
+
+    def collect(hfo_detection_run):
+        results.append((hfo_detection_run.metadata,
+                        hfo_detection_run.detector.run()))
+
+    run_hfo_detection_with_configuration(
+        configuration=configuration,
+        custom_overrides=EMPTY_CUSTOM_OVERRIDES,
+        hfo_cb=collect)
+    return results
+
+
+def _fail_when_analyzing(*_args, **_kwargs):
+    pytest.fail('Already finished channels must not be analyzed again')
+
+
+def test_resumed_run_reuses_saved_results(tmp_path, monkeypatch):
+    configuration = generate_test_configuration('dummy')._replace(
+        disable_saving=False,
+        saving_path=str(tmp_path),
+        seed=42,
+        resume=True)
+    first_results = _run_and_collect_results(configuration)
+
+    monkeypatch.setattr(hfo_detection, 'run_all_hfo_detection_stages',
+                        _fail_when_analyzing)
+    resumed_results = _run_and_collect_results(configuration)
+
+    assert len(resumed_results) == len(first_results)
+    for (first_metadata, first_result), (resumed_metadata, resumed_result) in zip(first_results, resumed_results):
+        assert first_metadata == resumed_metadata
+        assert first_result.frequency == resumed_result.frequency
+        assert first_result.total_amount == resumed_result.total_amount
+
+
+def test_changed_configuration_is_not_resumed(tmp_path, monkeypatch):
+    configuration = generate_test_configuration('dummy')._replace(
+        disable_saving=False,
+        saving_path=str(tmp_path),
+        seed=42,
+        resume=True)
+    _run_and_collect_results(configuration)
+
+    analyzed_channels = []
+    run_all_hfo_detection_stages = hfo_detection.run_all_hfo_detection_stages
+
+    def count_analyzed_channels(metadata, **kwargs):
+        analyzed_channels.append(metadata.channel)
+        return run_all_hfo_detection_stages(metadata=metadata, **kwargs)
+
+    monkeypatch.setattr(hfo_detection, 'run_all_hfo_detection_stages',
+                        count_analyzed_channels)
+    _run_and_collect_results(configuration._replace(seed=43))
+    assert analyzed_channels == list(range(1, 11))
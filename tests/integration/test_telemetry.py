@@ -0,0 +1,36 @@
+import json
+import pytest
+from snn_hfo_detection.entrypoint.hfo_detection import run_hfo_detection_with_configuration
+from tests.integration.utility import generate_test_configuration
+from tests.integration.test_parallel_execution import SHORT_CUSTOM_OVERRIDES
+
+DUMMY_CHANNEL_COUNT = 10
+
+
+def _run(configuration):
+    run_hfo_detection_with_configuration(
+        configuration=configuration,
+        custom_overrides=SHORT_CUSTOM_OVERRIDES,
+        hfo_cb=lambda hfo_detection_run: hfo_detection_run.detector.run())
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_telemetry_report_covers_every_step(tmp_path, jobs):
+    telemetry_path = tmp_path / 'telemetry.json'
+    prometheus_path = tmp_path / 'metrics.prom'
+    _run(generate_test_configuration('dummy')._replace(
+        seed=42,
+        jobs=jobs,
+        telemetry_path=str(telemetry_path),
+        prometheus_path=str(prometheus_path)))
+
+    report = json.loads(telemetry_path.read_text())
+    for stage in ['loading', 'filter.ripple.bandpass', 'filter.fast_ripple.signal_to_spike',
+                  'snn.build', 'snn.restore', 'snn.run', 'detection']:
+        assert stage in report['stages']
+    assert report['stages']['snn.run']['count'] == DUMMY_CHANNEL_COUNT
+    assert len(report['channels']) == DUMMY_CHANNEL_COUNT
+    assert sum(channel['input_spike_count'] for channel in report['channels']) > 0
+    for channel in report['channels']:
+        assert channel['realtime_factor'] > 0
+    assert 'snn_hfo_detection_stage_wall_seconds{stage="snn.run"}' in prometheus_path.read_text()
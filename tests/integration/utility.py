@@ -1,14 +1,38 @@
 import os
+from snn_hfo_detection.plotting.persistence import PlotMode
+from snn_hfo_detection.user_facing_data import Configuration, MeasurementMode
 from snn_hfo_detection.entrypoint.hfo_detection import CustomOverrides
+from snn_hfo_detection.plotting.plot_loader import PlottingFunctions
+from snn_hfo_detection.functions.signal_to_spike.selector import SignalToSpikeAlgorithm
 from tests.utility import get_tests_path
 
 EMPTY_CUSTOM_OVERRIDES = CustomOverrides(
     duration=None,
     channels=None,
     intervals=None,
+    shard=None,
 )
 
 
 def get_hfo_directory(dataset_name):
     tests_path = get_tests_path()
     return os.path.join(tests_path, 'integration', 'data', dataset_name)
+
+
+def generate_test_configuration(dataset_name, measurement_mode=MeasurementMode.IEEG,):
+    return Configuration(
+        data_path=get_hfo_directory(dataset_name),
+        measurement_mode=measurement_mode,
+        hidden_neuron_count=86,
+        calibration_time=10,
+        plots=PlottingFunctions(
+            channel=[],
+            patient=[]
+        ),
+        disable_saving=True,
+        saving_path=None,
+        loading_path=None,
+        plot_mode=PlotMode.SAVE,
+        plot_path='plots/',
+        signal_to_spike_algorithm=SignalToSpikeAlgorithm.DEFAULT
+    )
@@ -0,0 +1,32 @@
+from types import SimpleNamespace
+import matplotlib
+from snn_hfo_detection.plotting.plot_patient import plot_mean_hfo_rate
+from snn_hfo_detection.user_facing_data import ChannelSummary, HfoDetection, Metadata, PatientSummary, PlotMode
+
+matplotlib.use('Agg')
+
+
+def _summarize(interval, channel, frequency):
+    return ChannelSummary(
+        metadata=Metadata(interval=interval, channel=channel,
+                          channel_label=f'C{channel}', duration=10),
+        result=HfoDetection(frequency=frequency, total_amount=1))
+
+
+def test_mean_hfo_rate_is_saved_to_plot_path(tmp_path):
+    configuration = SimpleNamespace(
+        plot_path=str(tmp_path), plot_mode=PlotMode.SAVE)
+    plot_mean_hfo_rate(PatientSummary(
+        intervals={1: [_summarize(1, 1, 0.1), _summarize(1, 2, 0.2)],
+                   2: [_summarize(2, 1, 0.3), _summarize(2, 2, 0.4)]},
+        configuration=configuration))
+
+    assert (tmp_path / 'mean_hfo_rate.png').is_file()
+
+
+def test_mean_hfo_rate_is_not_plotted_without_channels(tmp_path):
+    configuration = SimpleNamespace(
+        plot_path=str(tmp_path), plot_mode=PlotMode.SAVE)
+    plot_mean_hfo_rate(PatientSummary(intervals={}, configuration=configuration))
+
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,88 @@
+import h5py
+import numpy as np
+import pytest
+import scipy.io as sio
+from snn_hfo_detection.stages.loading.mat_file import MatFormat, detect_mat_format, read_channel_count, read_mat_variables
+
+_CHANNELS = np.arange(24, dtype=float).reshape(3, 8)
+_TIMES = np.arange(8) / 4
+_CHANNEL_LABELS = ['A1', 'B2', 'C3']
+
+
+def _write_v5_file(path, channels=_CHANNELS, do_compression=False):
+    sio.savemat(path, {'times': _TIMES, 'channels': channels,
+                       'channel_labels': np.array(_CHANNEL_LABELS)},
+                do_compression=do_compression)
+
+
+def _write_v73_file(path):
+    with h5py.File(path, 'w', userblock_size=512) as file:
+        # MATLAB stores matrices column major, which transposes them in HDF5
+        file.create_dataset('channels', data=_CHANNELS.T, chunks=True)
+        file.create_dataset('times', data=_TIMES[:, np.newaxis])
+        file.create_dataset('channel_labels', data=np.array(
+            [[ord(char) for char in label] for label in _CHANNEL_LABELS], dtype=np.uint16).T)
+        for name in ['channels', 'times']:
+            file[name].attrs['MATLAB_class'] = np.bytes_('double')
+        file['channel_labels'].attrs['MATLAB_class'] = np.bytes_('char')
+    with open(path, 'r+b') as file:
+        file.write(b'MATLAB 7.3 MAT-file'.ljust(116) +
+                   bytes(8) + b'\x00\x02' + b'IM')
+
+
+def _assert_has_test_variables(variables):
+    assert len(variables.channels) == 3
+    assert list(variables.channels[1]) == list(_CHANNELS[1])
+    assert np.array_equal(variables.channels[[2, 0]], _CHANNELS[[2, 0]])
+    assert list(variables.times) == list(_TIMES)
+    assert list(variables.channel_labels) == _CHANNEL_LABELS
+
+
+@pytest.mark.parametrize('do_compression', [False, True])
+def test_v5_files_are_read(tmp_path, do_compression):
+    path = str(tmp_path / 'I1.mat')
+    _write_v5_file(path, do_compression=do_compression)
+
+    variables = read_mat_variables(path)
+
+    assert detect_mat_format(path) == MatFormat.V5
+    assert isinstance(variables.channels, np.memmap) != do_compression
+    _assert_has_test_variables(variables)
+    assert read_channel_count(path) == 3
+
+
+def test_v5_integer_channels_are_read(tmp_path):
+    path = str(tmp_path / 'I1.mat')
+    _write_v5_file(path, channels=_CHANNELS.astype(np.int16))
+
+    variables = read_mat_variables(path)
+
+    _assert_has_test_variables(variables)
+
+
+def test_v73_channels_are_read_when_indexed(tmp_path):
+    path = str(tmp_path / 'I1.mat')
+    _write_v73_file(path)
+
+    variables = read_mat_variables(path)
+
+    assert detect_mat_format(path) == MatFormat.V73
+    assert variables.channels.shape == (3, 8)
+    _assert_has_test_variables(variables)
+    assert list(variables.channels[-2]) == list(_CHANNELS[1])
+    with pytest.raises(IndexError):
+        _ = variables.channels[3]
+    assert read_channel_count(path) == 3
+
+
+def test_v73_channels_read_before_closing_stay_available(tmp_path):
+    path = str(tmp_path / 'I1.mat')
+    _write_v73_file(path)
+    variables = read_mat_variables(path)
+    channel = variables.channels[1]
+
+    variables.channels.close()
+
+    assert list(channel) == list(_CHANNELS[1])
+    with pytest.raises(OSError):
+        _ = variables.channels[1]
@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+from snn_hfo_detection.stages.loading.patient_data import extract_channel_data
+from snn_hfo_detection.user_facing_data import PatientData, TimeBase
+
+
+def test_channel_data_shares_read_only_memory():
+    patient_data = PatientData(wideband_signals=np.arange(6, dtype=float).reshape(2, 3),
+                               time_base=TimeBase(
+                                   start=0.0, sampling_frequency=2.0, sample_count=3),
+                               channel_labels=np.array(['A', 'B']))
+
+    channel_data = extract_channel_data(patient_data, 1)
+
+    assert list(channel_data.wideband_signal) == [3, 4, 5]
+    assert np.shares_memory(channel_data.wideband_signal,
+                            patient_data.wideband_signals)
+    assert channel_data.time_base is patient_data.time_base
+    assert list(channel_data.signal_time) == [0, 0.5, 1]
+    with pytest.raises(ValueError):
+        channel_data.wideband_signal[0] = 0
+    # The patient data itself stays writeable
+    patient_data.wideband_signals[1, 0] = 0.1
@@ -0,0 +1,33 @@
+from snn_hfo_detection.stages.persistence.calibration import CalibrationKey, load_threshold, save_threshold
+
+CALIBRATION_KEY = CalibrationKey(
+    file_hash='0123456789abcdef',
+    channel=3,
+    lowcut=80,
+    highcut=250,
+    scaling_factor=0.6,
+    calibration_time=10)
+
+
+def test_saved_threshold_can_be_loaded(tmp_path):
+    save_threshold(str(tmp_path), CALIBRATION_KEY, 17.0)
+    assert load_threshold(str(tmp_path), CALIBRATION_KEY) == 17.0
+
+
+def test_threshold_of_other_key_is_not_loaded(tmp_path):
+    save_threshold(str(tmp_path), CALIBRATION_KEY, 17.0)
+    assert load_threshold(
+        str(tmp_path), CALIBRATION_KEY._replace(channel=4)) is None
+    assert load_threshold(
+        str(tmp_path), CALIBRATION_KEY._replace(scaling_factor=0.3)) is None
+
+
+def test_missing_cache_loads_nothing(tmp_path):
+    assert load_threshold(str(tmp_path / 'missing'), CALIBRATION_KEY) is None
+
+
+def test_saving_threshold_again_overwrites_it(tmp_path):
+    save_threshold(str(tmp_path), CALIBRATION_KEY, 17.0)
+    save_threshold(str(tmp_path), CALIBRATION_KEY, 18.0)
+    assert load_threshold(str(tmp_path), CALIBRATION_KEY) == 18.0
+    assert len(list(tmp_path.iterdir())) == 1
@@ -1,9 +1,12 @@
+import os
 from shutil import rmtree
+import pytest
 import numpy as np
-from snn_hfo_detection.user_facing_data import Analytics, FilteredSpikes, HfoDetection, HfoDetectionWithAnalytics, Periods, SpikeTrains
+from snn_hfo_detection.user_facing_data import Analytics, Detections, FilteredSpikes, HfoDetection, HfoDetectionWithAnalytics, Periods, SpikeTrains
 from snn_hfo_detection.stages.persistence.saving import save_hfo_detection
-from snn_hfo_detection.stages.persistence.loading import load_hfo_detection
-from snn_hfo_detection.entrypoint.hfo_detection import Metadata
+from snn_hfo_detection.stages.persistence.loading import load_hfo_detection, load_fingerprint
+from snn_hfo_detection.stages.persistence.utility import get_persistence_path
+from snn_hfo_detection.user_facing_data import Metadata, PersistenceFormat
 from tests.utility import assert_are_hfo_detections_equal
 
 SAVED_HFO_DETECTION = HfoDetectionWithAnalytics(
@@ -12,7 +15,7 @@ SAVED_HFO_DETECTION = HfoDetectionWithAnalytics(
         total_amount=2.0,
     ),
     analytics=Analytics(
-        detections=np.array([True, True, False]),
+        detections=Detections.from_mask([True, True, False]),
         periods=Periods(
             start=np.array([1, 2]),
             stop=np.array([1.5, 3])
@@ -35,17 +38,20 @@ METADATA = Metadata(
     channel_label='foo',
 )
 
-SAVING_PATH = 'output_from_test_saved_can_be_loaded/'
 
+def _get_saving_path(tmp_path):
+    return str(tmp_path / 'saved')
 
-def _assert_saved_can_be_loaded():
+
+def _assert_saved_can_be_loaded(saving_path, saving_format):
     save_hfo_detection(
         user_facing_hfo_detection=SAVED_HFO_DETECTION,
-        saving_path=SAVING_PATH,
-        metadata=METADATA
+        saving_path=saving_path,
+        metadata=METADATA,
+        saving_format=saving_format
     )
     loaded_hfo_detection = load_hfo_detection(
-        loading_path=SAVING_PATH,
+        loading_path=saving_path,
         metadata=METADATA
     )
 
@@ -53,8 +59,95 @@ def _assert_saved_can_be_loaded():
         SAVED_HFO_DETECTION, loaded_hfo_detection)
 
 
-def test_saved_can_be_loaded():
-    try:
-        _assert_saved_can_be_loaded()
-    finally:
-        rmtree(SAVING_PATH)
+@pytest.mark.parametrize('saving_format', list(PersistenceFormat))
+def test_saved_can_be_loaded(tmp_path, saving_format):
+    _assert_saved_can_be_loaded(_get_saving_path(tmp_path), saving_format)
+
+
+def test_saving_in_another_format_replaces_old_save(tmp_path):
+    saving_path = _get_saving_path(tmp_path)
+    _assert_saved_can_be_loaded(saving_path, PersistenceFormat.NUMPY)
+    _assert_saved_can_be_loaded(saving_path, PersistenceFormat.JSON)
+    loaded_hfo_detection = load_hfo_detection(
+        loading_path=saving_path,
+        metadata=METADATA
+    )
+    assert isinstance(loaded_hfo_detection.analytics.spike_times, list)
+
+
+def test_numpy_format_stores_arrays_natively(tmp_path):
+    saving_path = _get_saving_path(tmp_path)
+    _assert_saved_can_be_loaded(saving_path, PersistenceFormat.NUMPY)
+    loaded_hfo_detection = load_hfo_detection(
+        loading_path=saving_path,
+        metadata=METADATA
+    )
+    assert isinstance(loaded_hfo_detection.analytics.detections.start, np.ndarray)
+    assert np.asarray(loaded_hfo_detection.analytics.detections).dtype == np.bool_
+    assert loaded_hfo_detection.analytics.filtered_spikes.ripple is None
+    # The loaded arrays map the saved files, which cannot be deleted on Windows while they are open
+    del loaded_hfo_detection
+
+
+@pytest.mark.parametrize('saving_format', list(PersistenceFormat))
+def test_loaded_result_does_not_need_analytics(tmp_path, saving_format):
+    saving_path = _get_saving_path(tmp_path)
+    save_hfo_detection(
+        user_facing_hfo_detection=SAVED_HFO_DETECTION,
+        saving_path=saving_path,
+        metadata=METADATA,
+        saving_format=saving_format
+    )
+    loaded_hfo_detection = load_hfo_detection(
+        loading_path=saving_path,
+        metadata=METADATA
+    )
+    rmtree(saving_path)
+    assert loaded_hfo_detection.result.frequency == SAVED_HFO_DETECTION.result.frequency
+    assert loaded_hfo_detection.result.total_amount == SAVED_HFO_DETECTION.result.total_amount
+    with pytest.raises(FileNotFoundError):
+        _ = loaded_hfo_detection.analytics.spike_times
+
+
+@pytest.mark.parametrize('saving_format', list(PersistenceFormat))
+def test_saved_fingerprint_can_be_loaded(tmp_path, saving_format):
+    saving_path = _get_saving_path(tmp_path)
+    assert load_fingerprint(saving_path, METADATA) is None
+    save_hfo_detection(
+        user_facing_hfo_detection=SAVED_HFO_DETECTION,
+        saving_path=saving_path,
+        metadata=METADATA,
+        saving_format=saving_format,
+        fingerprint='0123456789abcdef'
+    )
+    assert load_fingerprint(saving_path, METADATA) == '0123456789abcdef'
+    assert_are_hfo_detections_equal(
+        SAVED_HFO_DETECTION, load_hfo_detection(saving_path, METADATA))
+
+
+def test_partially_written_json_has_no_fingerprint(tmp_path):
+    saving_path = _get_saving_path(tmp_path)
+    save_hfo_detection(
+        user_facing_hfo_detection=SAVED_HFO_DETECTION,
+        saving_path=saving_path,
+        metadata=METADATA,
+        fingerprint='0123456789abcdef'
+    )
+    filepath = get_persistence_path(saving_path, METADATA)
+    with open(filepath, 'r+') as file:
+        file.truncate(os.path.getsize(filepath) - 1)
+    assert load_fingerprint(saving_path, METADATA) is None
+
+
+def test_detections_saved_as_list_can_be_loaded(tmp_path):
+    saving_path = _get_saving_path(tmp_path)
+    save_hfo_detection(
+        user_facing_hfo_detection=SAVED_HFO_DETECTION._replace(
+            analytics=SAVED_HFO_DETECTION.analytics._replace(detections=[True, True, False])),
+        saving_path=saving_path,
+        metadata=METADATA
+    )
+    loaded_detections = load_hfo_detection(
+        saving_path, METADATA).analytics.detections
+    assert isinstance(loaded_detections, Detections)
+    assert list(loaded_detections.to_mask()) == [True, True, False]
@@ -0,0 +1,57 @@
+import os
+import time
+import numpy as np
+from snn_hfo_detection.functions.signal_to_spike.utility import SpikeTrains
+from snn_hfo_detection.stages.persistence.spike_cache import SpikeCache, SpikeCacheKey, load_spike_trains, save_spike_trains
+
+SPIKE_CACHE_KEY = SpikeCacheKey(
+    channel_hash='0123456789abcdef',
+    sampling_frequency=2000.0,
+    lowcut=80,
+    highcut=250,
+    filter_order=2,
+    threshold=17.0,
+    refractory_period=3e-4,
+    interpolation_factor=35_000,
+    signal_to_spike_algorithm='DEFAULT')
+
+SPIKE_TRAINS = SpikeTrains(
+    up=np.array([0.1, 0.5, 1.2]),
+    down=np.array([0.3]))
+
+# Fits the spike trains of two keys, but not of three
+SMALL_CACHE_SIZE = 1.2e-3
+
+
+def _assert_are_spike_trains_equal(first_spike_trains, second_spike_trains):
+    np.testing.assert_array_equal(first_spike_trains.up, second_spike_trains.up)
+    np.testing.assert_array_equal(
+        first_spike_trains.down, second_spike_trains.down)
+
+
+def test_cached_spike_trains_can_be_loaded(tmp_path):
+    spike_cache = SpikeCache(path=str(tmp_path), max_size=1)
+    assert load_spike_trains(spike_cache, SPIKE_CACHE_KEY) is None
+    save_spike_trains(spike_cache, SPIKE_CACHE_KEY, SPIKE_TRAINS)
+    _assert_are_spike_trains_equal(
+        SPIKE_TRAINS, load_spike_trains(spike_cache, SPIKE_CACHE_KEY))
+    assert load_spike_trains(
+        spike_cache, SPIKE_CACHE_KEY._replace(threshold=18.0)) is None
+
+
+def test_least_recently_used_spike_trains_are_evicted(tmp_path):
+    spike_cache = SpikeCache(path=str(tmp_path), max_size=SMALL_CACHE_SIZE)
+    first_key = SPIKE_CACHE_KEY._replace(threshold=1.0)
+    second_key = SPIKE_CACHE_KEY._replace(threshold=2.0)
+    third_key = SPIKE_CACHE_KEY._replace(threshold=3.0)
+    save_spike_trains(spike_cache, first_key, SPIKE_TRAINS)
+    save_spike_trains(spike_cache, second_key, SPIKE_TRAINS)
+    past = time.time() - 60
+    for filename in os.listdir(tmp_path):
+        os.utime(os.path.join(tmp_path, filename), (past, past))
+    assert load_spike_trains(spike_cache, first_key) is not None
+
+    save_spike_trains(spike_cache, third_key, SPIKE_TRAINS)
+    assert load_spike_trains(spike_cache, first_key) is not None
+    assert load_spike_trains(spike_cache, second_key) is None
+    assert load_spike_trains(spike_cache, third_key) is not None
@@ -0,0 +1,56 @@
+import threading
+import pytest
+from snn_hfo_detection.stages.persistence.writer import BackgroundWriter
+from snn_hfo_detection.telemetry import get_active_telemetry, record_telemetry
+
+
+def test_all_submitted_writes_are_done_after_flush():
+    written = []
+    with BackgroundWriter(max_pending_writes=2) as writer:
+        for index in range(10):
+            writer.submit(lambda index=index: written.append(index))
+        writer.flush()
+        assert written == list(range(10))
+
+
+def test_writes_run_on_another_thread():
+    writing_threads = []
+    with BackgroundWriter() as writer:
+        writer.submit(lambda: writing_threads.append(
+            threading.current_thread()))
+    assert writing_threads != [threading.current_thread()]
+    assert len(writing_threads) == 1
+
+
+def test_writes_run_in_context_of_submission():
+    telemetries = []
+    with record_telemetry() as telemetry:
+        with BackgroundWriter() as writer:
+            writer.submit(lambda: telemetries.append(get_active_telemetry()))
+    assert telemetries == [telemetry]
+
+
+def _fail():
+    raise IOError('disk full')
+
+
+def test_write_error_is_raised_on_flush():
+    writer = BackgroundWriter()
+    writer.submit(_fail)
+    with pytest.raises(IOError, match='disk full'):
+        writer.flush()
+    writer.close()
+
+
+def test_write_error_is_raised_when_leaving_context():
+    with pytest.raises(IOError, match='disk full'):
+        with BackgroundWriter() as writer:
+            writer.submit(_fail)
+
+
+def test_writes_after_close_run_right_away():
+    written = []
+    writer = BackgroundWriter()
+    writer.close()
+    writer.submit(lambda: written.append(threading.current_thread()))
+    assert written == [threading.current_thread()]
@@ -0,0 +1,29 @@
+from snn_hfo_detection.user_facing_data import MeasurementMode
+from snn_hfo_detection.stages.snn.cache import get_cache_key, get_or_create_cache
+from tests.integration.utility import generate_test_configuration
+
+
+def test_same_configuration_reuses_network():
+    caches = {}
+    configuration = generate_test_configuration('dummy')
+    first_cache = get_or_create_cache(caches, configuration)
+    second_cache = get_or_create_cache(caches, configuration)
+    assert first_cache is second_cache
+    assert len(caches) == 1
+
+
+def test_cache_key_ignores_parts_that_do_not_shape_the_network():
+    configuration = generate_test_configuration('dummy')
+    other_configuration = configuration._replace(
+        data_path='foo', calibration_time=42, disable_saving=False)
+    assert get_cache_key(configuration) == get_cache_key(other_configuration)
+
+
+def test_cache_key_differs_for_network_shaping_parts():
+    configuration = generate_test_configuration('dummy')
+    key = get_cache_key(configuration)
+    assert key != get_cache_key(configuration._replace(
+        measurement_mode=MeasurementMode.SCALP))
+    assert key != get_cache_key(
+        configuration._replace(hidden_neuron_count=42))
+    assert key != get_cache_key(configuration._replace(seed=42))
@@ -0,0 +1,111 @@
+import pytest
+import numpy as np
+from snn_hfo_detection.user_facing_data import ChannelData, MeasurementMode, TimeBase
+from snn_hfo_detection.stages import filter as filter_module
+from snn_hfo_detection.stages.filter import CalibrationSource, filter_stage, filter_wideband_signals, get_channel_filtered_signals
+from tests.integration.utility import generate_test_configuration
+
+SAMPLING_FREQUENCY = 2000
+SAMPLE_COUNT = 4000
+
+
+def _generate_channel_data():
+    random_number_generator = np.random.default_rng(42)
+    return ChannelData(
+        wideband_signal=random_number_generator.normal(
+            scale=20, size=SAMPLE_COUNT),
+        time_base=TimeBase(start=0.0, sampling_frequency=SAMPLING_FREQUENCY, sample_count=SAMPLE_COUNT))
+
+
+@pytest.mark.parametrize(
+    'measurement_mode, is_ripple_filtered, is_fast_ripple_filtered, is_above_fast_ripple_filtered',
+    [(MeasurementMode.IEEG, True, True, False),
+     (MeasurementMode.ECOG, False, True, False),
+     (MeasurementMode.SCALP, True, False, True)]
+)
+def test_only_needed_bandwidths_are_filtered(measurement_mode, is_ripple_filtered, is_fast_ripple_filtered, is_above_fast_ripple_filtered):
+    configuration = generate_test_configuration(
+        'dummy', measurement_mode=measurement_mode)
+    filtered_spikes = filter_stage(_generate_channel_data(), configuration)
+    assert (filtered_spikes.ripple is not None) == is_ripple_filtered
+    assert (filtered_spikes.fast_ripple is not None) == is_fast_ripple_filtered
+    assert (filtered_spikes.above_fast_ripple is not None) == is_above_fast_ripple_filtered
+
+
+def test_filtering_all_channels_at_once_matches_filtering_a_single_channel():
+    configuration = generate_test_configuration('dummy')
+    channel_data = _generate_channel_data()
+    wideband_signals = np.stack(
+        [np.zeros(SAMPLE_COUNT), channel_data.wideband_signal])
+    filtered_signals = get_channel_filtered_signals(filter_wideband_signals(
+        wideband_signals, channel_data.time_base, configuration), 1)
+
+    expected_spikes = filter_stage(channel_data, configuration)
+    actual_spikes = filter_stage(
+        channel_data, configuration, filtered_signals=filtered_signals)
+    assert actual_spikes.above_fast_ripple is None
+    for expected_bandwidth, actual_bandwidth in zip(expected_spikes[:2], actual_spikes[:2]):
+        np.testing.assert_array_equal(
+            expected_bandwidth.signal, actual_bandwidth.signal)
+        np.testing.assert_array_equal(
+            expected_bandwidth.spike_trains.up, actual_bandwidth.spike_trains.up)
+        np.testing.assert_array_equal(
+            expected_bandwidth.spike_trains.down, actual_bandwidth.spike_trains.down)
+
+
+def _assert_are_filtered_spikes_equal(first_spikes, second_spikes):
+    for first_bandwidth, second_bandwidth in zip(first_spikes, second_spikes):
+        if first_bandwidth is None:
+            assert second_bandwidth is None
+            continue
+        np.testing.assert_array_equal(
+            first_bandwidth.spike_trains.up, second_bandwidth.spike_trains.up)
+        np.testing.assert_array_equal(
+            first_bandwidth.spike_trains.down, second_bandwidth.spike_trains.down)
+
+
+def test_cached_thresholds_are_reused(tmp_path):
+    configuration = generate_test_configuration('dummy')._replace(
+        saving_path=str(tmp_path), cache_calibration=True)
+    calibration_source = CalibrationSource(
+        pinned_channel_data=None, file_hash='0123456789abcdef', channel=1)
+    expected_spikes = filter_stage(_generate_channel_data(), configuration)
+    first_spikes = filter_stage(
+        _generate_channel_data(), configuration, calibration_source=calibration_source)
+    second_spikes = filter_stage(
+        _generate_channel_data(), configuration, calibration_source=calibration_source)
+    assert len(list((tmp_path / 'calibration').iterdir())) == 2
+    _assert_are_filtered_spikes_equal(expected_spikes, first_spikes)
+    _assert_are_filtered_spikes_equal(expected_spikes, second_spikes)
+
+
+def test_pinned_thresholds_come_from_the_pinned_channel():
+    configuration = generate_test_configuration('dummy')
+    channel_data = _generate_channel_data()
+    pinned_to_itself = filter_stage(channel_data, configuration, calibration_source=CalibrationSource(
+        pinned_channel_data=channel_data, file_hash=None, channel=1))
+    _assert_are_filtered_spikes_equal(
+        filter_stage(channel_data, configuration), pinned_to_itself)
+
+    louder_channel_data = channel_data._replace(
+        wideband_signal=channel_data.wideband_signal * 10)
+    pinned_to_louder_channel = filter_stage(channel_data, configuration, calibration_source=CalibrationSource(
+        pinned_channel_data=louder_channel_data, file_hash=None, channel=1))
+    assert len(pinned_to_louder_channel.ripple.spike_trains.up) < len(
+        pinned_to_itself.ripple.spike_trains.up)
+
+
+def _fail_when_converting(*_args, **_kwargs):
+    pytest.fail('Cached spike trains must not be converted again')
+
+
+def test_cached_spike_trains_are_reused(tmp_path, monkeypatch):
+    configuration = generate_test_configuration('dummy')._replace(
+        spike_cache_path=str(tmp_path))
+    expected_spikes = filter_stage(_generate_channel_data(), configuration)
+    assert len(list(tmp_path.iterdir())) == 2
+
+    monkeypatch.setattr(filter_module, 'signal_to_spike',
+                        _fail_when_converting)
+    cached_spikes = filter_stage(_generate_channel_data(), configuration)
+    _assert_are_filtered_spikes_equal(expected_spikes, cached_spikes)
@@ -0,0 +1,44 @@
+import os
+import pstats
+import threading
+from snn_hfo_detection.profiling import profile_stage, record_profiles, should_profile
+from snn_hfo_detection.telemetry import channel_scope
+from snn_hfo_detection.user_facing_data import Metadata
+
+
+def _work():
+    return sum(range(1000))
+
+
+def test_profile_stage_does_nothing_without_profile_path(tmp_path):
+    with record_profiles(None):
+        assert not should_profile()
+        with profile_stage('filter'):
+            _work()
+    assert os.listdir(tmp_path) == []
+
+
+def test_profile_stage_writes_stats_of_channel_scope(tmp_path):
+    metadata = Metadata(interval=2, channel=3, channel_label='A', duration=1)
+    with record_profiles(str(tmp_path)):
+        with channel_scope(metadata):
+            with profile_stage('filter'):
+                _work()
+        with profile_stage('loading', interval=2):
+            _work()
+    assert not should_profile()
+
+    stats = pstats.Stats(str(tmp_path / 'I2' / 'C3' / 'filter.pstats'))
+    assert any(function_name == '_work' for _file, _line, function_name in stats.stats)
+    assert (tmp_path / 'I2' / 'loading.pstats').is_file()
+
+
+def test_profile_path_only_applies_to_its_own_context(tmp_path):
+    should_profile_in_thread = []
+    with record_profiles(str(tmp_path)):
+        thread = threading.Thread(
+            target=lambda: should_profile_in_thread.append(should_profile()))
+        thread.start()
+        thread.join()
+        assert should_profile()
+    assert should_profile_in_thread == [False]
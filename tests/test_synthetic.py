@@ -0,0 +1,65 @@
+import os
+import numpy as np
+from snn_hfo_detection.stages.loading.patient_data import load_patient_data
+from snn_hfo_detection.synthetic import SyntheticEvent, SyntheticRecordingSettings, generate_dataset, generate_recording, load_truth, score_detection
+from snn_hfo_detection.user_facing_data import Periods
+
+_SETTINGS = SyntheticRecordingSettings(
+    channel_count=3, duration=20, ripple_rate=1, fast_ripple_rate=0.5, artifact_rate=0.1, seed=3)
+
+
+def test_written_intervals_can_be_loaded(tmp_path):
+    paths = generate_dataset(str(tmp_path), 2, _SETTINGS)
+
+    assert [os.path.basename(path) for path in paths] == ['I1.mat', 'I2.mat']
+    patient_data = load_patient_data(paths[0])
+    expected_data, expected_events = generate_recording(
+        _SETTINGS._replace(seed=_SETTINGS.seed + 1))
+    assert np.allclose(patient_data.wideband_signals,
+                       expected_data.wideband_signals)
+    assert np.allclose(patient_data.signal_time, expected_data.signal_time)
+    assert list(patient_data.channel_labels) == ['SYN1', 'SYN2', 'SYN3']
+    assert load_truth(paths[0]) == expected_events
+
+
+def test_same_seed_generates_same_recording():
+    first_data, first_events = generate_recording(_SETTINGS)
+    second_data, second_events = generate_recording(_SETTINGS)
+    other_data, _other_events = generate_recording(_SETTINGS._replace(seed=4))
+
+    assert np.array_equal(first_data.wideband_signals,
+                          second_data.wideband_signals)
+    assert first_events == second_events
+    assert not np.array_equal(first_data.wideband_signals,
+                              other_data.wideband_signals)
+
+
+def test_hfos_have_at_least_four_cycles_and_do_not_overlap():
+    _patient_data, events = generate_recording(_SETTINGS)
+    hfos = [event for event in events if event.kind != 'artifact']
+
+    assert {event.kind for event in events} == {
+        'ripple', 'fast_ripple', 'artifact'}
+    for event in hfos:
+        assert (event.stop - event.start) * event.frequency >= 4 - 1e-9
+        expected_band = (80, 250) if event.kind == 'ripple' else (250, 500)
+        assert expected_band[0] <= event.frequency <= expected_band[1]
+    for channel in range(1, _SETTINGS.channel_count + 1):
+        channel_hfos = [event for event in hfos if event.channel == channel]
+        for previous, current in zip(channel_hfos, channel_hfos[1:]):
+            assert previous.stop <= current.start
+
+
+def test_score_detection_counts_matches():
+    events = [SyntheticEvent(1, 'ripple', 1.0, 1.05, 100),
+              SyntheticEvent(1, 'fast_ripple', 3.0, 3.02, 300),
+              SyntheticEvent(1, 'artifact', 5.0, 5.02, 0),
+              SyntheticEvent(2, 'ripple', 7.0, 7.05, 100)]
+    periods = Periods(start=[0.99, 5.0, 9.0], stop=[1.04, 5.01, 9.1])
+
+    score = score_detection(events, 1, periods)
+
+    assert (score.true_positives, score.false_negatives,
+            score.false_positives) == (1, 1, 2)
+    assert score.precision == 1 / 3
+    assert score.recall == 1 / 2
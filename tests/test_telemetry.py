@@ -0,0 +1,95 @@
+import contextvars
+import threading
+import numpy as np
+from snn_hfo_detection.telemetry import channel_scope, convert_report_to_prometheus, count_input_spikes, measure, record_telemetry, get_active_telemetry
+from snn_hfo_detection.user_facing_data import Bandwidth, FilteredSpikes, Metadata, SpikeTrains
+
+METADATA = Metadata(interval=1, channel=2, channel_label='A', duration=10)
+
+
+def test_measure_does_nothing_without_telemetry():
+    with measure('anything'):
+        pass
+    assert get_active_telemetry() is None
+
+
+def test_measure_records_channel_of_scope():
+    with record_telemetry() as telemetry:
+        with measure('loading'):
+            pass
+        with channel_scope(METADATA):
+            with measure('snn.run'):
+                pass
+    assert get_active_telemetry() is None
+
+    records = telemetry.records()
+    assert [(measurement.name, measurement.interval, measurement.channel)
+            for measurement in records.measurements] == [('loading', None, None), ('snn.run', 1, 2)]
+
+
+def test_measure_with_metadata_from_other_thread():
+    with record_telemetry() as telemetry:
+        def save():
+            with measure('saving', METADATA):
+                pass
+        thread = threading.Thread(
+            target=contextvars.copy_context().run, args=(save,))
+        thread.start()
+        thread.join()
+    [measurement] = telemetry.records().measurements
+    assert (measurement.interval, measurement.channel) == (1, 2)
+
+
+def test_runs_in_different_threads_record_separately():
+    both_recording = threading.Barrier(2)
+    telemetries = {}
+
+    def run(name):
+        with record_telemetry() as telemetry:
+            both_recording.wait()
+            with measure(name):
+                pass
+            both_recording.wait()
+        telemetries[name] = telemetry
+    threads = [threading.Thread(target=run, args=(name,))
+               for name in ['first', 'second']]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for name, telemetry in telemetries.items():
+        assert [measurement.name for measurement in telemetry.records().measurements] == [name]
+
+
+def test_report_counts_input_spikes_and_realtime_factor():
+    filtered_spikes = FilteredSpikes(
+        ripple=Bandwidth(signal=np.zeros(3), spike_trains=SpikeTrains(
+            up=np.array([0.1, 0.2]), down=np.array([0.3]))),
+        fast_ripple=Bandwidth(signal=np.zeros(3), spike_trains=SpikeTrains(
+            up=np.array([0.4]), down=np.array([]))),
+        above_fast_ripple=None)
+    with record_telemetry() as telemetry:
+        with channel_scope(METADATA):
+            with measure('snn.run'):
+                pass
+            count_input_spikes(filtered_spikes)
+    report = telemetry.create_report()
+
+    [channel] = report['channels']
+    assert channel['input_spike_count'] == 4
+    assert channel['recording_time'] == 10
+    assert channel['realtime_factor'] == 10 / channel['processing_time']
+    assert report['stages']['snn.run']['count'] == 1
+
+
+def test_prometheus_format():
+    with record_telemetry() as telemetry:
+        with channel_scope(METADATA):
+            with measure('snn.run'):
+                pass
+    prometheus_metrics = convert_report_to_prometheus(telemetry.create_report())
+    assert '# TYPE snn_hfo_detection_stage_wall_seconds gauge' in prometheus_metrics
+    assert 'snn_hfo_detection_stage_calls{stage="snn.run"} 1.0' in prometheus_metrics
+    assert 'snn_hfo_detection_channel_input_spikes{interval="1",channel="2"} 0.0' in prometheus_metrics
+    assert prometheus_metrics.endswith('\n')
@@ -4,6 +4,9 @@ import numpy as np
 
 
 def assert_are_lists_approximately_equal(first_list, second_list, accuracy=None):
+    # Detections and other array likes are compared as arrays
+    first_list = np.asarray(first_list)
+    second_list = np.asarray(second_list)
     assert np.all(np.array(first_list, dtype=np.array(second_list).dtype) == [
                   pytest.approx(_, abs=accuracy) for _ in second_list])
 